@@ -3,6 +3,8 @@ import random
 import sys
 import time
 
+import numpy as np
+
 # Adjusting the path
 current_directory = os.path.dirname(os.path.abspath(__file__))
 parent_directory = os.path.dirname(current_directory)
@@ -14,9 +16,23 @@ from snn.axons import Axon
 from snn.synapses import Synapse
 from snn.cores import Core
 from snn.neurons import Neuron, SensorNeuron, MotorNeuron
+from snn.clocks import Clock
+from snn.compilers import compile_network, compile_batch
+from snn.memory import memory_report
+from snn.parallel import ParallelNetwork
+from snn.distributed import DistributedNetwork
+from snn.builders import build_network
+from snn import checkpoints
 
 class Brain:
-    def __init__(self, input_size, hidden_size=[4,], output_size=1):
+    def __init__(self, input_size, hidden_size=[4,], output_size=1, lazy_synapses=False, phased=False):
+        # Shared clock of lazy synapses, they regenerate only when they are used
+        self.clock = Clock() if lazy_synapses else None
+
+        # Phased step: all neurons read the outputs of the previous tick, then all neurons update,
+        # so a spike moves one layer per tick and the result doesn't depend on the update order
+        self.phased = phased
+
          # Create sensor neurons
         self.sensors = [SensorNeuron() for _ in range(input_size)]
 
@@ -32,7 +48,7 @@ class Brain:
                 Neuron(core=Core(
                     dendrites=[Dendrite(weight=random.uniform(-20, 20))], 
                     membrane=Membrane(threshold=20.0, reset_ratio=0.0, leakage=1),
-                    axon=Axon([Synapse(transmitter_type='simple-signal-mediator', initial_level=100, regenerate_rate=1)]),
+                    axon=Axon([Synapse(transmitter_type='simple-signal-mediator', initial_level=100, regenerate_rate=1, clock=self.clock)]),
                     refractory_period=0, mode='cycle-train')) for _ in range(num_neurons)
             ]
             # bind Synapse to parent Neuron
@@ -58,12 +74,51 @@ class Brain:
 
         # Training
         # for _ in range(50):
+    def connect(self, source, target, weight=None, delay=1):
+        # Adds a dendrite to the neuron target = (layer, index) that reads the neuron source = (layer, index).
+        # Lateral (same layer) and recurrent (earlier layer) connections need a phased brain, where every
+        # neuron reads the spikes of the previous tick, so the wiring order doesn't change the result
+        (source_layer, source_index), (target_layer, target_index) = source, target
+        if target_layer <= source_layer and not self.phased:
+            raise ValueError("Lateral and recurrent connections need a phased brain, create it with phased=True.")
+        dendrite = Dendrite(weight=random.uniform(-20, 20) if weight is None else weight)
+        dendrite.connect(self._synapse(self.layers[source_layer][source_index], delay))
+        self.layers[target_layer][target_index].core.dendrites.append(dendrite)
+        return dendrite
+
+    def connect_layers(self, source_layer, target_layer, p=1.0, weight=None, delay=1, self_connections=False):
+        # Connects each neuron of target_layer to each neuron of source_layer with probability p,
+        # source_layer == target_layer gives lateral connections (without self connections by default)
+        connections = []
+        for j in range(len(self.layers[target_layer])):
+            for i in range(len(self.layers[source_layer])):
+                if source_layer == target_layer and i == j and not self_connections:
+                    continue
+                if p >= 1 or random.random() < p:
+                    connections.append(self.connect((source_layer, i), (target_layer, j), weight=weight, delay=delay))
+        return connections
+
+    def _synapse(self, neuron, delay):
+        # The synapse of neuron with the given delay, a new one is added to its axon if it has none
+        for synapse in neuron.core.axon.synapses:
+            if synapse.delay == delay:
+                return synapse
+        synapse = Synapse(transmitter_type='simple-signal-mediator', initial_level=100, regenerate_rate=1,
+                          clock=self.clock, delay=delay)
+        synapse.parent_neuron = neuron
+        neuron.core.axon.synapses.append(synapse)
+        return synapse
+
     def input(self, input_data):
         # Set input for the sensors
         for i in range(len(self.sensors)):
             self.sensors[i].set_input(input_data[i])
 
     def step(self):
+        if self.clock is not None:
+            self.clock.advance()
+        if self.phased:
+            return self.step_phased()
 
         # Step the sensors
         for sensor in self.sensors:
@@ -80,6 +135,164 @@ class Brain:
         
         return [motor.output_value for motor in self.motors]
 
+    def step_phased(self):
+        # Phase 1 (left): the neurons and motors gather the outputs of the previous tick, nothing is consumed
+        for layer in self.layers:
+            for neuron in layer:
+                neuron.step_left()
+        for motor in self.motors:
+            motor.step(peek=True)
+
+        # Phase 2 (right): the sensors and neurons update and replace their outputs,
+        # the neurons of a phase are independent and can be processed in any order or in parallel
+        for sensor in self.sensors:
+            sensor.step()
+        for layer in self.layers:
+            for neuron in layer:
+                neuron.step_right()
+
+        return [motor.output_value for motor in self.motors]
+
+    def is_idle(self):
+        # Nothing happens without new input: no sensor fires, no transmitter waits for a reader and no neuron fires on its own
+        if any(sensor.input_value > sensor.sensitivity for sensor in self.sensors):
+            return False
+        if self.phased and any(sensor.output_value for sensor in self.sensors):
+            return False
+        for layer in self.layers:
+            for neuron in layer:
+                if neuron.core.membrane.can_fire_without_input():
+                    return False
+                for dendrite in neuron.core.dendrites:
+                    if getattr(dendrite.post_synapse, 'received_code', 0):
+                        return False
+                if any(code for synapse in neuron.core.axon.synapses for _, code in synapse.in_flight()):
+                    return False
+        return not any(synapse.received_code for motor in self.motors for synapse in motor.post_synapses)
+
+    def advance(self, ticks):
+        # Executes ticks steps, once the brain is idle the remaining steps are applied at once
+        # (membrane leak, refractory countdown and synapse regeneration) instead of stepping them one by one
+        output = [motor.output_value for motor in self.motors]
+        while ticks > 0 and not self.is_idle():
+            output = self.step()
+            ticks -= 1
+        if ticks <= 0:
+            return output
+
+        if self.clock is not None:
+            self.clock.advance(ticks)
+        for sensor in self.sensors:
+            sensor.idle(ticks)
+        for layer in self.layers:
+            for neuron in layer:
+                neuron.idle(ticks)
+        for motor in self.motors:
+            motor.idle(ticks)
+        return [motor.output_value for motor in self.motors]
+
+    def compile(self, event_driven=False, fixed_point=False):
+        # Compile the neurons into a flat engine with the same input/step/train calls, sync() writes it back
+        return compile_network(self.sensors, self.layers, self.motors, event_driven=event_driven, fixed_point=fixed_point,
+                               phased=self.phased)
+
+    def compile_parallel(self, workers=2, fixed_point=False):
+        # Split the compiled neurons across worker processes, needs a phased brain (close() stops the workers)
+        return ParallelNetwork(self.compile(fixed_point=fixed_point), workers=workers)
+
+    def compile_distributed(self, addresses, lookahead=1, fixed_point=False):
+        # Split the compiled neurons across nodes listening on addresses (see snn.distributed.serve), needs a phased brain
+        return DistributedNetwork(self.compile(fixed_point=fixed_point), addresses, lookahead=lookahead)
+
+    @staticmethod
+    def build(input_size, hidden_size, output_size, connections, weight=(-20, 20), seed=None, phased=False, **parameters):
+        # Build a large network directly as engine arrays with vectorized random weights, no neuron objects are created.
+        # connections are (source, target, pattern) specs, see snn.builders.build_network
+        return build_network(input_size, hidden_size, output_size, connections, weight=weight, seed=seed,
+                             phased=phased, **parameters)
+
+    @staticmethod
+    def compile_batch(brains, fixed_point=False):
+        # Compile brains with the same topology into one batched engine, inputs and outputs get a leading brain axis
+        return compile_batch([(brain.sensors, brain.layers, brain.motors) for brain in brains], fixed_point=fixed_point,
+                             phased=brains[0].phased)
+
+    def memory_report(self):
+        # Bytes per neuron and per connection of the object graph
+        return memory_report(self.sensors, self.layers, self.motors)
+
+    def save(self, path):
+        # Save the wiring, parameters, weights and state as a binary checkpoint (see snn.checkpoints)
+        checkpoints.save(path, self.compile())
+
+    def restore(self, path):
+        # Load the weights and state of a checkpoint saved by a brain with the same wiring
+        network = self.compile()
+        checkpoints.restore(path, network)
+        network.sync()
+
+    @staticmethod
+    def load(path, mmap=True):
+        # Open a checkpoint as a compiled network, with mmap=True the arrays are paged in from the file as they are used
+        return checkpoints.load(path, mmap=mmap)
+
+    # Bulk access to the parameters: one flat array in layer, neuron and dendrite (or synapse) order,
+    # or a dict with one array per layer (per_layer=True). The objects hold the values, so these are copies,
+    # a compiled network returns views of its engine arrays instead (see CompiledNetwork.get_weights)
+    MEMBRANE_PARAMS = ('rest', 'threshold', 'reset_ratio', 'leakage', 'v_m')
+
+    def _dendrites(self):
+        return [[d for neuron in layer for d in neuron.core.dendrites] for layer in self.layers]
+
+    def _membranes(self):
+        return [[neuron.core.membrane for neuron in layer] for layer in self.layers]
+
+    def _synapses(self):
+        return [[s for neuron in layer for s in neuron.core.axon.synapses] for layer in self.layers]
+
+    @staticmethod
+    def _gather(groups, name, per_layer):
+        arrays = {i: np.array([getattr(obj, name) for obj in group], dtype=np.float64) for i, group in enumerate(groups)}
+        return arrays if per_layer else np.concatenate(list(arrays.values()))
+
+    @staticmethod
+    def _scatter(groups, name, values):
+        if not isinstance(values, dict):
+            values = np.asarray(values, dtype=np.float64)
+            if len(values) != sum(len(group) for group in groups):
+                raise ValueError(f"Expected {sum(len(group) for group in groups)} values, got {len(values)}.")
+            values = dict(enumerate(np.split(values, np.cumsum([len(group) for group in groups])[:-1])))
+        for i, layer_values in values.items():
+            if len(layer_values) != len(groups[i]):
+                raise ValueError(f"Layer {i} needs {len(groups[i])} values, got {len(layer_values)}.")
+            for obj, value in zip(groups[i], np.asarray(layer_values).tolist()):
+                setattr(obj, name, value)
+
+    def get_weights(self, per_layer=False):
+        return self._gather(self._dendrites(), 'weight', per_layer)
+
+    def set_weights(self, weights):
+        # weights is a flat array or a dict {layer: array}, layers missing from the dict are left as they are
+        self._scatter(self._dendrites(), 'weight', weights)
+
+    def get_membrane_params(self, per_layer=False):
+        membranes = self._membranes()
+        return {name: self._gather(membranes, name, per_layer) for name in self.MEMBRANE_PARAMS}
+
+    def set_membrane_params(self, params):
+        # params is a dict {name: values} with names from MEMBRANE_PARAMS, values as for set_weights
+        membranes = self._membranes()
+        for name, values in params.items():
+            if name not in self.MEMBRANE_PARAMS:
+                raise ValueError(f"Unknown membrane parameter {name}.")
+            self._scatter(membranes, name, values)
+
+    def get_synapse_levels(self, per_layer=False):
+        return self._gather(self._synapses(), 'neurotransmitter_level', per_layer)
+
+    def set_synapse_levels(self, levels):
+        self._scatter(self._synapses(), 'neurotransmitter_level', levels)
+
     def train(self, error):                    
         errors = []  # Calculate the appropriate errors here
         for neuron in self.layers[-1]:
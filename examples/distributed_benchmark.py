@@ -0,0 +1,47 @@
+import os
+import sys
+import time
+
+import numpy as np
+
+# Adjusting the path
+current_directory = os.path.dirname(os.path.abspath(__file__))
+parent_directory = os.path.dirname(current_directory)
+sys.path.append(parent_directory)
+
+from snn.builders import build_network, one_to_one, random_sparse
+from snn.distributed import DistributedNetwork, LocalCluster
+
+#-------------------------------------------------------------------------------------------------------------#
+# Communication report of DistributedNetwork on localhost nodes: bytes and latency per tick, for a few node   #
+# counts and lookaheads.                                                                                      #
+#-------------------------------------------------------------------------------------------------------------#
+
+NEURONS = 5_000
+DENDRITES = 50   # per neuron, on average
+SENSORS = 100
+MOTORS = 10
+TICKS = 300
+
+
+def build_random_network(seed=0):
+    """Builds a random recurrent phased network: every neuron reads random synapses and sensors."""
+    p = DENDRITES / (NEURONS + SENSORS)
+    return build_network(SENSORS, [NEURONS], MOTORS, seed=seed, weight=(-2, 6), phased=True,
+                         connections=[('sensors', 0, random_sparse(p)), (0, 0, random_sparse(p)), (0, 'motors', one_to_one())])
+
+
+if __name__ == '__main__':
+    inputs = np.random.default_rng(1).choice([0, 0.3, 0.7], size=(TICKS, SENSORS))
+    print(f"{NEURONS} neurons, about {NEURONS * DENDRITES} connections, {TICKS} ticks")
+    for nodes in (2, 4):
+        for lookahead in (1, 4):
+            with LocalCluster(nodes) as cluster, DistributedNetwork(build_random_network(), cluster.addresses, lookahead) as network:
+                start = time.perf_counter()
+                for data in inputs:
+                    network.input(data)
+                    network.step()
+                rate = TICKS / (time.perf_counter() - start)
+                traffic = network.communication()
+            print(f"{nodes} nodes, lookahead {lookahead}: {rate:7.1f} ticks/sec, "
+                  f"{traffic['bytes']:7.0f} bytes/tick, {traffic['latency'] * 1000:6.2f} ms/tick waiting")
@@ -0,0 +1,49 @@
+import os
+import sys
+import time
+
+import numpy as np
+
+# Adjusting the path
+current_directory = os.path.dirname(os.path.abspath(__file__))
+parent_directory = os.path.dirname(current_directory)
+sys.path.append(parent_directory)
+
+from snn.builders import build_network, one_to_one, random_sparse
+from snn.parallel import ParallelNetwork
+
+#-------------------------------------------------------------------------------------------------------------#
+# Scaling benchmark of ParallelNetwork: ticks per second of one phased network for 1, 2, 4 and 8 workers.     #
+# The speedup is bounded by the cores of the machine (os.cpu_count()).                                        #
+#-------------------------------------------------------------------------------------------------------------#
+
+NEURONS = 20_000
+DENDRITES = 100   # per neuron, on average
+SENSORS = 200
+MOTORS = 10
+TICKS = 200
+
+
+def build_random_network(seed=0):
+    """Builds a random recurrent phased network: every neuron reads random synapses and sensors."""
+    p = DENDRITES / (NEURONS + SENSORS)
+    return build_network(SENSORS, [NEURONS], MOTORS, seed=seed, weight=(-2, 6), phased=True,
+                         connections=[('sensors', 0, random_sparse(p)), (0, 0, random_sparse(p)), (0, 'motors', one_to_one())])
+
+
+def run(network, inputs):
+    """Steps the network through the inputs and returns ticks per second."""
+    start = time.perf_counter()
+    for data in inputs:
+        network.input(data)
+        network.step()
+    return len(inputs) / (time.perf_counter() - start)
+
+
+if __name__ == '__main__':
+    inputs = np.random.default_rng(1).choice([0, 0.3, 0.7], size=(TICKS, SENSORS))
+    print(f"{NEURONS} neurons, about {NEURONS * DENDRITES} connections, {os.cpu_count()} cores")
+    print(f"single process: {run(build_random_network(), inputs):8.1f} ticks/sec")
+    for workers in (1, 2, 4, 8):
+        with ParallelNetwork(build_random_network(), workers=workers) as network:
+            print(f"{workers} worker(s):    {run(network, inputs):8.1f} ticks/sec")
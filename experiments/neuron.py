@@ -1,14 +1,20 @@
+import os
 import random
+import sys
+from collections import OrderedDict
 import pygame
 import numpy as np
+# Add the parent directory to sys.path (for the snn checkpoint format)
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from snn.checkpoints import write, read
+from snn import engines
 class Neuron:
     """ 0 layer is for input neurons (sensors only layer), have less core processing."""
     def __init__(self, layer_dept = None, signal_type = "binary", refactory_period=0):
         # Connection properties
-        self.connections = [] # list of dicts [ {'neuron': neuron, 'weight': weight, 'ttl': ttl, 's_stab': s_stab}, ...]
+        self.connections = Neuron.Connections() # arrays that behave like a list of dicts [ {'neuron': neuron, 'weight': weight, 'ttl': ttl, 's_stab': s_stab}, ...]
         # "ttl" is "time of transmitter leakage", or Time-Transmitter-Live (TTL) mechanism for synaptic weights, mimics the idea of short-term plasticity in biology.
         # "s_stab" connection (synapse) stability gives for frequently used channels greater resistance to learning. (protection of long experience) min=1, max=100
-        # impruve performance by changing list of dicts to numpy arrays
 
         self.min_max_weight = (-127, 127)
         self.min_max_ttl = (0, 255)
@@ -135,6 +141,480 @@ class Neuron:
         pass
     '''
 
+    class Connections:
+        """
+        Connections of a neuron in parallel arrays, a drop-in for the list of connection dicts.
+        The source neurons are in a list (shared by all neurons of a fully connected layer, copied before a change),
+        weight, ttl and s_stab in one structured array, and an index maps id(source neuron) to its (first) slot,
+        so the connection methods of Neuron find a connection in O(1) instead of scanning the list.
+        len(), iteration, [i], conn['weight'] get/set, append() and remove() work like on the list of dicts.
+        """
+        __slots__ = ('neurons', '_index', '_data', 'size', '_shared')
+        DTYPE = np.dtype([('weight', np.float64), ('ttl', np.int64), ('s_stab', np.float64)])
+
+        class Connection:
+            """
+            Dict-like view of one connection.
+            """
+            __slots__ = ('store', 'slot')
+
+            def __init__(self, store, slot):
+                self.store = store
+                self.slot = slot
+
+            def __getitem__(self, key):
+                return self.store.get(self.slot, key)
+
+            def __setitem__(self, key, value):
+                self.store.set(self.slot, key, value)
+
+        def __init__(self, neurons=(), weights=(), ttl=0, s_stab=1, index=None):
+            """
+            neurons with an index (see index_of) are shared with other stores, otherwise they are copied.
+            """
+            self._shared = index is not None
+            self.neurons = neurons if self._shared else list(neurons)
+            self._index = index
+            self.size = len(self.neurons)
+            self._data = np.zeros(self.size, dtype=self.DTYPE)
+            self.weights = weights
+            self.ttls = ttl
+            self.s_stabs = s_stab
+
+        @staticmethod
+        def index_of(neurons):
+            """
+            Map id(neuron) to the first slot of the neuron.
+            """
+            index = {}
+            for slot, neuron in enumerate(neurons):
+                index.setdefault(id(neuron), slot)
+            return index
+
+        @property
+        def data(self):
+            return self._data[:self.size]
+
+        # stored values as arrays, the encoding is overridden by QuantizedConnections
+        def encode(self, key, values):
+            return values
+
+        def decode(self, key, values):
+            return values
+
+        @property
+        def weights(self):
+            return self.decode('weight', self.data['weight'])
+
+        @weights.setter
+        def weights(self, values):
+            self.data['weight'] = self.encode('weight', values)
+
+        @property
+        def ttls(self):
+            return self.decode('ttl', self.data['ttl'])
+
+        @ttls.setter
+        def ttls(self, values):
+            self.data['ttl'] = self.encode('ttl', values)
+
+        @property
+        def s_stabs(self):
+            return self.decode('s_stab', self.data['s_stab'])
+
+        @s_stabs.setter
+        def s_stabs(self, values):
+            self.data['s_stab'] = self.encode('s_stab', values)
+
+        def outputs(self):
+            """
+            Current output of every source neuron.
+            """
+            return np.array([neuron.get_output() for neuron in self.neurons], dtype=np.float64)
+
+        # list of dicts interface
+        def __len__(self):
+            return self.size
+
+        def __iter__(self):
+            return (self.Connection(self, slot) for slot in range(self.size))
+
+        def __getitem__(self, slot):
+            return self.Connection(self, range(self.size)[slot])
+
+        def get(self, slot, key):
+            if key == 'neuron':
+                return self.neurons[slot]
+            if key not in self.DTYPE.names:
+                raise KeyError(key)
+            return self.decode(key, self.data[key][slot:slot + 1])[0].item()
+
+        def set(self, slot, key, value):
+            if key == 'neuron':
+                self._own()
+                self.neurons[slot] = value
+                self._index = None
+            elif key in self.DTYPE.names:
+                self.data[key][slot:slot + 1] = self.encode(key, [value])
+            else:
+                raise KeyError(key)
+
+        def slot(self, neuron):
+            """
+            First slot of a connection to neuron, or None.
+            """
+            if self._index is None:
+                self._index = self.index_of(self.neurons)
+            return self._index.get(id(neuron))
+
+        def unique(self):
+            """
+            True if no neuron is connected twice.
+            """
+            if self._index is None:
+                self._index = self.index_of(self.neurons)
+            return len(self._index) == self.size
+
+        def _own(self):
+            if self._shared:
+                self.neurons = list(self.neurons)
+                self._index = dict(self._index)
+                self._shared = False
+
+        def append(self, connection):
+            self._own()
+            if self.size == len(self._data): # grow by doubling, so appending one by one is amortized O(1)
+                self._data = np.resize(self._data, max(4, 2 * self.size))
+            self.size += 1
+            self.neurons.append(connection['neuron'])
+            if self._index is not None:
+                self._index.setdefault(id(connection['neuron']), self.size - 1)
+            for key in self.DTYPE.names:
+                self.set(self.size - 1, key, connection[key])
+
+        def remove(self, connection):
+            self._own()
+            slot = connection.slot
+            del self.neurons[slot]
+            self._data[slot:self.size - 1] = self._data[slot + 1:self.size]
+            self.size -= 1
+            self._index = None
+
+        # vectorized neuron processing
+        def gather_input(self, outputs=None, start=0, bounds=(-100, 100), rounding=4):
+            """
+            Add the inputs of all connections to start, like Neuron.process_input: connections with ttl > 0 add their weight
+            and count ttl down, the others add weight * output of their source neuron. The sum is bounded and rounded
+            after every connection. outputs are the source outputs (e.g. of a whole layer, computed once), gathered from the neurons if omitted.
+            """
+            outputs = self.outputs() if outputs is None else outputs
+            ttl = self.data['ttl']
+            persistent = ttl > 0
+            inputs = np.where(persistent, self.weights, self.weights * outputs)
+            ttl[persistent] -= 1
+            if self.size == 0:
+                return start
+            # on the rounding grid the rounded sum is an integer sum, whose bounded scan is vectorized
+            grid = 10 ** rounding
+            steps = np.rint(inputs * grid)
+            if round(start, rounding) == start and np.array_equal(steps / grid, inputs):
+                total = Neuron.Connections.bounded_sum(steps.astype(np.int64), round(start * grid), round(bounds[0] * grid), round(bounds[1] * grid))
+                return total / grid
+            total = start
+            for value in inputs.tolist():
+                total = round(min(bounds[1], max(bounds[0], total + value)), rounding)
+            return total
+
+        def reinforce(self, error, stab_error, stabilization, min_max_weight, rounding=4):
+            """
+            Neuron.reinforcement on all involved (spiked) connections at once, with the results of add_weight and add_s_stab.
+            """
+            active = self.outputs() != 0
+            s_stab = self.s_stabs[active]
+            weights = Neuron.round_array(self.weights[active] + (error / s_stab if stabilization else error), rounding)
+            self.data['weight'][active] = self.encode('weight', Neuron.round_array(np.clip(weights, *min_max_weight), rounding))
+            if stabilization:
+                self.data['s_stab'][active] = Neuron.stabilize(s_stab, stab_error, rounding)
+
+        @staticmethod
+        def bounded_sum(steps, total, low, high):
+            """
+            total + steps bounded to [low, high] after every step. With one bound the bounded partial sums have a closed form
+            (e.g. p + min(total, min(high - p)) for the partial sums p), so the scan restarts only where the other bound is hit.
+            """
+            upper = True
+            while len(steps):
+                partial = np.cumsum(steps)
+                if upper:
+                    path = partial + np.minimum(total, np.minimum.accumulate(high - partial))
+                    out = np.flatnonzero(path < low)
+                else:
+                    path = partial + np.maximum(total, np.maximum.accumulate(low - partial))
+                    out = np.flatnonzero(path > high)
+                if not len(out):
+                    return int(path[-1])
+                total = low if upper else high
+                steps = steps[out[0] + 1:]
+                upper = not upper
+            return total
+
+    class QuantizedConnections(Connections):
+        """
+        Compact connection store: 3 bytes per connection, int8 weight (in units of a per-layer scale), uint8 ttl and uint8 s_stab code.
+        s_stab codes are log-spaced over [1, 100] (code c is 100 ** (c / 255), 1.8% apart). Stabilization steps are often smaller
+        than that, so updated s_stab values are rounded stochastically to a neighbour code, which keeps their mean growth.
+        reinforcement() and cooperation() run directly on the arrays, process_input() sums like Connections (bounded after every connection).
+        The rounding draws from rng (a numpy Generator, given or seeded from random on first use), so s_stab diverges from the float
+        Connections: it only follows Neuron.stabilize on average, and a quantized network doesn't repeat the runs of a float one.
+        """
+        __slots__ = ('scale', 'rng')
+        DTYPE = np.dtype([('weight', np.int8), ('ttl', np.uint8), ('s_stab', np.uint8)])
+        S_STAB_VALUES = 100 ** (np.arange(256) / 255) # s_stab of each code
+
+        def __init__(self, neurons=(), weights=(), ttl=0, s_stab=1, index=None, scale=1.0, rng=None):
+            self.scale = scale # weight of one int8 step
+            self.rng = rng # generator of the stochastic rounding, None creates one on first use
+            super().__init__(neurons, weights, ttl, s_stab, index)
+
+        @staticmethod
+        def from_connections(connections, scale=1.0, rng=None):
+            """
+            Convert the connections of a neuron (Connections or a list of dicts), sharing the source neurons of a Connections.
+            """
+            if isinstance(connections, Neuron.Connections):
+                index = connections._index if connections._shared else None
+                return Neuron.QuantizedConnections(connections.neurons, connections.weights, connections.ttls, connections.s_stabs, index, scale, rng)
+            return Neuron.QuantizedConnections([conn['neuron'] for conn in connections], [conn['weight'] for conn in connections],
+                                               [conn['ttl'] for conn in connections], [conn['s_stab'] for conn in connections], scale=scale, rng=rng)
+
+        def encode(self, key, values):
+            values = np.asarray(values, dtype=np.float64)
+            if key == 'weight':
+                return np.clip(np.rint(values / self.scale), -127, 127).astype(np.int8)
+            if key == 'ttl':
+                return np.clip(values, 0, 255).astype(np.uint8)
+            return np.clip(np.rint(np.log(np.clip(values, 1, 100)) / np.log(100) * 255), 0, 255).astype(np.uint8)
+
+        def decode(self, key, values):
+            if key == 'weight':
+                return values * self.scale
+            if key == 'ttl':
+                return values.astype(np.int64)
+            return self.S_STAB_VALUES[values]
+
+        def stochastic_s_stab_codes(self, s_stab):
+            codes = np.log(np.clip(s_stab, 1, 100)) / np.log(100) * 255
+            if self.rng is None: # seeded from random, so random.seed() makes runs repeatable
+                self.rng = np.random.default_rng(random.getrandbits(64))
+            codes = np.floor(codes + self.rng.random(codes.shape))
+            return np.clip(codes, 0, 255).astype(np.uint8)
+
+        def add_weights(self, mask, values, min_max_weight):
+            self.data['weight'][mask] = self.encode('weight', np.clip(self.weights[mask] + values, *min_max_weight))
+
+        def reinforce(self, error, stab_error, stabilization, min_max_weight, rounding=4):
+            """
+            Neuron.reinforcement on all involved (spiked) connections at once.
+            """
+            active = self.outputs() != 0
+            s_stab = self.s_stabs[active]
+            self.add_weights(active, error / s_stab if stabilization else error, min_max_weight)
+            if stabilization:
+                self.data['s_stab'][active] = self.stochastic_s_stab_codes(Neuron.stabilize(s_stab, stab_error, rounding))
+
+        def cooperate(self, error, rand_learning, min_max_weight):
+            """
+            Neuron.cooperation on all not involved connections with a non-negative weight at once.
+            """
+            idle = (self.outputs() == 0) & (self.weights >= 0)
+            noise = np.array([random.uniform(0, rand_learning) for _ in range(np.count_nonzero(idle))])
+            self.add_weights(idle, (noise - error) / self.s_stabs[idle], min_max_weight)
+
+    class Layer:
+        """
+        Matrix backend of NN.forward for one layer. The connections of the layer are one weight/ttl/s_stab matrix (sources in columns)
+        whose rows are the arrays of the Connections of its neurons, so learning on the neurons changes the matrix in place.
+        forward() reads the neuron states into vectors (input, v_m, sensitivity, refractory counter), runs process_input and
+        the step activation of all neurons as array operations with the same results, and writes the states back.
+        Layers the matrix can't hold (quantized or partial connections, other activation functions) are forwarded neuron by neuron.
+        """
+        def __init__(self, neurons, sources=None):
+            """
+            neurons - neurons of the layer, sources - the previous layer (None for the sensors).
+            """
+            self.neurons = neurons
+            self.sources = sources
+            self.data = None
+            n_sources = len(sources) if sources is not None else 0
+            self.matrix = (len(neurons) > 0 and all(neuron.activation_function == 'step' and neuron.rounding == neurons[0].rounding
+                                                    and neuron.signal_type == neurons[0].signal_type for neuron in neurons)
+                           and all(type(neuron.connections) is Neuron.Connections and len(neuron.connections) == n_sources
+                                   and (n_sources == 0 or neuron.connections.neurons is sources) for neuron in neurons))
+            if self.matrix:
+                self.data = np.zeros((len(neurons), n_sources), dtype=Neuron.Connections.DTYPE)
+                for row, neuron in enumerate(neurons):
+                    self.data[row] = neuron.connections.data
+                    neuron.connections._data = self.data[row]
+
+        def valid(self):
+            """
+            False if the connections of a neuron left the matrix (e.g. after connect() or disconnect()), the layer must be built again.
+            """
+            if not self.matrix:
+                return True
+            return all(neuron.connections._data.base is self.data and len(neuron.connections) == self.data.shape[1] for neuron in self.neurons)
+
+        @staticmethod
+        def bounded_sums(steps, total, low, high):
+            """
+            Connections.bounded_sum of every row: total + steps of the row bounded to [low, high] after every step (integers, one per row).
+            A step is x -> clip(x + step, low, high) and two such functions compose to one: clip(clip(x + a, l1, h1) + b, l2, h2) =
+            clip(x + a + b, clip(l1 + b, l2, h2), clip(h1 + b, l2, h2)), so the steps of all rows are composed pairwise in log2(n) passes.
+            """
+            shift = steps
+            low, high = low[:, None], high[:, None]
+            lower, upper = np.broadcast_to(low, shift.shape), np.broadcast_to(high, shift.shape)
+            while shift.shape[1] > 1:
+                if shift.shape[1] % 2: # a last step of 0 doesn't change the sum
+                    shift = np.hstack([shift, np.zeros_like(low)])
+                    lower, upper = np.hstack([lower, low]), np.hstack([upper, high])
+                step = shift[:, 1::2]
+                lower, upper = np.clip(lower[:, ::2] + step, lower[:, 1::2], upper[:, 1::2]), np.clip(upper[:, ::2] + step, lower[:, 1::2], upper[:, 1::2])
+                shift = shift[:, ::2] + step
+            return np.clip(total + shift[:, 0], lower[:, 0], upper[:, 0])
+
+        def forward(self, outputs=None):
+            """
+            Forward all neurons of the layer, outputs are the outputs of the sources (gathered if omitted). Returns the outputs of the layer.
+            """
+            neurons = self.neurons
+            if not self.matrix:
+                for neuron in neurons:
+                    neuron.forward(outputs if self.sources is not None and neuron.connections.neurons is self.sources else None)
+                return np.array([neuron.get_output() for neuron in neurons], dtype=np.float64)
+            rounding = neurons[0].rounding
+            state = np.array([(neuron.input, neuron.v_m, neuron.sensitivity['val'], neuron.refractory_period_counter, neuron.threshold, neuron.rest,
+                               neuron.reset_ratio['val'], neuron.leakage['val'], neuron.sensitivity_normal, neuron.sensitivity_adjust_rate['val'],
+                               neuron.sensitivity_restore_rate['val'], neuron.refractory_period['val'], neuron.layer_dept != 0,
+                               *neuron.min_max_input, *neuron.min_max_v_m, neuron.sensitivity['min'], neuron.sensitivity['max']) for neuron in neurons],
+                             dtype=np.float64)
+            (total, v_m, sensitivity, refractory, threshold, rest, reset_ratio, leakage, sensitivity_normal, adjust_rate, restore_rate,
+             refractory_period, hidden, min_input, max_input, min_v_m, max_v_m, min_sensitivity, max_sensitivity) = state.T
+            hidden = hidden != 0
+
+            # Dendrites processing - Accumulate input, see Connections.gather_input
+            total = np.where(hidden, 0, total)
+            if self.data.shape[1]:
+                if outputs is None:
+                    outputs = np.array([source.get_output() for source in self.sources], dtype=np.float64)
+                weight, ttl = self.data['weight'], self.data['ttl']
+                persistent = ttl > 0
+                inputs = np.where(persistent, weight, weight * outputs)
+                grid = 10 ** rounding
+                steps = np.rint(inputs * grid)
+                bounds = np.concatenate([total, min_input, max_input])
+                if np.array_equal(steps / grid, inputs) and np.array_equal(np.rint(bounds * grid) / grid, bounds):
+                    ttl[persistent] -= 1
+                    total = self.bounded_sums(steps.astype(np.int64), *np.rint(bounds * grid).astype(np.int64).reshape(3, -1)) / grid
+                else: # off the grid the sums are rounded after every connection
+                    total = np.array([neuron.connections.gather_input(outputs, start, neuron.min_max_input, rounding)
+                                      for neuron, start in zip(neurons, total.tolist())])
+
+            # Membrane processing - step activation, see process_activation
+            v_m = Neuron.round_array(np.clip(v_m + total, min_v_m, max_v_m), rounding)
+            active_potential = Neuron.round_array(threshold * (sensitivity / 100), rounding)
+            spike = (v_m >= active_potential) & (refractory == 0)
+            if neurons[0].signal_type == 'numeric':
+                with np.errstate(divide='ignore', invalid='ignore'): # min-max normalization of the neurons that spiked
+                    signal = (v_m - active_potential - active_potential) / (max_v_m - active_potential - active_potential + 1) * 100
+                output = np.where(spike, np.clip(Neuron.round_array(np.where(spike, signal, 0), rounding), 1, 100), 0)
+            else:
+                output = spike
+            reset = spike & hidden
+            rested = np.where(v_m > active_potential, active_potential, v_m)
+            v_m = np.where(reset, Neuron.round_array(rest + (reset_ratio * (threshold - rest)), rounding),
+                           np.where(spike, v_m, Neuron.round_array(rested * (1 - leakage / 100), rounding)))
+            refractory = np.where(reset, refractory_period, np.where(spike | (refractory <= 0), refractory, refractory - 1))
+            restore = np.where(sensitivity > sensitivity_normal, -restore_rate, np.where(sensitivity < sensitivity_normal, restore_rate, 0))
+            sensitivity = sensitivity + np.where(reset, adjust_rate, np.where(spike, 0, restore))
+            sensitivity = np.minimum(max_sensitivity, np.maximum(sensitivity, min_sensitivity))
+
+            # write the states back
+            if neurons[0].signal_type == 'numeric':
+                spikes = [value if fired else 0 for value, fired in zip(output.tolist(), spike.tolist())]
+            else:
+                spikes = spike.tolist()
+            for neuron, value, potential, counter, level in zip(neurons, spikes, v_m.tolist(), refractory.astype(np.int64).tolist(), sensitivity.tolist()):
+                neuron.input = 0
+                neuron.spike = value
+                neuron.v_m = potential
+                neuron.refractory_period_counter = counter
+                neuron.sensitivity['val'] = level
+                # Axon - processing
+                neuron.output_history.append(value)
+            return np.asarray(output, dtype=np.float64)
+
+    S_STAB_STEPS = OrderedDict() # (sign, k, rounding) -> lookup table of k stabilization steps, least recently used first
+    S_STAB_TABLES = 8 # tables kept in S_STAB_STEPS, 4 MB each with rounding=4
+
+    @staticmethod
+    def round_array(values, rounding=4):
+        """
+        round(value, rounding) of every value of an array, see snn.engines.round_array.
+        """
+        return engines.round_array(values, rounding)
+
+    @staticmethod
+    def s_stab_step(s_stab, sign, rounding=4):
+        """
+        One stabilization step s += sign/((s+1)*s), rounded and bounded to [1, 100].
+        """
+        return np.clip(Neuron.round_array(s_stab + sign / ((s_stab + 1) * s_stab), rounding), 1, 100)
+
+    @staticmethod
+    def s_stab_steps(sign, k, rounding=4):
+        """
+        Lookup table of k stabilization steps over the s_stab grid [1, 100]: entry i is the grid index (s = 1 + i / 10**rounding)
+        after k steps of s_stab_step from grid index i.
+        """
+        key = (sign, k, rounding)
+        if key in Neuron.S_STAB_STEPS:
+            Neuron.S_STAB_STEPS.move_to_end(key)
+            return Neuron.S_STAB_STEPS[key]
+        grid = 10 ** rounding
+        if k == 1:
+            s_stab = Neuron.s_stab_step(np.arange(grid, 100 * grid + 1) / grid, sign, rounding)
+            table = (np.rint(s_stab * grid) - grid).astype(np.int32)
+        else:
+            # k steps are k - k//2 steps followed by k//2 steps, so k tables take log2(k) compositions
+            table = Neuron.s_stab_steps(sign, k // 2, rounding)[Neuron.s_stab_steps(sign, k - k // 2, rounding)]
+        Neuron.S_STAB_STEPS[key] = table
+        while len(Neuron.S_STAB_STEPS) > Neuron.S_STAB_TABLES:
+            Neuron.S_STAB_STEPS.popitem(last=False)
+        return table
+
+    @staticmethod
+    def stabilize(s_stab, stab_error, rounding=4):
+        """
+        Apply add_s_stab to an array of s_stab values (e.g. of all involved connections of a neuron or of a layer) with the same results:
+        max(1, |round(stab_error)|) steps of s += 1/((s+1)*s) (or s -= for a negative stab_error), rounded and bounded to [1, 100] on every step.
+        The first step brings the values to the rounding grid. The other steps are one lookup in s_stab_steps if its table is cached or
+        cheaper than stepping the values (about one table entry per value and step), else the values are stepped directly.
+        """
+        s_stab = np.asarray(s_stab, dtype=np.float64)
+        if stab_error == 0 or s_stab.size == 0:
+            return s_stab
+        sign = 1 if stab_error > 0 else -1
+        s_stab = Neuron.s_stab_step(s_stab, sign, rounding)
+        k = max(1, abs(round(stab_error))) - 1
+        grid = 10 ** rounding
+        if k and ((sign, k, rounding) in Neuron.S_STAB_STEPS or s_stab.size * k > 99 * grid):
+            s_stab = (Neuron.s_stab_steps(sign, k, rounding)[np.rint(s_stab * grid).astype(np.int64) - grid] + grid) / grid
+        else:
+            for _ in range(k):
+                s_stab = Neuron.s_stab_step(s_stab, sign, rounding)
+        return s_stab
+
     # Connection methods - one to many connections (dendritic).
     def connect(self, other_neuron, weight=None, ttl=0, s_stab=1, ): # s_stab cant be 0! (division by zero error)
         """
@@ -153,10 +633,9 @@ class Neuron:
         """
         Disconnect from other neuron.
         """
-        for connection in self.connections:
-            if connection['neuron'] == other_neuron:
-                self.connections.remove(connection)
-                break
+        slot = self.connections.slot(other_neuron)
+        if slot is not None:
+            self.connections.remove(self.connections[slot])
         
         # TODO: dendrite decay analogy to emulate neuroplasticity of network.
 
@@ -164,51 +643,46 @@ class Neuron:
         """
         Set weight and ttl of connection to target neuron.
         """
-        for connection in self.connections:
-            if connection['neuron'] == target_neuron:
-                if weight is not None:
-                    connection['weight'] = round(weight, self.rounding)
-                if ttl is not None:
-                    connection['ttl'] = ttl
-                break
+        slot = self.connections.slot(target_neuron)
+        if slot is not None:
+            if weight is not None:
+                self.connections.set(slot, 'weight', round(weight, self.rounding))
+            if ttl is not None:
+                self.connections.set(slot, 'ttl', ttl)
 
     def get_weight_and_ttl(self, other_neuron):
         """
         Get weight and ttl of connection to other neuron.
         """
-        for connection in self.connections:
-            if connection['neuron'] == other_neuron:
-                return connection['weight'], connection['ttl']
+        slot = self.connections.slot(other_neuron)
+        if slot is not None:
+            return self.connections.get(slot, 'weight'), self.connections.get(slot, 'ttl')
         return None, None
     
     def add_weight(self, target_neuron, value=None):
         """
         Add weight of connection to target neuron.
         """
-        for connection in self.connections:
-            if connection['neuron'] == target_neuron:
-                if value is not None:
-                    new_weight = round(connection['weight'] + value, self.rounding)
-                    connection['weight'] = round(min(self.min_max_weight[1], max(self.min_max_weight[0], new_weight)), self.rounding) # boundary checks
-                break
+        slot = self.connections.slot(target_neuron)
+        if slot is not None and value is not None:
+            new_weight = round(self.connections.get(slot, 'weight') + value, self.rounding)
+            self.connections.set(slot, 'weight', round(min(self.min_max_weight[1], max(self.min_max_weight[0], new_weight)), self.rounding)) # boundary checks
 
     def set_s_stab(self, target_neuron, s_stab=None):
         """
         Set s_stab of connection to target neuron.
         """
-        for connection in self.connections:
-            if connection['neuron'] == target_neuron:
-                if s_stab is not None and s_stab > 0:
-                    connection['s_stab'] = s_stab
-                break
+        slot = self.connections.slot(target_neuron)
+        if slot is not None and s_stab is not None and s_stab > 0:
+            self.connections.set(slot, 's_stab', s_stab)
     
     def get_s_stab(self, other_neuron):
         """
         Get s_stab of connection to other neuron.
         """
-        for connection in self.connections:
-            if connection['neuron'] == other_neuron:
-                return connection['s_stab']
+        slot = self.connections.slot(other_neuron)
+        if slot is not None:
+            return self.connections.get(slot, 's_stab')
         return None
 
     def add_s_stab(self, target_neuron, stab_error):
@@ -219,16 +693,11 @@ class Neuron:
         
         Add s_stab of connection to target neuron in negative geometric progression.
         """
-        if stab_error != 0: # need in case of stab_error = 0.xxxx
-            for _ in range(max(1, abs(round(stab_error)))):
-                for connection in self.connections:
-                    if connection['neuron'] == target_neuron:
-                        if stab_error > 0:
-                            s = round( connection['s_stab'] + (1/((connection['s_stab']+1)*connection['s_stab'])), self.rounding) # the higher the number, the slower it increases
-                        else:
-                            s = round( connection['s_stab'] - (1/((connection['s_stab']+1)*connection['s_stab'])), self.rounding) # the higher the number, the slower it decreases
-                        connection['s_stab'] = min(100, max(1, s)) # boundary checks min=1, max=100
-                        break
+        slot = self.connections.slot(target_neuron)
+        if stab_error != 0 and slot is not None: # need in case of stab_error = 0.xxxx
+            # the higher the number, the slower it increases (decreases), boundary checks min=1, max=100
+            s_stab = Neuron.stabilize([self.connections.get(slot, 's_stab')], stab_error, self.rounding)
+            self.connections.set(slot, 's_stab', s_stab.item())
     
     def get_output_history(self):
         """
@@ -243,23 +712,16 @@ class Neuron:
         """
         return self.spike
     
-    def process_input(self):
+    def process_input(self, outputs=None):
         """
         Accumulate input from all connections.
+        outputs - outputs of the source neurons computed once for a whole layer, gathered from the connected neurons if omitted.
         """
         if self.layer_dept != 0: # headen layer
             self.input = 0
-        for connection in self.connections:
-            # ttl processing old inputs
-            if connection['ttl'] > 0:
-                # weight-to-timer ratio with input persistence
-                self.input += connection['weight'] # TODO: tgradual decrease of weight with ttl and last input state
-                connection['ttl'] -= 1
-                pass # TODO: ttl processing now it's just a dummy placeholder! Must be Ratio of weight to timer and fade-out.
-            elif connection['neuron'].get_output():
-                self.input += connection['weight'] * connection['neuron'].get_output()
-            #input bounded by min_max_input
-            self.input = round(min(self.min_max_input[1], max(self.min_max_input[0], self.input)), self.rounding)
+        # ttl processing old inputs: weight-to-timer ratio with input persistence
+        # TODO: ttl processing now it's just a dummy placeholder! Must be Ratio of weight to timer and fade-out.
+        self.input = self.connections.gather_input(outputs, self.input, self.min_max_input, self.rounding) # input bounded by min_max_input
 
     def process_activation(self):
         """
@@ -324,13 +786,14 @@ class Neuron:
         """
         pass
         
-    def forward(self):
+    def forward(self, outputs=None):
         """
         forwarding data from left to right with full cycle of neurocalculation, sequential data collection and firing of each neuron, layer by layer, without left and right steps of data sinchronization.
+        outputs - see process_input.
         """
 
         # Dendrites processing - Accumulate input
-        self.process_input()
+        self.process_input(outputs)
 
         # Membrane processing - Update action potential
         self.process_activation()
@@ -367,6 +830,10 @@ class Neuron:
             # invert error if self output is False
             if self.spike is False:
                 error = -error
+            # with one connection per neuron all involved connections learn at once
+            if isinstance(self.connections, Neuron.QuantizedConnections) or self.connections.unique():
+                self.connections.reinforce(error, stab, stabilization, self.min_max_weight, self.rounding)
+                return
             for connect in self.connections:
                 # separation of connects as involv / without spike
                 if connect["neuron"].get_output() != 0:
@@ -396,7 +863,9 @@ class Neuron:
         """  
         # 1. check legitimacy of cooperation and retransmission counter
         if error < 0 and self.get_output()==False: # legal cooperation only if error is negative and self spike=False
-            if self.layer_dept > 0: # 0 is input layer
+            if self.layer_dept > 0 and isinstance(self.connections, Neuron.QuantizedConnections):
+                self.connections.cooperate(error, self.rand_learning, self.min_max_weight)
+            elif self.layer_dept > 0: # 0 is input layer
                 for connect in self.connections:
                     if connect['neuron'].get_output() == False: # check if neuron was not involved in current learning pattern
                         if connect['weight'] >= 0: # weight adding/s_stab+(-error val/s_stab) to not involved connections
@@ -430,6 +899,35 @@ class Neuron:
             for connect in self.connections:
                 connect = connect["neuron"]
                 connect.recursive_learning(error, retransmission_counter-1)
+
+    @staticmethod
+    def layered_learning(neurons, error, cooperation=True, reinforcement=True):
+        """
+        Iterative, layer by layer version of recursive_learning for the neurons (e.g. last layer of network).
+        error is one error for all neurons or a list with the error of each neuron.
+
+        recursive_learning trains a neuron once for every path to it, so with full connectivity the calls grow as fan-in^depth.
+        Here the neurons reached with the same retransmission counter are collected first and each of them is trained once
+        per distinct error that reaches it, with the same cooperation and reinforcement as in recursive_learning,
+        then their connected neurons get counter - 1.
+        """
+        errors = error if isinstance(error, (list, tuple)) else [error] * len(neurons)
+        levels = {} # retransmission counter -> {(id(neuron), error): (neuron, error)}, in order of first visit
+        for neuron, neuron_error in zip(neurons, errors):
+            levels.setdefault(neuron.layer_dept, {}).setdefault((id(neuron), neuron_error), (neuron, neuron_error))
+        counter = max(levels, default=0)
+        while counter > 0:
+            level = levels.pop(counter, {})
+            next_level = levels.setdefault(counter - 1, {})
+            for neuron, neuron_error in level.values():
+                # neuron learning
+                if cooperation:
+                    neuron.cooperation(neuron_error)
+                if reinforcement:
+                    neuron.reinforcement(neuron_error)
+                for connected in neuron.connections.neurons:
+                    next_level.setdefault((id(connected), neuron_error), (connected, neuron_error))
+            counter -= 1
                 
     def noisy_network(self): # random weights adding
         """
@@ -1629,6 +2127,105 @@ class Neuron:
                 passed = False
             return passed
 
+        @staticmethod
+        def stabilize():
+            """
+            Test for Neuron.stabilize: the lookup of k steps gives the same s_stab as the add_s_stab loop.
+            """
+            def add_s_stab(s_stab, stab_error):
+                for _ in range(max(1, abs(round(stab_error)))):
+                    s_stab = min(100, max(1, round(s_stab + (1 if stab_error > 0 else -1) / ((s_stab + 1) * s_stab), 4)))
+                return s_stab
+            try:
+                random.seed(19)
+                s_stabs = [1, 100, 12, 1.00005, 99.99995] + [round(random.uniform(1, 100), random.choice([0, 2, 4, 6])) for _ in range(500)]
+                for stab_error in (1, -1, 0.4, 2.5, -7, 20, -20, 150):
+                    expected = [add_s_stab(s_stab, stab_error) for s_stab in s_stabs]
+                    assert Neuron.stabilize(s_stabs, stab_error).tolist() == expected, f"s_stab after stab_error={stab_error} is incorrect."
+                    # once its table is cached the steps are looked up
+                    k = max(1, abs(round(stab_error))) - 1
+                    if k:
+                        Neuron.s_stab_steps(1 if stab_error > 0 else -1, k)
+                        assert Neuron.stabilize(s_stabs, stab_error).tolist() == expected, f"Looked up s_stab after stab_error={stab_error} is incorrect."
+                assert len(Neuron.S_STAB_STEPS) <= Neuron.S_STAB_TABLES, "Cached tables should be bounded."
+
+                # reinforcement of all involved connections at once, like add_weight and add_s_stab per connection
+                neuron = Neuron(layer_dept=1)
+                sources = [Neuron() for _ in range(6)]
+                for i, source in enumerate(sources):
+                    neuron.connect(source, weight=[3.3, -98, 98, 0.1234, -5, 7][i], s_stab=s_stabs[i])
+                    source.spike = i != 3
+                low, high = neuron.min_max_weight
+                expected = [(round(min(high, max(low, round(conn['weight'] + 20 / conn['s_stab'], 4))), 4) if i != 3 else conn['weight'],
+                             add_s_stab(conn['s_stab'], 20) if i != 3 else conn['s_stab']) for i, conn in enumerate(neuron.connections)]
+                neuron.spike = True
+                neuron.reinforcement(error=20)
+                assert [(conn['weight'], conn['s_stab']) for conn in neuron.connections] == expected, "Reinforcement is incorrect."
+
+                Neuron.Test.print_test_result(test_name="STABILIZE", test_passed=True)
+                passed = True
+            except AssertionError as e:
+                Neuron.Test.print_test_result(test_name="STABILIZE", test_passed=False)
+                Neuron.Test.print_error_message(error_message=str(e))
+                passed = False
+            return passed
+
+        @staticmethod
+        def layered_learning():
+            """
+            Test for Neuron.layered_learning: same learning as recursive_learning where it visits every neuron once, once per neuron in deep networks.
+            """
+            try:
+                # with one hidden layer and one output neuron recursive_learning visits each neuron once, in the same order
+                networks = []
+                for _ in range(2):
+                    random.seed(17)
+                    nn = Neuron.Simulation.NN(topology=[5, 6, 1])
+                    nn.input([1, 0, 1, 1, 0])
+                    nn.forward()
+                    networks.append(nn)
+                random.seed(3)
+                networks[0].layer[-1][0].recursive_learning(error=-6)
+                random.seed(3)
+                Neuron.layered_learning(networks[1].layer[-1], error=-6)
+                for layer, other in zip(networks[0].layer, networks[1].layer):
+                    for neuron, other_neuron in zip(layer, other):
+                        assert [(c['weight'], c['s_stab']) for c in neuron.connections] == [(c['weight'], c['s_stab']) for c in other_neuron.connections], "Learning differs from recursive_learning."
+
+                # deep full network: every neuron after the sensors learns exactly once per error
+                nn = Neuron.Simulation.NN(topology=[8, 20, 20, 20, 20, 20, 4])
+                trained = {}
+                for layer in nn.layer:
+                    for neuron in layer:
+                        def count(error, stabilization=True, neuron=neuron):
+                            trained[id(neuron)] = trained.get(id(neuron), 0) + 1
+                            Neuron.reinforcement(neuron, error, stabilization)
+                        neuron.reinforcement = count
+                nn.input([1, 0, 1, 1, 0, 0, 1, 0])
+                nn.forward()
+                nn.cycle_without_teacher(error=-4, context=False, learning_method='layered_learning')
+                for layer in nn.layer:
+                    for neuron in layer:
+                        expected = 1 if neuron.layer_dept > 0 else 0
+                        assert trained.get(id(neuron), 0) == expected, f"Neuron of layer {neuron.layer_dept} learned {trained.get(id(neuron), 0)} times. It should be {expected}."
+
+                # with a teacher every output has its own error, a shared neuron learns once per distinct error and not once per output
+                trained.clear()
+                teacher = [not output for output in nn.output()[:2]] + nn.output()[2:] # two wrong and two right outputs
+                nn.cycle_teacher(teacher, context=False, learning_method='layered_learning', error_power=3)
+                for layer in nn.layer:
+                    for neuron in layer:
+                        expected = 0 if neuron.layer_dept == 0 else 1 if neuron.layer_dept == len(nn.layer) - 1 else 2
+                        assert trained.get(id(neuron), 0) == expected, f"Neuron of layer {neuron.layer_dept} learned {trained.get(id(neuron), 0)} times with a teacher. It should be {expected}."
+
+                Neuron.Test.print_test_result(test_name="LAYERED_LEARNING", test_passed=True)
+                passed = True
+            except AssertionError as e:
+                Neuron.Test.print_test_result(test_name="LAYERED_LEARNING", test_passed=False)
+                Neuron.Test.print_error_message(error_message=str(e))
+                passed = False
+            return passed
+
         @staticmethod
         def simplenet():
             try:
@@ -1687,6 +2284,281 @@ class Neuron:
                 passed = False
             return passed  
 
+        @staticmethod
+        def checkpoint():
+            """
+            Test for NN.save() and NN.load().
+            """
+            import tempfile
+            try:
+                nn = Neuron.Simulation.NN(topology=[3, 4, 2])
+                nn.layer[1][0].set_properties(threshold=7, leakage=30, reset_ratio=0.5)
+                nn.layer[2][1].connections[0]['ttl'] = 3
+                nn.layer[2][1].connections[0]['s_stab'] = 12
+                for _ in range(3):
+                    nn.input([1, 0, 1])
+                    nn.forward()
+
+                with tempfile.TemporaryDirectory() as directory:
+                    path = os.path.join(directory, 'nn.ckpt')
+                    nn.save(path)
+                    loads = [Neuron.Simulation.NN.load(path)]
+                    for loaded in loads:
+                        assert [len(layer) for layer in loaded.layer] == [3, 4, 2], "Topology is incorrect."
+                        for layer, loaded_layer in zip(nn.layer, loaded.layer):
+                            for neuron, loaded_neuron in zip(layer, loaded_layer):
+                                for name in Neuron.Simulation.NN.NEURON_VALUES:
+                                    assert getattr(neuron, name) == getattr(loaded_neuron, name), f"{name} is incorrect."
+                                assert len(neuron.connections) == len(loaded_neuron.connections), "Connections are incorrect."
+                                for conn, loaded_conn in zip(neuron.connections, loaded_neuron.connections):
+                                    assert loaded.layer[conn['neuron'].layer_dept][nn.layer[conn['neuron'].layer_dept].index(conn['neuron'])] is loaded_conn['neuron'], "Connected neuron is incorrect."
+                                    for key in ('weight', 'ttl', 's_stab'):
+                                        assert conn[key] == loaded_conn[key], f"Connection {key} is incorrect."
+                    for _ in range(3):
+                        for network in [nn] + loads:
+                            network.input([0, 1, 1])
+                            network.forward()
+                        assert all(loaded.output() == nn.output() for loaded in loads), "Output of loaded network is incorrect."
+
+                    # the brain of the snake game, trained, saved and loaded
+                    brain = Brain(input_size=5, hidden_size=[6], output_size=3, matrix=True)
+                    for data in ([1, 0, 1, 1, 0], [0, 1, 1, 0, 1]):
+                        brain.input(data)
+                        brain.step()
+                        brain.train(error=4)
+                    brain.save(path)
+                    loaded = Brain.load(path)
+                    assert type(loaded.nn) is NN and loaded.nn.matrix and loaded.topology == [5, 6, 3], "Loaded brain is incorrect."
+                    for _ in range(3):
+                        for network in (brain, loaded):
+                            network.input([1, 1, 0, 0, 1])
+                        assert brain.step() == loaded.step(), "Output of loaded brain is incorrect."
+
+                Neuron.Test.print_test_result(test_name="CHECKPOINT", test_passed=True)
+                passed = True
+            except AssertionError as e:
+                Neuron.Test.print_test_result(test_name="CHECKPOINT", test_passed=False)
+                Neuron.Test.print_error_message(error_message=str(e))
+                passed = False
+            return passed
+
+        @staticmethod
+        def connections():
+            """
+            Test for Neuron.Connections: slot lookups and process_input against a list of connection dicts.
+            """
+            try:
+                # lookups find the first connection to a neuron, also after a disconnect and when the sources are shared
+                random.seed(13)
+                nn = Neuron.Simulation.NN(topology=[5, 3])
+                neuron, sources = nn.layer[1][0], nn.layer[0]
+                neuron.connect(sources[2], weight=4)
+                assert neuron.get_weight_and_ttl(sources[2]) == (neuron.connections[2]['weight'], 0), "Lookup should find the first connection."
+                neuron.disconnect(sources[2])
+                assert neuron.get_weight_and_ttl(sources[2]) == (4, 0), "Lookup after disconnect is incorrect."
+                assert neuron.get_weight_and_ttl(sources[4]) == (neuron.connections[3]['weight'], 0), "Lookup after disconnect is incorrect."
+                assert nn.layer[1][1].connections.slot(sources[2]) == 2, "Other neurons should keep the shared index."
+                assert neuron.get_s_stab(Neuron()) is None, "Unknown neuron should have no connection."
+
+                # process_input gives the same input as the sequential sum of the dicts, with bounded partial sums, ttl and numeric outputs
+                for outputs, weights in (([1, 0, 1, 1, 1, 1], [60, -3.5, 70, -200, 90, 45.0001]),
+                                         ([0.3, 1.7, 0, 1, 0.25, 1], [60, -3.5, 70, -200, 90, 45.0001])):
+                    neuron = Neuron(layer_dept=1)
+                    dicts = []
+                    for i, (output, weight) in enumerate(zip(outputs, weights)):
+                        source = Neuron(signal_type='numeric')
+                        source.spike = output
+                        neuron.connect(source, weight=weight, ttl=2 if i == 1 else 0)
+                        dicts.append({'neuron': source, 'weight': weight, 'ttl': 2 if i == 1 else 0})
+                    for _ in range(3):
+                        expected = 0
+                        for conn in dicts:
+                            if conn['ttl'] > 0:
+                                expected += conn['weight']
+                                conn['ttl'] -= 1
+                            elif conn['neuron'].get_output():
+                                expected += conn['weight'] * conn['neuron'].get_output()
+                            expected = round(min(neuron.min_max_input[1], max(neuron.min_max_input[0], expected)), neuron.rounding)
+                        neuron.process_input()
+                        assert neuron.input == expected, f"Input ({neuron.input}) is incorrect. It should be {expected}."
+                        assert [conn['ttl'] for conn in neuron.connections] == [conn['ttl'] for conn in dicts], "ttl is incorrect."
+
+                Neuron.Test.print_test_result(test_name="CONNECTIONS", test_passed=True)
+                passed = True
+            except AssertionError as e:
+                Neuron.Test.print_test_result(test_name="CONNECTIONS", test_passed=False)
+                Neuron.Test.print_error_message(error_message=str(e))
+                passed = False
+            return passed
+
+        @staticmethod
+        def matrix():
+            """
+            Test for Neuron.Layer: NN(matrix=True) forwards and learns exactly like the neuron by neuron NN.
+            """
+            def network(matrix, signal_type):
+                random.seed(23)
+                nn = Neuron.Simulation.NN(topology=[6, 8, 5, 3], signal_type=signal_type, matrix=matrix)
+                for neuron in nn.layer[1]:
+                    neuron.connections[2]['ttl'] = 2
+                nn.layer[2][0].set_properties(refractory_period=2, sensitivity_adjust_rate=-3, sensitivity_restore_rate=0.7)
+                nn.layer[1][3].set_properties(reset_ratio=0.3, leakage=7)
+                return nn
+
+            def state(nn):
+                return [(neuron.v_m, neuron.spike, neuron.sensitivity['val'], neuron.refractory_period_counter, neuron.output_history,
+                         [(conn['weight'], conn['ttl'], conn['s_stab']) for conn in neuron.connections]) for layer in nn.layer for neuron in layer]
+            try:
+                for signal_type in ('binary', 'numeric'):
+                    networks = [network(False, signal_type), network(True, signal_type)]
+                    random.seed(29)
+                    for tick in range(40):
+                        data = [random.choice([0, 1] if signal_type == 'binary' else [0, 0.37, 1.21, 55]) for _ in range(6)]
+                        state_of_random = random.getstate()
+                        for nn in networks:
+                            random.setstate(state_of_random)
+                            nn.input(data)
+                            nn.forward()
+                            if signal_type == 'binary':
+                                nn.cycle_without_teacher(error=random.choice([-3, -1, 2, 5]), context=tick % 2)
+                        assert networks[0].output() == networks[1].output(), f"Outputs of tick {tick} are incorrect."
+                        if tick == 20: # a new connection leaves the matrix, the layer is forwarded neuron by neuron
+                            for nn in networks:
+                                nn.layer[2][1].connect(nn.layer[0][4], weight=9.5)
+                    assert state(networks[0]) == state(networks[1]), f"States of the {signal_type} networks are incorrect."
+                    assert not networks[1].matrix_layers[2].matrix and networks[1].matrix_layers[1].matrix, "Only the changed layer should leave the matrix."
+
+                # the brain of the snake game forwards its layers as matrices too
+                brains = []
+                for matrix in (False, True):
+                    random.seed(31)
+                    brains.append(Brain(input_size=8, hidden_size=[10], output_size=4, matrix=matrix))
+                random.seed(37)
+                for tick in range(30):
+                    data, error = [random.choice([0, 1]) for _ in range(8)], random.choice([-2, 3])
+                    outputs = []
+                    for brain in brains:
+                        brain.input(data)
+                        outputs.append(brain.step())
+                        brain.train(error)
+                    assert outputs[0] == outputs[1], f"Brain outputs of tick {tick} are incorrect."
+                assert state(brains[0].nn) == state(brains[1].nn), "States of the brains are incorrect."
+                assert all(layer.matrix for layer in brains[1].nn.matrix_layers), "Brain layers should be forwarded as matrices."
+
+                Neuron.Test.print_test_result(test_name="MATRIX", test_passed=True)
+                passed = True
+            except AssertionError as e:
+                Neuron.Test.print_test_result(test_name="MATRIX", test_passed=False)
+                Neuron.Test.print_error_message(error_message=str(e))
+                passed = False
+            return passed
+
+        @staticmethod
+        def quantized():
+            """
+            Test for Neuron.QuantizedConnections and NN(quantized=True).
+            """
+            import sys
+            import tempfile
+            try:
+                # memory per connection of a large fully connected network: lists of dicts with their weight objects,
+                # or the stores with their arrays
+                topology = [1000, 100, 10]
+                n_connections = 1000 * 100 + 100 * 10
+                nn = Neuron.Simulation.NN(topology=topology)
+                dicts = [[{'neuron': conn['neuron'], 'weight': conn['weight'], 'ttl': conn['ttl'], 's_stab': conn['s_stab']} for conn in neuron.connections] for layer in nn.layer[1:] for neuron in layer]
+                dicts = sum(sys.getsizeof(connections) + sum(sys.getsizeof(conn) + sys.getsizeof(conn['weight']) for conn in connections) for connections in dicts) / n_connections
+                nn = Neuron.Simulation.NN(topology=topology, quantized=True)
+                quantized = sum(sys.getsizeof(neuron.connections) + sys.getsizeof(neuron.connections._data) for layer in nn.layer[1:] for neuron in layer) / n_connections
+                assert dicts / quantized > 50, f"Quantized connections take {quantized:.1f} bytes, dicts {dicts:.1f}. It should be > 50x less."
+
+                # same integer weights give the same outputs and the same learning steps
+                random.seed(11)
+                nn = Neuron.Simulation.NN(topology=[4, 6, 3])
+                for layer in nn.layer[1:]:
+                    for neuron in layer:
+                        for conn in neuron.connections:
+                            conn['weight'] = random.randint(-15, 15)
+                with tempfile.TemporaryDirectory() as directory:
+                    nn.save(os.path.join(directory, 'nn.ckpt'))
+                    q = Neuron.Simulation.NN.load(os.path.join(directory, 'nn.ckpt'))
+                q.quantize()
+                assert q.quantized and not nn.quantized, "Network should be quantized."
+                assert all(neuron.connections.neurons is q.layer[0] for neuron in q.layer[1]), "Full layers should share their sources."
+                for data in ([1, 0, 1, 1], [0, 1, 1, 0], [1, 1, 1, 1]):
+                    for network in (nn, q):
+                        network.input(data)
+                        network.forward()
+                    assert nn.output() == q.output(), f"Outputs {q.output()} of quantized network are incorrect. It should be {nn.output()}."
+                for layer, q_layer in zip(nn.layer[1:], q.layer[1:]):
+                    for neuron, q_neuron in zip(layer, q_layer):
+                        neuron.reinforcement(error=3, stabilization=False)
+                        q_neuron.reinforcement(error=3, stabilization=False)
+                        assert [c['weight'] for c in neuron.connections] == [c['weight'] for c in q_neuron.connections], "Reinforcement is incorrect."
+                        neuron.reinforcement(error=4)
+                        q_neuron.reinforcement(error=4)
+                        for conn, q_conn in zip(neuron.connections, q_neuron.connections):
+                            assert conn['weight'] == q_conn['weight'], "Stabilized reinforcement is incorrect."
+                            assert abs(conn['s_stab'] / q_conn['s_stab'] - 1) < 0.02, "s_stab is incorrect."
+                        state = random.getstate()
+                        neuron.cooperation(error=-5)
+                        random.setstate(state)
+                        q_neuron.cooperation(error=-5)
+                        for conn, q_conn in zip(neuron.connections, q_neuron.connections):
+                            assert abs(conn['weight'] - q_conn['weight']) <= 0.5, "Cooperation is incorrect."
+
+                # the brain of the snake game takes the option too
+                random.seed(5)
+                brain, q_brain = Brain(input_size=4, hidden_size=[6], output_size=3), Brain(input_size=4, hidden_size=[6], output_size=3, quantized=True)
+                assert q_brain.nn.quantized and not brain.nn.quantized, "Brain should pass quantized to its network."
+                for data in ([1, 0, 1, 1], [0, 1, 1, 0]):
+                    q_brain.input(data)
+                    assert len(q_brain.step()) == 3, "Quantized brain should step."
+
+                # with a seed the stochastic s_stab rounding repeats and doesn't draw from random
+                s_stabs = []
+                for _ in range(2):
+                    random.seed(8)
+                    seeded = NN(topology=[4, 6, 3], quantized=True, seed=3)
+                    for data in ([1, 0, 1, 1], [0, 1, 1, 0], [1, 1, 0, 1]):
+                        seeded.input(data)
+                        seeded.forward()
+                        state = random.getstate()
+                        for neuron in seeded.layer[1]:
+                            neuron.reinforcement(error=4)
+                        assert random.getstate() == state, "Seeded stochastic rounding shouldn't draw from random."
+                    s_stabs.append([conn['s_stab'] for neuron in seeded.layer[1] for conn in neuron.connections])
+                assert s_stabs[0] == s_stabs[1] and max(s_stabs[0]) > 1, "Seeded quantized networks should repeat their s_stab."
+
+                # the sum is bounded after every connection like the float store, also when it hits a bound on the way
+                sources = [Neuron() for _ in range(6)]
+                weights, outputs = [90, 60, -127, -50, 40, 25], np.array([1, 1, 1, 1, 0, 1], dtype=np.float64)
+                for scale in (1.0, 0.25, 0.3):
+                    store = Neuron.Connections(sources, [round(w * scale, 4) for w in weights], ttl=[0, 0, 0, 0, 2, 0])
+                    q_store = Neuron.QuantizedConnections(sources, [w * scale for w in weights], ttl=[0, 0, 0, 0, 2, 0], scale=scale)
+                    for bounds in ((-100, 100), (-20, 30)):
+                        expected = store.gather_input(outputs, start=5, bounds=bounds)
+                        assert q_store.gather_input(outputs, start=5, bounds=bounds) == expected, f"Quantized sum with scale {scale} and bounds {bounds} is incorrect."
+
+                # the dict interface
+                connections = q.layer[1][0].connections
+                connections[2]['ttl'] = 300
+                connections[2]['s_stab'] = 1
+                assert connections[2]['ttl'] == 255 and connections[2]['s_stab'] == 1, "ttl and s_stab should be bounded."
+                q.layer[1][0].disconnect(q.layer[0][1])
+                assert len(connections) == 3 and connections[1]['neuron'] is q.layer[0][2], "Disconnect is incorrect."
+                assert q.layer[1][1].connections.neurons is q.layer[0], "Other neurons should keep the shared sources."
+                q.layer[1][0].connect(q.layer[0][1], weight=7, ttl=2)
+                assert connections[-1]['neuron'] is q.layer[0][1] and connections[-1]['weight'] == 7 and connections[-1]['ttl'] == 2, "Connect is incorrect."
+
+                Neuron.Test.print_test_result(test_name="QUANTIZED", test_passed=True)
+                passed = True
+            except AssertionError as e:
+                Neuron.Test.print_test_result(test_name="QUANTIZED", test_passed=False)
+                Neuron.Test.print_error_message(error_message=str(e))
+                passed = False
+            return passed
+
         # Run all tests
         @staticmethod
         def run_all_tests():
@@ -1702,13 +2574,19 @@ class Neuron:
             if not Neuron.Test.set_s_stab(): all_passed = False
             if not Neuron.Test.get_s_stab(): all_passed = False
             if not Neuron.Test.add_s_stab(): all_passed = False
+            if not Neuron.Test.stabilize(): all_passed = False
             if not Neuron.Test.get_output_history(): all_passed = False
             if not Neuron.Test.process_input(): all_passed = False
             if not Neuron.Test.process_activation(): all_passed = False
             if not Neuron.Test.reinforcement(): all_passed = False
             if not Neuron.Test.cooperation(): all_passed = False
             if not Neuron.Test.recursive_learning(): all_passed = False
+            if not Neuron.Test.layered_learning(): all_passed = False
             if not Neuron.Test.simplenet(): all_passed = False
+            if not Neuron.Test.checkpoint(): all_passed = False
+            if not Neuron.Test.connections(): all_passed = False
+            if not Neuron.Test.quantized(): all_passed = False
+            if not Neuron.Test.matrix(): all_passed = False
 
             GREEN = '\033[92m'
             RED = '\033[91m'
@@ -1738,12 +2616,18 @@ class Neuron:
             """
             Neural network which will be used as brain of snake entity.
             """
-            def __init__(self, topology=[], connections_type ='full', signal_type='binary' ):
+            def __init__(self, topology=[], connections_type ='full', signal_type='binary', quantized=False, matrix=False, seed=None):
                 """ Topology of network is a list of numbers of neurons in layers. First element of list is number of sensors, last element is number of output neurons.
                     [N-sensors, N-hidden1, N-hidden2, ..., N-output]
+                    quantized - store connections in Neuron.QuantizedConnections (3 bytes per connection) instead of Neuron.Connections (24 bytes).
+                    matrix - forward layer by layer with Neuron.Layer instead of neuron by neuron.
+                    seed - seed of the generator of the stochastic s_stab rounding of quantized connections, None draws one from random per store.
                 """
+                rng = np.random.default_rng(seed) if quantized and seed is not None else None
                 # list comprehension to create layers of neurons
                 self.signal_type = signal_type
+                self.matrix = matrix
+                self.matrix_layers = []
                 self.layer = [[Neuron(layer_dept=depth, signal_type=signal_type) for i in range(layer_size)] for depth, layer_size in enumerate(topology)]
                 
                 # print topology as table
@@ -1758,9 +2642,14 @@ class Neuron:
                     for i, layer in enumerate(self.layer):
                         if i == 0:
                             continue
+                        # all neurons of the layer share the list of sources and its index
+                        index = Neuron.Connections.index_of(self.layer[i-1])
                         for neuron in layer:
-                            for neuronin_in_previous_layer in self.layer[i-1]:
-                                neuron.connect(neuronin_in_previous_layer)
+                            weights = [round(random.uniform(-neuron.rand_weight, neuron.rand_weight), neuron.rounding) for _ in self.layer[i-1]]
+                            if quantized:
+                                neuron.connections = Neuron.QuantizedConnections(self.layer[i-1], weights, index=index, scale=self.weight_scale(layer), rng=rng)
+                            else:
+                                neuron.connections = Neuron.Connections(self.layer[i-1], weights, index=index)
 
 
                 #elif:
@@ -1778,6 +2667,32 @@ class Neuron:
                         # set random weights for connections - 20 t0 20
                         for conn in neuron.connections:
                             conn['weight'] = random.randint(-20, 20)
+
+                if quantized:
+                    self.quantize(rng)
+
+            @staticmethod
+            def weight_scale(layer):
+                """
+                Per-layer weight scale of quantized connections: one int8 step, so that +/-127 steps cover min_max_weight of all neurons of the layer.
+                """
+                return max(abs(bound) for neuron in layer for bound in neuron.min_max_weight) / 127
+
+            def quantize(self, rng=None):
+                """
+                Convert the connections of all neurons to Neuron.QuantizedConnections. Weights are rounded to the layer scale.
+                rng - numpy Generator shared by the stores for the stochastic s_stab rounding, None draws one from random per store.
+                """
+                for i, layer in enumerate(self.layer):
+                    scale = self.weight_scale(layer)
+                    for neuron in layer:
+                        if isinstance(neuron.connections, Neuron.QuantizedConnections):
+                            continue
+                        neuron.connections = Neuron.QuantizedConnections.from_connections(neuron.connections, scale, rng)
+
+            @property
+            def quantized(self):
+                return any(isinstance(neuron.connections, Neuron.QuantizedConnections) for layer in self.layer for neuron in layer)
                 
             def input(self, input:list):
                 """
@@ -1790,13 +2705,36 @@ class Neuron:
                     neuron.input = input[i]
                     neuron.spike = True
             
+            def matrix_layer(self, i):
+                """
+                Neuron.Layer of layer i, built again when the layers or their connections changed.
+                """
+                if len(self.matrix_layers) != len(self.layer):
+                    self.matrix_layers = [None] * len(self.layer)
+                layer = self.matrix_layers[i]
+                if layer is None or layer.neurons is not self.layer[i] or layer.sources is not (self.layer[i-1] if i > 0 else None) or not layer.valid():
+                    layer = self.matrix_layers[i] = Neuron.Layer(self.layer[i], self.layer[i-1] if i > 0 else None)
+                return layer
+
             def forward(self):
                 """
                 Forwarding of network.
                 """
-                for layer in self.layer:
+                if self.matrix:
+                    outputs = None
+                    for i in range(len(self.layer)):
+                        outputs = self.matrix_layer(i).forward(outputs)
+                    return
+                for i, layer in enumerate(self.layer):
+                    outputs = None
                     for neuron in layer:
-                        neuron.forward()
+                        # connections from the whole previous layer share one vector of its outputs
+                        if i > 0 and neuron.connections.neurons is self.layer[i-1]:
+                            if outputs is None:
+                                outputs = np.array([source.get_output() for source in self.layer[i-1]], dtype=np.float64)
+                            neuron.forward(outputs)
+                        else:
+                            neuron.forward()
             
             def output(self):
                 """
@@ -1811,6 +2749,8 @@ class Neuron:
                         
             def cycle_without_teacher(self, error, context, learning_method = 'recursive_learning'):
                 if self.signal_type == 'binary':
+                    if learning_method == 'layered_learning': # all output neurons have the same error, one pass trains every neuron once
+                        Neuron.layered_learning(self.layer[-1], error=error)
                     for neuron in self.layer[-1]:
                         if learning_method == 'recursive_learning':
                             neuron.recursive_learning(error=error)
@@ -1851,12 +2791,14 @@ class Neuron:
                     error_power = random.randint(0, 50)
                 learning_error = 0
                 if self.signal_type == 'binary':
+                    errors = []
                     for i, neuron in enumerate(self.layer[-1]):
                         # if teacher boolean value is same as output of neuron then error is positive number, else - negative, teacher is None (do't now) error is 0
                         if teacher[i] == neuron.get_output():
                             learning_error = error_power # positive error
                         else:
                             learning_error = -error_power # negative error
+                        errors.append(learning_error)
                         # train
                         if learning_method == 'recursive_learning':
                             neuron.recursive_learning(error=learning_error)
@@ -1866,7 +2808,9 @@ class Neuron:
 
                         elif learning_method == 'cooperation':
                             neuron.cooperation(error=learning_error)
-                        
+
+                    if learning_method == 'layered_learning': # one pass, hidden neurons shared by the outputs learn once per distinct error
+                        Neuron.layered_learning(self.layer[-1], error=errors)
 
                 elif self.signal_type == 'numeric':
                     assert True, f"Numeric output is not implemented yet."
@@ -1884,6 +2828,76 @@ class Neuron:
                 """
                 pass
             
+            # CHECKPOINTS
+            # neuron values stored one array each, the ones kept as {'val', 'min', 'max'} dicts store their 'val'
+            NEURON_VALUES = ('layer_dept', 'rest', 'threshold', 'reset_ratio', 'leakage', 'sensitivity', 'sensitivity_normal',
+                             'sensitivity_adjust_rate', 'sensitivity_restore_rate', 'refractory_period',
+                             'neurotransmitter_regeneration_rate', 'neurotransmitter_depletion_rate', # membrane params
+                             'v_m', 'input', 'spike', 'refractory_period_counter', 'neurotransmitter_level') # state
+
+            def save(self, path):
+                """
+                Save network to a binary checkpoint file (snn.checkpoints format) instead of pickling the object graph.
+                Neurons are numbered layer by layer, the connections are stored in CSR form: connections of neuron i are
+                connection_ptr[i]:connection_ptr[i+1], with the source neuron number, weight, ttl and s_stab of each one.
+                output_history is a log and isn't saved.
+                """
+                neurons = [neuron for layer in self.layer for neuron in layer]
+                number = {id(neuron): i for i, neuron in enumerate(neurons)}
+                connections = [conn for neuron in neurons for conn in neuron.connections]
+                arrays = {
+                    'topology': np.array([len(layer) for layer in self.layer], dtype=np.int64),
+                    'connection_ptr': np.cumsum([0] + [len(neuron.connections) for neuron in neurons], dtype=np.int64),
+                    'connection_source': np.array([number[id(conn['neuron'])] for conn in connections], dtype=np.int64),
+                }
+                for key in ('weight', 'ttl', 's_stab'):
+                    arrays[key] = np.array([conn[key] for conn in connections], dtype=np.float64)
+                for name in self.NEURON_VALUES:
+                    values = [getattr(neuron, name) for neuron in neurons]
+                    arrays[name] = np.array([v['val'] if isinstance(v, dict) else v for v in values], dtype=np.float64)
+                write(path, arrays, meta={'signal_type': self.signal_type, 'quantized': self.quantized, 'matrix': self.matrix})
+
+            @classmethod
+            def load(cls, path):
+                """
+                Load network saved by save() as an instance of cls.
+                NN checkpoints load eagerly: every neuron and connection is built from the file right away.
+                """
+                meta, arrays = read(path, mmap=False)
+                nn = cls.__new__(cls)
+                nn.signal_type = meta['signal_type']
+                nn.matrix = meta.get('matrix', False)
+                nn.matrix_layers = []
+                nn.layer = [[Neuron(layer_dept=depth, signal_type=nn.signal_type) for i in range(layer_size)] for depth, layer_size in enumerate(arrays['topology'].tolist())]
+                neurons = [neuron for layer in nn.layer for neuron in layer]
+
+                for name in cls.NEURON_VALUES:
+                    for neuron, value in zip(neurons, arrays[name].tolist()):
+                        value = int(value) if value.is_integer() else value
+                        if isinstance(getattr(neuron, name), dict):
+                            getattr(neuron, name)['val'] = value
+                        else:
+                            setattr(neuron, name, value)
+                if nn.signal_type == 'binary':
+                    for neuron in neurons:
+                        neuron.spike = bool(neuron.spike)
+
+                ptr, source = arrays['connection_ptr'].tolist(), arrays['connection_source']
+                starts = np.cumsum([0] + [len(layer) for layer in nn.layer])
+                indexes = [Neuron.Connections.index_of(layer) for layer in nn.layer]
+                for i, neuron in enumerate(neurons):
+                    sources = source[ptr[i]:ptr[i + 1]]
+                    values = [arrays[key][ptr[i]:ptr[i + 1]] for key in ('weight', 'ttl', 's_stab')]
+                    # connections from a whole layer in order share its list of sources, like NN() builds them
+                    depth = neuron.layer_dept - 1
+                    if depth >= 0 and np.array_equal(sources, np.arange(starts[depth], starts[depth + 1])):
+                        neuron.connections = Neuron.Connections(nn.layer[depth], *values, index=indexes[depth])
+                    else:
+                        neuron.connections = Neuron.Connections([neurons[j] for j in sources.tolist()], *values)
+                if meta.get('quantized'):
+                    nn.quantize()
+                return nn
+
             # Testing methods
             
             @staticmethod
@@ -2464,12 +3478,17 @@ class NN:
     """
     Neural network which will be used as brain of snake entity.
     """
-    def __init__(self, topology=[], connections_type ='full', signal_type='binary' ):
+    def __init__(self, topology=[], connections_type ='full', signal_type='binary', quantized=False, matrix=False, seed=None):
         """ Topology of network is a list of numbers of neurons in layers. First element of list is number of sensors, last element is number of output neurons.
             [N-sensors, N-hidden1, N-hidden2, ..., N-output]
+            quantized - store connections in Neuron.QuantizedConnections (3 bytes per connection) instead of Neuron.Connections (24 bytes).
+            matrix - forward layer by layer with Neuron.Layer instead of neuron by neuron.
+            seed - seed of the generator of the stochastic s_stab rounding of quantized connections, None draws one from random per store.
         """
         # list comprehension to create layers of neurons
         self.signal_type = signal_type
+        self.matrix = matrix
+        self.matrix_layers = []
         self.layer = [[Neuron(layer_dept=depth, signal_type=signal_type) for i in range(layer_size)] for depth, layer_size in enumerate(topology)]
         
         # print topology as table
@@ -2484,9 +3503,11 @@ class NN:
             for i, layer in enumerate(self.layer):
                 if i == 0:
                     continue
+                # all neurons of the layer share the list of sources, so matrix forwarding can hold the layer
+                index = Neuron.Connections.index_of(self.layer[i-1])
                 for neuron in layer:
-                    for neuronin_in_previous_layer in self.layer[i-1]:
-                        neuron.connect(neuronin_in_previous_layer)
+                    weights = [round(random.uniform(-neuron.rand_weight, neuron.rand_weight), neuron.rounding) for _ in self.layer[i-1]]
+                    neuron.connections = Neuron.Connections(self.layer[i-1], weights, index=index)
 
 
         #elif:
@@ -2504,7 +3525,19 @@ class NN:
                 # set random weights for connections - 20 t0 20
                 for conn in neuron.connections:
                     conn['weight'] = random.randint(-20, 20)
-        
+
+        if quantized:
+            self.quantize(np.random.default_rng(seed) if seed is not None else None)
+
+    # quantized connections, matrix forwarding and checkpoints work like in Neuron.Simulation.NN
+    weight_scale = staticmethod(Neuron.Simulation.NN.weight_scale)
+    quantize = Neuron.Simulation.NN.quantize
+    quantized = Neuron.Simulation.NN.quantized
+    matrix_layer = Neuron.Simulation.NN.matrix_layer
+    NEURON_VALUES = Neuron.Simulation.NN.NEURON_VALUES
+    save = Neuron.Simulation.NN.save
+    load = classmethod(Neuron.Simulation.NN.load.__func__)
+
     def input(self, input:list):
         """
         Set input for sensors.
@@ -2520,6 +3553,11 @@ class NN:
         """
         Forwarding of network.
         """
+        if self.matrix:
+            outputs = None
+            for i in range(len(self.layer)):
+                outputs = self.matrix_layer(i).forward(outputs)
+            return
         for layer in self.layer:
             for neuron in layer:
                 neuron.forward()
@@ -2537,6 +3575,8 @@ class NN:
                 
     def cycle_without_teacher(self, error, context, learning_method = 'recursive_learning'):
         if self.signal_type == 'binary':
+            if learning_method == 'layered_learning': # all output neurons have the same error, one pass trains every neuron once
+                Neuron.layered_learning(self.layer[-1], error=error)
             for neuron in self.layer[-1]:
                 if learning_method == 'recursive_learning':
                     neuron.recursive_learning(error=error)
@@ -2577,12 +3617,14 @@ class NN:
             error_power = random.randint(0, 50)
         learning_error = 0
         if self.signal_type == 'binary':
+            errors = []
             for i, neuron in enumerate(self.layer[-1]):
                 # if teacher boolean value is same as output of neuron then error is positive number, else - negative, teacher is None (do't now) error is 0
                 if teacher[i] == neuron.get_output():
                     learning_error = error_power # positive error
                 else:
                     learning_error = -error_power # negative error
+                errors.append(learning_error)
                 # train
                 if learning_method == 'recursive_learning':
                     neuron.recursive_learning(error=learning_error)
@@ -2592,7 +3634,9 @@ class NN:
 
                 elif learning_method == 'cooperation':
                     neuron.cooperation(error=learning_error)
-                
+
+            if learning_method == 'layered_learning': # one pass, hidden neurons shared by the outputs learn once per distinct error
+                Neuron.layered_learning(self.layer[-1], error=errors)
 
         elif self.signal_type == 'numeric':
             assert True, f"Numeric output is not implemented yet."
@@ -2611,9 +3655,9 @@ class NN:
         pass
 
 class Brain:
-    def __init__(self, input_size=77, hidden_size=[], output_size=4) -> None:
+    def __init__(self, input_size=77, hidden_size=[], output_size=4, quantized=False, matrix=False) -> None:
         self.topology = [input_size,] + hidden_size + [output_size,]
-        self.nn = NN(topology=self.topology)
+        self.nn = NN(topology=self.topology, quantized=quantized, matrix=matrix)
 
         # set neurons properties
         for layer in self.nn.layer[1:]:
@@ -2635,6 +3679,18 @@ class Brain:
         # self.nn.cycle_without_teacher(error=error, context=False, learning_method='recursive_learning')
         self.nn.backprop(error=error)
 
+    def save(self, path):
+        # checkpoint of the trained network, see NN.save
+        self.nn.save(path)
+
+    @classmethod
+    def load(cls, path):
+        # brain around a network saved by save(), the neuron properties are stored with the network (loaded eagerly)
+        brain = cls.__new__(cls)
+        brain.nn = NN.load(path)
+        brain.topology = [len(layer) for layer in brain.nn.layer]
+        return brain
+
 class ConnectorSnackSnn:
     """ brain methods used by the connector
 
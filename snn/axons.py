@@ -1,9 +1,14 @@
+from snn.neurotransmitters import NO_TRANSMITTER
+
+
 class Axon:
     """
     The Axon class represents the part of a neuron that transmits signals away from the neuron cell body.
     An axon has multiple synapses, which are the points of connection to other neurons.
     """
 
+    __slots__ = ('synapses',)
+
     def __init__(self, synapses):
         """
         Creates a new Axon instance.
@@ -13,7 +18,7 @@ class Axon:
         """
         self.synapses = synapses
 
-    def step(self, membrane):
+    def step(self, membrane, phased=False):
         """
         Executes a step in the axon's operation. If the associated neuron membrane has spiked,
         the axon instructs all its synapses to transmit and then regenerate.
@@ -22,12 +27,33 @@ class Axon:
 
         Args:
             membrane (Membrane): The membrane object associated with the neuron this Axon is a part of.
+            phased (bool): In a phased step the synapses hold only the output of this tick,
+                so the synapses of a silent neuron are cleared.
         """
         for synapse in self.synapses:
+            if phased:
+                synapse.received_code = NO_TRANSMITTER
             if membrane.spike:
                 synapse.transmit()
+            elif synapse.delay > 1:
+                synapse.propagate()
 
-            synapse.regenerate()
+            if synapse.clock is None:   # lazy synapses regenerate when they are read
+                synapse.regenerate()
+
+    def idle(self, ticks):
+        """
+        Executes ticks steps without a spike at once: the synapses only regenerate.
+        The delay lines must not carry transmitters (see Brain.is_idle), they are emptied.
+
+        Args:
+            ticks (int): The number of steps.
+        """
+        for synapse in self.synapses:
+            if synapse.delay > 1:
+                synapse.load_flight([])
+            if synapse.clock is None:   # lazy synapses regenerate when they are read
+                synapse.regenerate(ticks)
 
     def process_growth_and_connections(self, membrane):
         """
@@ -0,0 +1,78 @@
+import numpy as np
+
+
+class RingBuffer:
+    """
+    Fixed-capacity ring buffer backed by a NumPy array.
+
+    Appending is O(1) and overwrites the oldest item once the buffer is full, so the memory stays bounded
+    however long the simulation runs. Every item is written twice, at i and at i + capacity,
+    so the most recent items are always one contiguous slice and window() returns a view without copying.
+    The storage is allocated on the first append, an unused buffer costs only the object itself.
+
+    Attributes:
+        capacity (int): Maximum number of items kept.
+        dtype (numpy.dtype): Type of one item, a structured dtype stores tuples.
+    """
+
+    __slots__ = ('capacity', 'dtype', '_data', '_next', '_size')
+
+    def __init__(self, capacity, dtype=np.float64):
+        """
+        Creates a new RingBuffer instance.
+
+        Args:
+            capacity (int): Maximum number of items kept.
+            dtype: Type of one item, e.g. [('code', 'u1'), ('weight', 'f8')] for (code, weight) tuples.
+        """
+        if capacity < 1:
+            raise ValueError("Capacity must be at least 1.")
+        self.capacity = int(capacity)
+        self.dtype = np.dtype(dtype)
+        self._data = None
+        self._next = 0  # position of the next write, in [0, capacity)
+        self._size = 0
+
+    def append(self, item):
+        """Adds an item, dropping the oldest one if the buffer is full."""
+        if self._data is None:
+            self._data = np.zeros(2 * self.capacity, dtype=self.dtype)
+        self._data[self._next] = item
+        self._data[self._next + self.capacity] = item
+        self._next = (self._next + 1) % self.capacity
+        self._size = min(self._size + 1, self.capacity)
+
+    def window(self, length=None):
+        """
+        Returns the last length items (all stored items by default), oldest first, as a view of the storage.
+
+        The view is valid until the next append overwrites it; copy it to keep it.
+        """
+        length = self._size if length is None else min(int(length), self._size)
+        if self._data is None or length <= 0:
+            return np.zeros(0, dtype=self.dtype)
+        end = self._next + self.capacity
+        return self._data[end - length:end]
+
+    def clear(self):
+        """Removes all items, the storage is kept for reuse."""
+        self._next = 0
+        self._size = 0
+
+    def __len__(self):
+        """Returns the number of stored items."""
+        return self._size
+
+    def __getitem__(self, index):
+        """Returns a stored item, index 0 is the oldest and -1 the newest."""
+        window = self.window()
+        item = window[index]
+        return item.item() if isinstance(item, np.generic) else item
+
+    def __iter__(self):
+        """Iterates over the stored items, oldest first, as Python values (tuples for a structured dtype)."""
+        return iter(self.window().tolist())
+
+    def __sizeof__(self):
+        """Returns the size of the object including its storage, for sys.getsizeof."""
+        return object.__sizeof__(self) + (0 if self._data is None else self._data.nbytes)
@@ -0,0 +1,136 @@
+import numpy as np
+
+from snn.compilers import CompiledNetwork
+from snn.connectivity import Connectivity
+from snn.engines import Engine
+
+
+# the neurons of ai.Brain
+BRAIN_PARAMETERS = dict(threshold=20.0, reset_ratio=0.0, leakage=1, refractory_period=0, mode='cycle-train',
+                        initial_level=100, regenerate_rate=1)
+
+SENSORS, MOTORS = 'sensors', 'motors'
+
+_CHUNK = 1 << 22  # pairs drawn at once by the random patterns
+
+
+def full():
+    """Connects every target to every source."""
+    def pairs(n_sources, n_targets, rng):
+        return np.repeat(np.arange(n_targets), n_sources), np.tile(np.arange(n_sources), n_targets)
+    return pairs
+
+
+def one_to_one():
+    """Connects target j to source j % n_sources, like ai.Brain connects its layers."""
+    def pairs(n_sources, n_targets, rng):
+        targets = np.arange(n_targets)
+        return targets, targets % n_sources
+    return pairs
+
+
+def random_sparse(p):
+    """Connects every (target, source) pair with probability p."""
+    def pairs(n_sources, n_targets, rng):
+        return _bernoulli(n_sources, np.arange(n_targets), lambda targets, sources: p, rng)
+    return pairs
+
+
+def modular(modules, p_in=1.0, p_out=0.0):
+    """
+    Splits the sources and the targets in modules groups of (about) the same size and connects pairs
+    of the same module with probability p_in and pairs of different modules with probability p_out.
+    """
+    def pairs(n_sources, n_targets, rng):
+        def probability(targets, sources):
+            same = targets * modules // n_targets == sources * modules // n_sources
+            return np.where(same, p_in, p_out)
+        return _bernoulli(n_sources, np.arange(n_targets), probability, rng)
+    return pairs
+
+
+def _bernoulli(n_sources, targets, probability, rng):
+    """Draws every (target, source) pair with its probability, a chunk of rows at a time."""
+    rows = max(1, _CHUNK // max(1, n_sources))
+    chosen_targets, chosen_sources = [], []
+    for start in range(0, len(targets), rows):
+        block = targets[start:start + rows, None]
+        sources = np.arange(n_sources)[None, :]
+        hit = rng.random((len(block), n_sources)) < probability(block, sources)
+        t, s = np.nonzero(hit)
+        chosen_targets.append(block[t, 0])
+        chosen_sources.append(s)
+    if not chosen_targets:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+    return np.concatenate(chosen_targets), np.concatenate(chosen_sources)
+
+
+def build_network(sensors, layers, motors, connections, weight=(-20, 20), seed=None, phased=False,
+                  dtype=np.float64, **parameters):
+    """
+    Builds a network directly as engine arrays, without creating any Neuron, Dendrite or Synapse object.
+
+    Every neuron has one synapse, as in ai.Brain. A connection spec (source, target, pattern) wires the
+    group source ('sensors' or a layer index) to the group target (a layer index or 'motors') with a pattern
+    (full(), one_to_one(), random_sparse(p) or modular(k, p_in, p_out)). Each connection to a layer gets a
+    dendrite with a weight drawn uniformly from the weight range; motors read synapses without weights.
+
+    Args:
+        sensors (int): The number of sensors.
+        layers (list): The number of neurons in each layer.
+        motors (int): The number of motors.
+        connections (list): (source, target, pattern) specs, the dendrites of a neuron follow their order.
+        weight (tuple or float): The (low, high) range of the random weights, or one weight for all connections.
+        seed (int, optional): The seed of the random weights and patterns.
+        phased (bool): Build the phased step, needed for lateral and recurrent connections.
+        dtype: The type of the weights.
+        **parameters: Neuron, synapse and sensor parameters of Engine, the ai.Brain values by default.
+
+    Returns:
+        CompiledNetwork: The network, with the input(), step() and train() calls of ai.Brain.
+            It was built without objects, so sync() has nothing to write back.
+    """
+    rng = np.random.default_rng(seed)
+    starts = np.concatenate([[0], np.cumsum(layers)]).astype(np.int64)
+    n_neurons = int(starts[-1])
+    sensor_start = n_neurons   # synapse i belongs to neuron i, the sensors come after the synapses
+
+    def group(name):
+        if name == SENSORS:
+            return sensor_start, sensors
+        return int(starts[name]), int(layers[name])
+
+    neuron_parts, source_parts, motor_parts = [], [], []
+    for source, target, pattern in connections:
+        if source == MOTORS or target == SENSORS:
+            raise ValueError("Connections go from the sensors or a layer to a layer or the motors.")
+        first_source, n_sources = group(source)
+        if target == MOTORS:
+            targets, sources = pattern(n_sources, motors, rng)
+            motor_parts.append((targets, first_source + sources))
+            continue
+        if not phased and source != SENSORS and target <= source:
+            raise ValueError("Lateral and recurrent connections need the phased step, build it with phased=True.")
+        first_target, n_targets = group(target)
+        targets, sources = pattern(n_sources, n_targets, rng)
+        neuron_parts.append(first_target + targets)
+        source_parts.append(first_source + sources)
+
+    empty = np.zeros(0, dtype=np.int64)
+    dendrite_neuron = np.concatenate(neuron_parts or [empty])
+    dendrite_source = np.concatenate(source_parts or [empty])
+    order = np.argsort(dendrite_neuron, kind='stable')
+    dendrite_neuron, dendrite_source = dendrite_neuron[order], dendrite_source[order]
+    weights = rng.uniform(*weight, len(order)) if np.ndim(weight) else weight
+    connectivity = Connectivity.from_dendrites(dendrite_neuron, dendrite_source, weights, n_neurons,
+                                               n_neurons + sensors + 1, dtype=dtype)
+
+    motor_neuron = np.concatenate([t for t, _ in motor_parts] or [empty])
+    motor_source = np.concatenate([s for _, s in motor_parts] or [empty])
+    order = np.argsort(motor_neuron, kind='stable')
+    bounds = np.searchsorted(motor_neuron[order], np.arange(motors + 1))
+    motor_sources = [motor_source[order][bounds[i]:bounds[i + 1]] for i in range(motors)]
+
+    engine = Engine(stages=list(layers), connectivity=connectivity, synapse_neuron=np.arange(n_neurons),
+                    sensors=sensors, motors=motor_sources, phased=phased, **dict(BRAIN_PARAMETERS, **parameters))
+    return CompiledNetwork(engine, [], [], [], [], [], [])
@@ -0,0 +1,420 @@
+import glob
+import json
+import mmap as mmap_module
+import os
+import struct
+import uuid
+import zlib
+
+import numpy as np
+
+from snn.compilers import CompiledNetwork
+from snn.connectivity import Connectivity
+from snn.engines import Engine, EventEngine, FixedPointEngine, _Stage
+
+
+# A checkpoint file is a fixed preamble, a JSON header and the raw arrays:
+#   magic (8 bytes) | version (uint32) | header length (uint64) | header (utf-8 JSON) | arrays
+# The header holds the metadata and, for every array, its dtype, shape and offset in the file.
+# Arrays start on ALIGNMENT byte boundaries, so they can be mapped in place.
+MAGIC = b'AGICKPT\0'
+VERSION = 1
+ALIGNMENT = 64
+_PREAMBLE = struct.Struct('<8sIQ')
+
+ENGINES = {cls.__name__: cls for cls in (Engine, EventEngine, FixedPointEngine)}
+
+
+def _align(offset):
+    return -(-offset // ALIGNMENT) * ALIGNMENT
+
+
+def _layout(arrays, meta):
+    """Returns the header, the offset of the first array and the size of the arrays of a checkpoint."""
+    table, offset = {}, 0
+    for name, array in arrays.items():
+        table[name] = dict(dtype=array.dtype.str, shape=list(array.shape), offset=offset)
+        offset = _align(offset + array.nbytes)
+    header = json.dumps(dict(meta=meta or {}, arrays=table)).encode()
+    return header, table, _align(_PREAMBLE.size + len(header)), offset
+
+
+def write(path, arrays, meta=None):
+    """
+    Writes arrays into a checkpoint file.
+
+    Args:
+        path (str): The file to write.
+        arrays (dict): The arrays by name.
+        meta (dict, optional): JSON-serializable metadata stored in the header.
+    """
+    arrays = {name: np.ascontiguousarray(array) for name, array in arrays.items()}
+    header, table, start, size = _layout(arrays, meta)
+
+    with open(path, 'wb') as file:
+        file.write(_PREAMBLE.pack(MAGIC, VERSION, len(header)))
+        file.write(header)
+        for name, array in arrays.items():
+            file.seek(start + table[name]['offset'])
+            file.write(memoryview(array.reshape(-1)).cast('B'))
+        file.truncate(start + size)
+
+
+def dumps(arrays, meta=None):
+    """Returns the bytes of a checkpoint file holding arrays and meta, see write()."""
+    arrays = {name: np.ascontiguousarray(array) for name, array in arrays.items()}
+    header, table, start, size = _layout(arrays, meta)
+    buffer = bytearray(start + size)
+    _PREAMBLE.pack_into(buffer, 0, MAGIC, VERSION, len(header))
+    buffer[_PREAMBLE.size:_PREAMBLE.size + len(header)] = header
+    for name, array in arrays.items():
+        offset = start + table[name]['offset']
+        buffer[offset:offset + array.nbytes] = memoryview(array.reshape(-1)).cast('B')
+    return bytes(buffer)
+
+
+def _header_size(preamble, name):
+    """Checks the preamble of a checkpoint and returns the length of its header."""
+    magic, version, size = _PREAMBLE.unpack(preamble)
+    if magic != MAGIC:
+        raise ValueError(f"{name} is not a checkpoint.")
+    if version > VERSION:
+        raise ValueError(f"{name} has checkpoint version {version}, this version reads up to {VERSION}.")
+    return size
+
+
+def _arrays(buffer, header, start):
+    """Returns the arrays listed in header as views of buffer, the arrays start at the offset start."""
+    arrays = {}
+    for name, entry in header['arrays'].items():
+        dtype, shape = np.dtype(entry['dtype']), tuple(entry['shape'])
+        if dtype.hasobject:
+            raise ValueError(f"The checkpoint array {name} holds Python objects.")
+        count = int(np.prod(shape))
+        if count == 0:
+            arrays[name] = np.empty(shape, dtype=dtype)
+        else:
+            arrays[name] = np.frombuffer(buffer, dtype=dtype, count=count, offset=start + entry['offset']).reshape(shape)
+    return arrays
+
+
+def read(path, mmap=True):
+    """
+    Reads a checkpoint file.
+
+    Args:
+        path (str): The file to read.
+        mmap (bool): Map the file instead of reading it. Opening is then instant whatever the size of the
+            file, the arrays are paged in when they are first used. The mapping is copy-on-write: the arrays
+            are writable, but the changes stay in memory and never reach the file.
+
+    Returns:
+        tuple: (meta, arrays), the metadata and a dict of the arrays by name.
+    """
+    with open(path, 'rb') as file:
+        size = _header_size(file.read(_PREAMBLE.size), path)
+        header = json.loads(file.read(size))
+        start = _align(_PREAMBLE.size + size)
+        if mmap:
+            buffer = mmap_module.mmap(file.fileno(), 0, access=mmap_module.ACCESS_COPY)
+        else:
+            file.seek(0)
+            buffer = bytearray(file.read())
+    return header['meta'], _arrays(buffer, header, start)
+
+
+def loads(data):
+    """
+    Reads the bytes of a checkpoint, see dumps().
+
+    Only the JSON header and raw arrays of plain data types are decoded, so unlike pickle the bytes can't run code.
+
+    Returns:
+        tuple: (meta, arrays), the arrays are writable copies.
+    """
+    buffer = bytearray(data)
+    size = _header_size(bytes(buffer[:_PREAMBLE.size]), "The data")
+    header = json.loads(bytes(buffer[_PREAMBLE.size:_PREAMBLE.size + size]))
+    return header['meta'], _arrays(buffer, header, _align(_PREAMBLE.size + size))
+
+
+def save(path, network):
+    """
+    Saves a compiled network (its engine: wiring, parameters, weights and state) into a checkpoint file.
+
+    Every checkpoint gets a new random id, which the deltas of a DeltaCheckpointer refer to.
+
+    Args:
+        path (str): The file to write.
+        network (CompiledNetwork): The network, e.g. from Brain.compile() or build_network().
+    """
+    meta, arrays = engine_arrays(network.engine)
+    meta['id'] = uuid.uuid4().hex
+    write(path, arrays, meta)
+
+
+def engine_arrays(engine):
+    """
+    Returns the metadata and the arrays that describe an engine (wiring, parameters, weights and state).
+
+    Returns:
+        tuple: (meta, arrays), for write() or dumps(). from_arrays() rebuilds the engine.
+    """
+    meta = dict(engine=type(engine).__name__, stages=[[stage.start, stage.stop] for stage in engine.stages],
+                n_sources=engine.connectivity.n_sources, scalars={}, plans=[])
+    arrays = dict(indptr=engine.connectivity.indptr, indices=engine.connectivity.indices)
+    for name, value in vars(engine).items():
+        if isinstance(value, np.ndarray):
+            arrays[name] = value
+        elif isinstance(value, np.generic):
+            meta['scalars'][name] = value.item()
+        elif value is None or isinstance(value, (bool, int, float, str)):
+            meta['scalars'][name] = value
+
+    for i, plan in enumerate(engine._plans):
+        meta['plans'].append(dict(neurons=[plan.neurons.start, plan.neurons.stop],
+                                  dendrites=[plan.dendrites.start, plan.dendrites.stop],
+                                  synapses=[plan.synapses.start, plan.synapses.stop]))
+        arrays[f'plans.{i}.consumed'] = plan.consumed
+        if plan.primary is not None:
+            arrays[f'plans.{i}.primary'] = plan.primary
+    for i, hits in enumerate(getattr(engine, '_hits', [])):
+        arrays[f'hits.{i}'] = hits
+    for name, values in zip(('instance', 'synapse', 'ticks', 'code'), engine.delayed()):
+        arrays[f'delayed.{name}'] = values
+    return meta, arrays
+
+
+def load(path, mmap=True):
+    """
+    Loads a network saved by save().
+
+    The engine is rebuilt around the stored arrays without copying or validating them, so with mmap=True
+    a network of any size opens instantly and its pages are read from the file as the steps touch them.
+
+    Args:
+        path (str): The file to read.
+        mmap (bool): Map the file (copy-on-write, see read()) instead of reading it into memory.
+
+    Returns:
+        CompiledNetwork: The network. It has no objects, so sync() has nothing to write back.
+    """
+    return CompiledNetwork(from_arrays(*read(path, mmap)), [], [], [], [], [], [])
+
+
+def from_arrays(meta, arrays):
+    """Rebuilds an engine from engine_arrays() around the given arrays, without copying or validating them."""
+    engine = ENGINES[meta['engine']].__new__(ENGINES[meta['engine']])
+    for name, value in meta['scalars'].items():
+        setattr(engine, name, value)
+    for name, array in arrays.items():
+        if '.' not in name and name not in ('indptr', 'indices'):
+            setattr(engine, name, array)
+
+    engine.stages = [slice(start, stop) for start, stop in meta['stages']]
+    engine.connectivity = Connectivity(arrays['indptr'], arrays['indices'], engine.weight, meta['n_sources'], check=False)
+    engine._plans = [_Stage(slice(*plan['neurons']), slice(*plan['dendrites']), slice(*plan['synapses']),
+                            arrays.get(f'plans.{i}.primary'), arrays[f'plans.{i}.consumed'])
+                     for i, plan in enumerate(meta['plans'])]
+    engine._phase = _Stage(slice(0, engine.n_neurons), slice(0, engine.n_dendrites), slice(0, engine.n_synapses),
+                           None, np.arange(engine.n_synapses))
+    if isinstance(engine, EventEngine):
+        engine._hits = [arrays[f'hits.{i}'] for i in range(len(engine._plans))]
+    engine._lines = [[] for _ in range(engine.max_delay)]
+    engine.schedule(arrays['delayed.synapse'], arrays['delayed.ticks'], arrays['delayed.code'],
+                    instance=arrays['delayed.instance'])
+    return engine
+
+
+def restore(path, network):
+    """
+    Loads the weights and the state saved by save() into a compiled network with the same wiring.
+
+    Args:
+        path (str): The file to read.
+        network (CompiledNetwork): The network, e.g. a new Brain.compile() of the brain that was saved.
+    """
+    saved = load(path, mmap=False).engine
+    engine = network.engine
+    if (type(saved) is not type(engine) or saved.stages != engine.stages or saved.batch != engine.batch
+            or not np.array_equal(saved.connectivity.indptr, engine.connectivity.indptr)
+            or not np.array_equal(saved.connectivity.indices, engine.connectivity.indices)
+            or not np.array_equal(saved.synapse_neuron, engine.synapse_neuron)):
+        raise ValueError(f"{path} holds a different network.")
+    saved.settle()
+    for name in Engine.STATE:
+        getattr(engine, name)[...] = getattr(saved, name)
+    engine.tick = saved.tick
+    engine._lines = [[] for _ in range(engine.max_delay)]
+    instance, synapse, ticks, code = saved.delayed()
+    engine.schedule(synapse, ticks, code, instance=instance)
+    engine.refresh()
+
+
+def _replace(path, network):
+    """Saves network into path through a temporary file, so path always holds a complete checkpoint."""
+    temporary = f'{path}.tmp'
+    save(temporary, network)
+    os.replace(temporary, path)
+
+
+def _deltas(path):
+    """Returns the delta files of the checkpoint path, in order."""
+    return sorted(glob.glob(f'{glob.escape(path)}.delta-*'))
+
+
+def _bytes(array):
+    """Returns the bytes of a contiguous array as a flat uint8 view."""
+    return array.reshape(-1).view(np.uint8)
+
+
+def _hashes(data, block_size):
+    """Returns the CRC-32 of every block of block_size bytes of data."""
+    return np.array([zlib.crc32(data[i:i + block_size]) for i in range(0, len(data), block_size)], dtype=np.uint32)
+
+
+def _gather(data, blocks, block_size):
+    """Returns the bytes of the given blocks, concatenated."""
+    full = len(data) // block_size
+    inside = blocks[blocks < full]
+    payload = data[:full * block_size].reshape(full, block_size)[inside].reshape(-1)
+    if len(inside) < len(blocks):  # the last, partial block
+        payload = np.concatenate([payload, data[full * block_size:]])
+    return payload
+
+
+def _scatter(data, blocks, payload, block_size):
+    """Writes the bytes of the given blocks (from _gather) into data."""
+    full = len(data) // block_size
+    inside = blocks[blocks < full]
+    data[:full * block_size].reshape(full, block_size)[inside] = payload[:len(inside) * block_size].reshape(-1, block_size)
+    if len(inside) < len(blocks):
+        data[full * block_size:] = payload[len(inside) * block_size:]
+
+
+class DeltaCheckpointer:
+    """
+    Incremental checkpoints of a compiled network during a long training run.
+
+    snapshot() writes a full checkpoint to path. delta() then writes only the weights and the state that
+    changed since the last snapshot or delta, to path.delta-000001, path.delta-000002 and so on.
+    The state arrays (Engine.STATE) are split in blocks of block_size bytes, and a dirty-block bitmap per
+    array marks the blocks whose CRC-32 differs from the one of the last written state. A delta file holds
+    the packed bitmaps and the dirty blocks only, so its size follows the amount of change, not the size
+    of the network. Keeping 4 bytes per block instead of a shadow copy of the state costs 1/1024 of the
+    state with the default block size; a change that keeps the CRC of its block (a 2**-32 chance) is missed
+    until the block changes again. replay() loads the base and applies the deltas, compact() folds them into a new base.
+
+    Attributes:
+        network (CompiledNetwork): The network being checkpointed.
+        path (str): The base checkpoint file.
+        block_size (int): Bytes per block of the dirty bitmaps.
+        sequence (int): The number of deltas written since the last snapshot.
+        bytes_written (int): Bytes of the last snapshot or delta file.
+    """
+
+    def __init__(self, network, path, block_size=4096):
+        """Initializes DeltaCheckpointer, call snapshot() to write the base checkpoint."""
+        if block_size < 1:
+            raise ValueError("A block has at least one byte.")
+        self.network = network
+        self.path = path
+        self.block_size = int(block_size)
+        self.sequence = 0
+        self.bytes_written = 0
+        self._id = None
+        self._hashes = None
+
+    def snapshot(self):
+        """Writes a full checkpoint of the network and removes the deltas of the previous one."""
+        engine = self.network.engine
+        engine.settle()
+        _replace(self.path, self.network)
+        for delta in _deltas(self.path):
+            os.remove(delta)
+        self._id = read(self.path)[0]['id']
+        self._hashes = {name: _hashes(_bytes(getattr(engine, name)), self.block_size) for name in Engine.STATE}
+        self.sequence = 0
+        self.bytes_written = os.path.getsize(self.path)
+
+    def delta(self):
+        """
+        Writes the weights and the state changed since the last snapshot or delta.
+
+        Returns:
+            str: The path of the delta file.
+        """
+        if self._hashes is None:
+            raise ValueError("Write a snapshot() before the deltas.")
+        engine = self.network.engine
+        engine.settle()
+        arrays = {}
+        for name in Engine.STATE:
+            data = _bytes(getattr(engine, name))
+            hashes = _hashes(data, self.block_size)
+            blocks = np.flatnonzero(hashes != self._hashes[name])
+            self._hashes[name] = hashes
+            payload = _gather(data, blocks, self.block_size)
+            arrays[f'{name}.bitmap'] = np.packbits(np.isin(np.arange(-(-len(data) // self.block_size)), blocks))
+            arrays[f'{name}.blocks'] = payload
+        for name, values in zip(('instance', 'synapse', 'ticks', 'code'), engine.delayed()):
+            arrays[f'delayed.{name}'] = values
+
+        self.sequence += 1
+        path = f'{self.path}.delta-{self.sequence:06d}'
+        write(path, arrays, meta=dict(base=self._id, sequence=self.sequence, tick=engine.tick,
+                                      block_size=self.block_size))
+        self.bytes_written = os.path.getsize(path)
+        return path
+
+    def compact(self):
+        """Folds the deltas into a new base checkpoint, see compact()."""
+        compact(self.path)
+        self._id = read(self.path)[0]['id']
+        self.sequence = 0
+        self.bytes_written = os.path.getsize(self.path)
+
+
+def replay(path, mmap=True):
+    """
+    Loads a checkpoint written by a DeltaCheckpointer and applies its deltas in order.
+
+    Deltas of an older base (left over by an interrupted snapshot or compaction) are skipped.
+
+    Args:
+        path (str): The base checkpoint file.
+        mmap (bool): Map the base (see load()), the deltas then only copy the pages they change.
+
+    Returns:
+        CompiledNetwork: The network in the state of the last delta.
+    """
+    network = load(path, mmap=mmap)
+    engine = network.engine
+    base = read(path)[0]['id']
+    expected = 1
+    for delta in _deltas(path):
+        meta, arrays = read(delta)
+        if meta['base'] != base:
+            continue
+        if meta['sequence'] != expected:
+            raise ValueError(f"{delta} doesn't follow delta {expected - 1} of {path}.")
+        expected += 1
+        for name in Engine.STATE:
+            data = _bytes(getattr(engine, name))
+            n_blocks = -(-len(data) // meta['block_size'])
+            blocks = np.flatnonzero(np.unpackbits(arrays[f'{name}.bitmap'], count=n_blocks))
+            _scatter(data, blocks, arrays[f'{name}.blocks'], meta['block_size'])
+        engine.tick = meta['tick']
+        engine._lines = [[] for _ in range(engine.max_delay)]
+        engine.schedule(arrays['delayed.synapse'], arrays['delayed.ticks'], arrays['delayed.code'],
+                        instance=arrays['delayed.instance'])
+    engine.refresh()
+    return network
+
+
+def compact(path):
+    """Replays the deltas of the checkpoint path into a new base checkpoint and removes them."""
+    network = replay(path, mmap=False)
+    _replace(path, network)
+    for delta in _deltas(path):
+        os.remove(delta)
@@ -0,0 +1,20 @@
+class Clock:
+    """
+    A simulation clock shared by the objects of one network.
+
+    Lazily updated objects (e.g. a Synapse with a clock) record the tick of their last update
+    and catch up on the ticks they skipped when they are read.
+
+    Attributes:
+        tick (int): Number of started steps.
+    """
+
+    __slots__ = ('tick',)
+
+    def __init__(self):
+        """Initializes the Clock at tick 0."""
+        self.tick = 0
+
+    def advance(self, ticks=1):
+        """Starts the next step, or skips ticks steps at once."""
+        self.tick += ticks
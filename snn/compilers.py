@@ -0,0 +1,362 @@
+import numpy as np
+
+from snn.connectivity import Connectivity
+from snn.engines import Engine, EventEngine, FixedPointEngine, MODES
+from snn.neurotransmitters import NO_TRANSMITTER
+
+
+class CompiledNetwork:
+    """
+    A network of Neuron, SensorNeuron and MotorNeuron objects compiled into a flat Engine.
+
+    It offers the same input(), step() and train() calls as ai.Brain, but runs them on the engine.
+    The original objects are left untouched until sync() writes the engine state back into them.
+
+    Attributes:
+        engine (Engine): The engine that simulates the network.
+        sensors (list): The compiled sensor neurons, in engine order.
+        neurons (list): The compiled neurons, in engine order (stage by stage).
+        motors (list): The compiled motor neurons, in engine order.
+        synapses (list): The compiled synapses, in engine order.
+        dendrites (list): The compiled dendrites, in engine order.
+    """
+
+    def __init__(self, engine, sensors, neurons, motors, synapses, dendrites, sources):
+        """Initializes CompiledNetwork with the engine and the objects it was compiled from."""
+        self.engine = engine
+        self.sensors = sensors
+        self.neurons = neurons
+        self.motors = motors
+        self.synapses = synapses
+        self.dendrites = dendrites
+        self.sources = sources  # objects behind each source index (synapses, then sensors)
+
+    def input(self, input_data):
+        """Sets input for the sensors."""
+        self.engine.set_input(input_data)
+
+    def step(self):
+        """
+        Executes one step of the whole network.
+
+        Returns:
+            list: The output value of each motor.
+        """
+        return self.engine.step().tolist()
+
+    def train(self, error):
+        """Applies simple cycle by cycle learning to the last stage, like ai.Brain.train."""
+        self.engine.learn(error, neurons=self.engine.stages[-1])
+
+    def _layer_ranges(self, kind):
+        """Returns the slice of the dendrites, neurons or synapses of each stage."""
+        plans = self.engine._plans
+        return [getattr(plan, kind) for plan in plans]
+
+    def _get(self, array, kind, per_layer, scale=1):
+        """Returns array (a view) or a dict of per-stage views, divided by scale (a copy) for fixed-point arrays."""
+        array = array if scale == 1 else array / scale
+        if not per_layer:
+            return array
+        return {i: array[..., part] for i, part in enumerate(self._layer_ranges(kind))}
+
+    def _set(self, array, kind, values, scale=1):
+        """Writes a flat array or a dict {stage: array} of values into array, in place."""
+        convert = (lambda v: v) if scale == 1 else (lambda v: np.rint(np.asarray(v) * scale))
+        if isinstance(values, dict):
+            parts = self._layer_ranges(kind)
+            for i, layer_values in values.items():
+                array[..., parts[i]] = convert(layer_values)
+        else:
+            array[...] = convert(values)
+
+    def get_weights(self, per_layer=False):
+        """
+        Returns the dendrite weights in stage, neuron and dendrite order, like ai.Brain.get_weights.
+
+        The result is a view of the engine weights (or a dict of views, one per stage with per_layer=True),
+        so writing into it changes the network. A fixed-point engine returns a float copy.
+        """
+        return self._get(self.engine.weight, 'dendrites', per_layer, self._scale('W_SCALE'))
+
+    def set_weights(self, weights):
+        """Writes a flat array or a dict {stage: array} of dendrite weights into the engine."""
+        self._set(self.engine.weight, 'dendrites', weights, self._scale('W_SCALE'))
+
+    def get_membrane_params(self, per_layer=False):
+        """
+        Returns a dict {name: values} of ai.Brain.MEMBRANE_PARAMS, the values are views of the engine arrays.
+
+        An event-driven engine is settled first, so v_m includes the silent ticks it skipped.
+        """
+        engine = self.engine
+        engine.settle()
+        params = {name: self._get(getattr(engine, name), 'neurons', per_layer) for name in ('rest', 'threshold', 'reset_ratio', 'leakage')}
+        params['v_m'] = self._get(engine.v_m, 'neurons', per_layer, self._scale('V_SCALE'))
+        return params
+
+    def set_membrane_params(self, params):
+        """Writes a dict {name: values} of membrane parameters into the engine, see get_membrane_params."""
+        self.engine.settle()
+        for name, values in params.items():
+            if name == 'v_m':
+                self._set(self.engine.v_m, 'neurons', values, self._scale('V_SCALE'))
+            elif name in ('rest', 'threshold', 'reset_ratio', 'leakage'):
+                if isinstance(self.engine, FixedPointEngine):
+                    raise ValueError("The parameters of a fixed-point engine are fixed, compile the network again to change them.")
+                self._set(getattr(self.engine, name), 'neurons', values)
+            else:
+                raise ValueError(f"Unknown membrane parameter {name}.")
+        self.engine.refresh()
+
+    def get_synapse_levels(self, per_layer=False):
+        """Returns the neurotransmitter levels of the synapses (settled first), a view of the engine levels."""
+        self.engine.settle()
+        return self._get(self.engine.level, 'synapses', per_layer, self._scale('W_SCALE'))
+
+    def set_synapse_levels(self, levels):
+        """Writes a flat array or a dict {stage: array} of neurotransmitter levels into the engine."""
+        self.engine.settle()
+        self._set(self.engine.level, 'synapses', levels, self._scale('W_SCALE'))
+        self.engine.refresh()
+
+    def _scale(self, name):
+        """Returns the fixed-point scale of the engine, 1 for a float engine."""
+        return getattr(self.engine, name) if isinstance(self.engine, FixedPointEngine) else 1
+
+    def sync(self):
+        """Writes the learned weights and the current state of the engine back into the original objects."""
+        engine = self.engine
+        engine.settle()
+        if isinstance(engine, FixedPointEngine):
+            engine = engine.to_engine()
+
+        for i, sensor in enumerate(self.sensors):
+            sensor.input_value = float(engine.sensor_input[i])
+            sensor.output_value = bool(engine.signal[engine.n_synapses + i] != NO_TRANSMITTER)
+
+        for i, neuron in enumerate(self.neurons):
+            core = neuron.core
+            core.membrane.v_m = float(engine.v_m[i])
+            core.membrane.spike = bool(engine.spike[i])
+            core.refractory_time_remaining = float(engine.refractory_time_remaining[i])
+
+        cycle_train = engine.mode[engine.dendrite_neuron] == MODES.index("cycle-train")
+        for i, dendrite in enumerate(self.dendrites):
+            dendrite.weight = float(engine.weight[i])
+            if cycle_train[i]:
+                dendrite.last_input_state = (int(engine.last_input[i]), dendrite.weight)
+
+        for i, synapse in enumerate(self.synapses):
+            synapse.neurotransmitter_level = float(engine.level[i])
+            synapse.received_code = int(engine.signal[i])
+
+        flights = [[] for _ in self.synapses]
+        for _, i, ticks, code in zip(*engine.delayed()):
+            flights[i].append((int(ticks), int(code)))
+        for synapse, flight in zip(self.synapses, flights):
+            if synapse.delay > 1:
+                synapse.load_flight(flight)
+
+        for i, motor in enumerate(self.motors):
+            motor.output_value = int(engine.motor_output[i])
+
+
+class CompiledBatch:
+    """
+    Several networks with the same topology compiled into one batched Engine.
+
+    input() takes one row of sensor values per network, step() returns one row of motor outputs
+    per network and train() takes one error per network (or one error for all of them).
+
+    Attributes:
+        engine (Engine): The batched engine that simulates all networks.
+        networks (list): The CompiledNetwork of each network, used by sync() to write the state back.
+    """
+
+    def __init__(self, engine, networks):
+        """Initializes CompiledBatch with the batched engine and the compiled networks it was stacked from."""
+        self.engine = engine
+        self.networks = networks
+
+    def input(self, input_data):
+        """Sets input for the sensors, input_data has the shape [networks, sensors]."""
+        self.engine.set_input(input_data)
+
+    def step(self):
+        """
+        Executes one step of all networks.
+
+        Returns:
+            ndarray: The motor outputs, with the shape [networks, motors].
+        """
+        return self.engine.step()
+
+    def train(self, error):
+        """Applies simple cycle by cycle learning to the last stage, with one error per network or a shared one."""
+        self.engine.learn(error, neurons=self.engine.stages[-1])
+
+    def sync(self):
+        """Writes the learned weights and the current state of every network back into its objects."""
+        engine = self.engine.to_engine() if isinstance(self.engine, FixedPointEngine) else self.engine
+        engine.unstack([network.engine for network in self.networks])
+        for network in self.networks:
+            network.sync()
+
+
+def _discover_layers(motors, cycles=False):
+    """
+    Walks the graph backwards from the motors, following MotorNeuron.post_synapses, Dendrite.post_synapse
+    and Synapse.parent_neuron, and groups the reached neurons in layers by their longest distance from the sensors.
+    With cycles=True the connections that close a cycle are ignored for the depth instead of raising.
+    """
+    depth = {}
+    neurons = {}
+
+    def presynaptic(neuron):
+        for dendrite in neuron.core.dendrites:
+            parent = getattr(dendrite.post_synapse, 'parent_neuron', None)
+            if parent is not None:
+                yield parent
+
+    def visit(neuron, path):
+        key = id(neuron)
+        if key in depth:
+            return depth[key]
+        if key in path:
+            if cycles:
+                return -1
+            raise ValueError("The network has a cycle, it can't be split in layers (compile it with phased=True).")
+        path.add(key)
+        depth[key] = 1 + max((visit(parent, path) for parent in presynaptic(neuron)), default=-1)
+        path.discard(key)
+        neurons[key] = neuron
+        return depth[key]
+
+    for motor in motors:
+        for synapse in motor.post_synapses:
+            if getattr(synapse, 'parent_neuron', None) is not None:
+                visit(synapse.parent_neuron, set())
+
+    layers = [[] for _ in range(max(depth.values(), default=-1) + 1)]
+    for key, neuron in neurons.items():
+        layers[depth[key]].append(neuron)
+    return layers
+
+
+def compile_network(sensors, layers=None, motors=(), event_driven=False, fixed_point=False, phased=False):
+    """
+    Compiles an object-graph network into an Engine.
+
+    Args:
+        sensors (list): SensorNeuron objects read by the network.
+        layers (list, optional): Lists of Neuron objects, one list per layer, in processing order.
+            If omitted, the layers are discovered by walking the graph back from the motors
+            through Dendrite.post_synapse and Synapse.parent_neuron.
+        motors (list): MotorNeuron objects driven by the network.
+        event_driven (bool): Compile into an EventEngine, which only processes neurons that receive spikes.
+        fixed_point (bool): Compile into a FixedPointEngine, which computes with scaled integers.
+            The weights are rounded to 3 decimals.
+        phased (bool): Compile the phased step of Brain(phased=True). Neurons may then read any synapse,
+            so recurrent networks compile too.
+
+    Returns:
+        CompiledNetwork: The compiled network.
+    """
+    if event_driven and fixed_point:
+        raise ValueError("The event-driven engine has no fixed-point mode.")
+    if event_driven and phased:
+        raise ValueError("The event-driven engine has no phased step.")
+    if layers is None:
+        layers = _discover_layers(motors, cycles=phased)
+    neurons = [neuron for layer in layers for neuron in layer]
+
+    synapses = [synapse for neuron in neurons for synapse in neuron.core.axon.synapses]
+    synapse_neuron = [i for i, neuron in enumerate(neurons) for _ in neuron.core.axon.synapses]
+    dendrites = [dendrite for neuron in neurons for dendrite in neuron.core.dendrites]
+    dendrite_neuron = [i for i, neuron in enumerate(neurons) for _ in neuron.core.dendrites]
+
+    sources = synapses + list(sensors)
+    index = {id(source): i for i, source in enumerate(sources)}
+    null_source = len(sources)
+
+    def source_of(obj):
+        if obj is None:
+            return null_source
+        if id(obj) not in index:
+            raise ValueError("A connection points to a synapse or sensor that is not part of the compiled network.")
+        return index[id(obj)]
+
+    dendrite_source = [source_of(dendrite.post_synapse) for dendrite in dendrites]
+    motor_sources = [[source_of(synapse) for synapse in motor.post_synapses] for motor in motors]
+
+    # neurons of one layer are updated together, so they can't read each other (a phased step has no layer order)
+    stage_of_synapse = np.repeat(np.arange(len(layers)), [sum(len(n.core.axon.synapses) for n in layer) for layer in layers])
+    stage_of_neuron = np.repeat(np.arange(len(layers)), [len(layer) for layer in layers])
+    for i, source in enumerate(dendrite_source):
+        if not phased and source < len(synapses) and stage_of_synapse[source] == stage_of_neuron[dendrite_neuron[i]]:
+            raise ValueError("A neuron reads a synapse of its own layer, split the layer to compile it.")
+
+    cores = [neuron.core for neuron in neurons]
+    connectivity = Connectivity.from_dendrites(
+        dendrite_neuron, dendrite_source, [d.weight for d in dendrites], len(neurons), null_source + 1)
+    engine = (EventEngine if event_driven else Engine)(
+        stages=[len(layer) for layer in layers],
+        connectivity=connectivity,
+        synapse_neuron=synapse_neuron,
+        max_weight=[d.max_weight for d in dendrites],
+        min_weight=[d.min_weight for d in dendrites],
+        rest=[c.membrane.rest for c in cores],
+        threshold=[c.membrane.threshold for c in cores],
+        reset_ratio=[c.membrane.reset_ratio for c in cores],
+        leakage=[c.membrane.leakage for c in cores],
+        refractory_period=[c.refractory_period for c in cores],
+        mode=[c.mode for c in cores],
+        initial_level=[s.max_level for s in synapses],
+        regenerate_rate=[s.regenerate_rate for s in synapses],
+        transmitter_type=[s.transmitter_type for s in synapses],
+        delay=[s.delay for s in synapses],
+        sensors=len(sensors),
+        sensitivity=[s.sensitivity for s in sensors],
+        leak_rate=[s.leak_rate for s in sensors],
+        motors=motor_sources,
+        phased=phased,
+    )
+
+    # continue from the current state of the objects
+    engine.v_m[:] = [c.membrane.v_m for c in cores]
+    engine.spike[:] = [c.membrane.spike for c in cores]
+    engine.refractory_time_remaining[:] = [c.refractory_time_remaining for c in cores]
+    engine.level[:] = [s.neurotransmitter_level for s in synapses]
+    engine.last_input[:] = [d.last_input_state[0] if d.last_input_state else NO_TRANSMITTER for d in dendrites]
+    engine.sensor_input[:] = [s.input_value for s in sensors]
+    engine.signal[:len(synapses)] = [s.received_code for s in synapses]
+    engine.signal[len(synapses):null_source] = [s.receive_code() for s in sensors]
+    engine.motor_output[:] = [m.output_value for m in motors]
+    flights = [(i, ticks, code) for i, s in enumerate(synapses) for ticks, code in s.in_flight()]
+    if flights:
+        engine.schedule(*zip(*flights))
+    engine.refresh()
+    if fixed_point:
+        engine = FixedPointEngine.from_engine(engine)
+
+    return CompiledNetwork(engine, list(sensors), neurons, list(motors), synapses, dendrites, sources)
+
+
+def compile_batch(networks, fixed_point=False, phased=False):
+    """
+    Compiles networks with the same topology and parameters into one batched Engine.
+
+    Args:
+        networks (list): A (sensors, layers, motors) tuple per network, see compile_network.
+        fixed_point (bool): Compile into a FixedPointEngine, see compile_network.
+        phased (bool): Compile the phased step, see compile_network.
+
+    Returns:
+        CompiledBatch: The compiled networks.
+    """
+    compiled = [compile_network(sensors, layers, motors, phased=phased) for sensors, layers, motors in networks]
+    engine = Engine.stack([network.engine for network in compiled])
+    if fixed_point:
+        engine = FixedPointEngine.from_engine(engine)
+    return CompiledBatch(engine, compiled)
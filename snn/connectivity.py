@@ -0,0 +1,117 @@
+import numpy as np
+
+
+class Connectivity:
+    """
+    Sparse connectivity of a population stored as a CSR (compressed sparse row) matrix.
+
+    Rows are postsynaptic neurons, columns are presynaptic sources (synapses or sensors) and
+    the values are the dendrite weights, so one dendrite is one stored element.
+    The elements of a row keep the order of the neuron's dendrites.
+    A connection costs one column index and one weight instead of a Dendrite object.
+
+    Attributes:
+        indptr (ndarray): Row pointer, dendrites of neuron i are indptr[i]:indptr[i+1].
+        indices (ndarray): Source index of each dendrite.
+        data (ndarray): Weight of each dendrite, optionally with a leading batch axis (one row of weights per instance).
+        n_sources (int): Number of columns (sources).
+    """
+
+    def __init__(self, indptr, indices, data, n_sources, check=True):
+        """Initializes Connectivity from CSR arrays, check=False skips the validation (which reads every element)."""
+        self.indptr = np.asarray(indptr, dtype=np.int64)
+        self.indices = np.asarray(indices, dtype=np.int32 if n_sources < 2**31 else np.int64)
+        self.data = np.asarray(data)
+        self.n_sources = int(n_sources)
+
+        if not check:
+            return
+        if self.indptr[0] != 0 or self.indptr[-1] != len(self.indices) or np.any(np.diff(self.indptr) < 0):
+            raise ValueError("Row pointer doesn't describe the stored elements.")
+        if self.data.ndim not in (1, 2) or self.data.shape[-1] != len(self.indices):
+            raise ValueError("Every stored element needs one index and one weight.")
+        if len(self.indices) and (self.indices.min() < 0 or self.indices.max() >= self.n_sources):
+            raise ValueError("Source index is out of range.")
+
+    @classmethod
+    def from_dendrites(cls, dendrite_neuron, dendrite_source, weight, n_neurons, n_sources, dtype=np.float64):
+        """
+        Builds the matrix from one (owner neuron, source, weight) triple per dendrite.
+
+        Args:
+            dendrite_neuron (sequence): Owner neuron of each dendrite, in non-decreasing order.
+            dendrite_source (sequence): Source index read by each dendrite.
+            weight (float or sequence): Weight of each dendrite.
+            n_neurons (int): Number of rows.
+            n_sources (int): Number of columns.
+            dtype: Type of the stored weights. float32 halves the memory, float64 reproduces the object model exactly.
+        """
+        dendrite_neuron = np.asarray(dendrite_neuron, dtype=np.int64)
+        if np.any(np.diff(dendrite_neuron) < 0):
+            raise ValueError("Dendrites must be ordered by their owner neuron.")
+        if len(dendrite_neuron) and (dendrite_neuron[0] < 0 or dendrite_neuron[-1] >= n_neurons):
+            raise ValueError("Owner neuron is out of range.")
+        indptr = np.zeros(n_neurons + 1, dtype=np.int64)
+        np.cumsum(np.bincount(dendrite_neuron, minlength=n_neurons), out=indptr[1:])
+        data = np.empty(len(dendrite_neuron), dtype=dtype)
+        data[:] = weight
+        return cls(indptr, np.asarray(dendrite_source), data, n_sources)
+
+    @property
+    def shape(self):
+        """Returns (number of neurons, number of sources)."""
+        return (len(self.indptr) - 1, self.n_sources)
+
+    @property
+    def nnz(self):
+        """Returns the number of stored connections."""
+        return len(self.indices)
+
+    @property
+    def nbytes(self):
+        """Returns the memory used by the matrix in bytes."""
+        return self.indptr.nbytes + self.indices.nbytes + self.data.nbytes
+
+    def rows(self, start=0, stop=None):
+        """Returns the row (relative to start) of every element of the rows start:stop."""
+        stop = self.shape[0] if stop is None else stop
+        return np.repeat(np.arange(stop - start), np.diff(self.indptr[start:stop + 1]))
+
+    def elements(self, start=0, stop=None):
+        """Returns the slice of stored elements that belong to the rows start:stop."""
+        stop = self.shape[0] if stop is None else stop
+        return slice(int(self.indptr[start]), int(self.indptr[stop]))
+
+    def matvec(self, x, start=0, stop=None, mask=None):
+        """
+        Multiplies the rows start:stop with the source vector x.
+
+        The products of a row are summed in dendrite order, like Core.step sums its dendrites.
+
+        Args:
+            x (ndarray): One value per source (a spike vector of bools works too), or one such row per instance.
+            start, stop (int): Rows to compute, all rows by default.
+            mask (ndarray, optional): Per-element multiplier of the selected rows.
+
+        Returns:
+            ndarray: One sum per selected row, with a leading batch axis if the weights or x have one.
+        """
+        stop = self.shape[0] if stop is None else stop
+        elements = self.elements(start, stop)
+        products = self.data[..., elements] * np.asarray(x)[..., self.indices[elements]]
+        if mask is not None:
+            products = products * mask
+        return segment_sum(self.rows(start, stop), products, stop - start)
+
+
+def segment_sum(ids, values, n):
+    """
+    Sums values into n bins by id, in element order (np.bincount adds sequentially, unlike np.add.reduceat).
+
+    values may have a leading batch axis, every row is summed into its own n bins.
+    """
+    if values.ndim == 1:
+        return np.bincount(ids, weights=values, minlength=n)
+    batch = values.shape[0]
+    ids = ids + n * np.arange(batch)[:, None]
+    return np.bincount(ids.ravel(), weights=values.ravel(), minlength=batch * n).reshape(batch, n)
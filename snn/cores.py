@@ -1,3 +1,6 @@
+import math
+
+
 class Core:
     """
     This class represents the core component of a Neuron, encompassing the neuron's dendrites, membrane, and axon. 
@@ -10,8 +13,12 @@ class Core:
         refractory_period (float): Refractory period after a spike (in cycles).
         refractory_time_remaining (float): Time left in refractory period.
         mode (str): Working mode of the neuron. Can be "default" or "train".
+        total_input (float): Input gathered by the last step_left(), used by the next step_right().
     """
 
+    __slots__ = ('dendrites', 'membrane', 'axon', 'refractory_period', 'refractory_time_remaining', 'mode',
+                 'total_input')
+
     def __init__(self, dendrites, membrane, axon, refractory_period=1.0, mode="default"):
         """Initializes Core with dendrites, membrane, axon and optional parameters."""
 
@@ -21,13 +28,31 @@ class Core:
         self.refractory_period = refractory_period
         self.refractory_time_remaining = 0  
         self.mode = mode 
+        self.total_input = 0
 
     def step(self):
         """Performs a single operation cycle on the neuron's core."""
 
         # Accumulate all the dendrite signals
         total_input = sum(dendrite.step(mode=self.mode) for dendrite in self.dendrites)   
-        
+        self._update(total_input)
+
+    def step_left(self):
+        """
+        First half of a phased step: accumulates the dendrite signals without consuming them.
+        Run on all neurons before any step_right(), every neuron reads the outputs of the previous tick.
+        """
+        self.total_input = sum(dendrite.step(mode=self.mode, peek=True) for dendrite in self.dendrites)
+
+    def step_right(self):
+        """
+        Second half of a phased step: updates the membrane with the input gathered by step_left()
+        and replaces the output of the axon's synapses with the output of this tick.
+        """
+        self._update(self.total_input, phased=True)
+
+    def _update(self, total_input, phased=False):
+        """Updates the membrane, the refractory period and the axon with the accumulated input."""
         # Check if the neuron is in refractory period
         refractory = self.refractory_time_remaining > 0                     
         
@@ -42,4 +67,16 @@ class Core:
             self.refractory_time_remaining = max(0, self.refractory_time_remaining - 1)  
         
         # Provide the membrane potential and spike to the axon
-        self.axon.step(self.membrane)
+        self.axon.step(self.membrane, phased=phased)
+
+    def idle(self, ticks):
+        """Applies ticks operation cycles without any input at once (see Brain.advance)."""
+        for dendrite in self.dendrites:
+            dendrite.idle(ticks, mode=self.mode)
+
+        # the refractory period resets the membrane while it counts down, the rest of the ticks leak it
+        refractory_ticks = min(ticks, math.ceil(self.refractory_time_remaining))
+        self.membrane.idle(ticks, refractory_ticks)
+        self.refractory_time_remaining = max(0, self.refractory_time_remaining - ticks)
+
+        self.axon.idle(ticks)
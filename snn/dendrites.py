@@ -1,3 +1,9 @@
+import numpy as np
+
+from snn.buffers import RingBuffer
+from snn.neurotransmitters import NO_TRANSMITTER, registry
+
+
 class Dendrite:
     """
     This class represents a dendrite in a neuron.
@@ -12,12 +18,18 @@ class Dendrite:
         max_weight (float): The maximum synaptic weight.
         min_weight (float): The minimum synaptic weight.
         input_mediator (str): Represents the neuromediator input. Functions like a flag.
+        input_code (int): Registry code of input_mediator, used on the hot path.
         post_synapse (Synapse): Represents the dendritic synapse object. It will be set by core from axon's free synapses.
-        last_input_state (str): Stores the last input state (input_mediator, weight).
-        history_of_inputs (list): Stores the history of inputs for learning. It's a list of tuples (input_mediator, weight).
+        last_input_state (tuple): Stores the last input state (input_code, weight).
+        history_of_inputs (RingBuffer): Stores the recent history of inputs for learning, as (input_code, weight) tuples.
+            Only the last history_capacity inputs are kept.
     """
 
-    def __init__(self, weight=10):
+    __slots__ = ('weight', 'max_weight', 'min_weight', 'input_code', 'post_synapse', 'last_input_state', 'history_of_inputs')
+
+    HISTORY_DTYPE = np.dtype([('code', np.uint8), ('weight', np.float64)])
+
+    def __init__(self, weight=10, history_capacity=1000):
         """
         Initializes the Dendrite with a given weight.
 
@@ -25,14 +37,25 @@ class Dendrite:
         ----------
         weight : float, optional
             The synaptic weight. By default, it is 10.
+        history_capacity : int, optional
+            The number of inputs kept in history_of_inputs. By default, it is 1000.
         """
         self.weight = weight
         self.max_weight = 50
         self.min_weight = -50
-        self.input_mediator = ""
+        self.input_code = NO_TRANSMITTER
         self.post_synapse = None
         self.last_input_state = None
-        self.history_of_inputs = []
+        self.history_of_inputs = RingBuffer(history_capacity, self.HISTORY_DTYPE)
+
+    @property
+    def input_mediator(self):
+        """The neuromediator input (empty string if no input)."""
+        return registry.name(self.input_code)
+
+    @input_mediator.setter
+    def input_mediator(self, value):
+        self.input_code = registry.code(value)
 
     def connect(self, synapse):
         """
@@ -56,7 +79,7 @@ class Dendrite:
         """
         self.weight = new_weight
 
-    def step(self, mode="default"):
+    def step(self, mode="default", peek=False):
         """
         Processes one step in the dendrite.
 
@@ -64,17 +87,37 @@ class Dendrite:
         ----------
         mode : str, optional
             The mode of operation. Default is "default".
+        peek : bool, optional
+            Read the synapse without consuming its transmitter (phased step). Default is False.
         """
         if self.post_synapse:
-            self.input_mediator = self.post_synapse.receive()
+            self.input_code = self.post_synapse.peek_code() if peek else self.post_synapse.receive_code()
 
         if mode == "cycle-train":
-            self.last_input_state = (self.input_mediator, self.weight)
+            self.last_input_state = (self.input_code, self.weight)
         elif mode == "associative-train":
-            self.history_of_inputs.append((self.input_mediator, self.weight))
+            self.history_of_inputs.append((self.input_code, self.weight))
 
-        if self.input_mediator != "":
-            self.input_mediator = ""
+        if self.input_code != NO_TRANSMITTER:
+            self.input_code = NO_TRANSMITTER
             return self.weight
         else:
             return 0
+
+    def idle(self, ticks, mode="default"):
+        """
+        Processes ticks steps without input at once.
+
+        Parameters
+        ----------
+        ticks : int
+            The number of steps.
+        mode : str, optional
+            The mode of operation. Default is "default".
+        """
+        self.input_code = NO_TRANSMITTER
+        if mode == "cycle-train":
+            self.last_input_state = (NO_TRANSMITTER, self.weight)
+        elif mode == "associative-train":
+            for _ in range(min(ticks, self.history_of_inputs.capacity)):
+                self.history_of_inputs.append((NO_TRANSMITTER, self.weight))
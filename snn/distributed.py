@@ -0,0 +1,361 @@
+import multiprocessing
+import socket
+import struct
+import time
+from collections import deque
+
+import numpy as np
+
+from snn.checkpoints import dumps, engine_arrays, from_arrays, loads
+from snn.connectivity import segment_sum
+from snn.engines import _Stage
+from snn.neurotransmitters import NO_TRANSMITTER
+from snn.parallel import _partition
+
+
+# message kinds, every message is a (payload length, kind) header followed by the payload
+SETUP, STEP, TRAIN, STATE, STOP = range(5)
+_HEADER = struct.Struct('!IB')
+_ERROR = struct.Struct('!d')
+
+
+class _Connection:
+    """A TCP connection that sends and receives framed messages."""
+
+    def __init__(self, sock):
+        self.sock = sock
+        self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    def send(self, kind, payload=b''):
+        self.sock.sendall(_HEADER.pack(len(payload), kind) + payload)
+
+    def _read(self, size):
+        data = bytearray()
+        while len(data) < size:
+            chunk = self.sock.recv(size - len(data))
+            if not chunk:
+                raise ConnectionError("The connection was closed.")
+            data += chunk
+        return bytes(data)
+
+    def receive(self):
+        size, kind = _HEADER.unpack(self._read(_HEADER.size))
+        return kind, self._read(size)
+
+    def close(self):
+        self.sock.close()
+
+
+def _pack(active):
+    """Packs a bool vector into a bitmap (8 sources per byte)."""
+    return np.packbits(active).tobytes()
+
+
+def _unpack(payload, size):
+    """Unpacks a bitmap of size sources."""
+    return np.unpackbits(np.frombuffer(payload, dtype=np.uint8), count=size).astype(bool)
+
+
+def _reads(engine, stage):
+    """Returns the synapses of the other nodes that the dendrites of a stage read, sorted."""
+    sources = np.unique(engine.connectivity.indices[stage.dendrites])
+    s = stage.synapses
+    return sources[(sources < engine.n_synapses) & ((sources < s.start) | (sources >= s.stop))].astype(np.int64)
+
+
+def _dump_setup(engine, stage, reads):
+    """Returns the SETUP payload: the engine, the stage of a node and the synapses it reads, in the checkpoint format."""
+    meta, arrays = engine_arrays(engine)
+    meta['stage'] = dict(neurons=[stage.neurons.start, stage.neurons.stop],
+                         dendrites=[stage.dendrites.start, stage.dendrites.stop],
+                         synapses=[stage.synapses.start, stage.synapses.stop])
+    arrays['stage.consumed'] = stage.consumed
+    arrays['stage.reads'] = reads
+    if stage.primary is not None:
+        arrays['stage.primary'] = stage.primary
+    return dumps(arrays, meta)
+
+
+def _load_setup(payload):
+    """Returns the engine, the stage and the read synapses of a SETUP payload."""
+    meta, arrays = loads(payload)
+    stage = meta['stage']
+    return (from_arrays(meta, arrays), _Stage(slice(*stage['neurons']), slice(*stage['dendrites']), slice(*stage['synapses']),
+                                              arrays.get('stage.primary'), arrays['stage.consumed']), arrays['stage.reads'])
+
+
+def serve(host='127.0.0.1', port=0, ready=None):
+    """
+    Runs one node: waits for the coordinator, then simulates its partition until it is stopped.
+
+    The node receives its engine, the neurons it owns and the synapses of other nodes it reads in the
+    SETUP message. On every STEP it gathers the signals of its own synapses from its last tick and the
+    signals of the read synapses and the sensors from the bitmaps of the coordinator, updates its neurons
+    and answers with the bitmap of its synapses. TRAIN only trains the owned neurons of the last stage.
+
+    Trust boundary: the messages carry data only (checkpoint-format JSON and raw arrays, a float error,
+    bitmaps), nothing is unpickled, so a message can't run code on the node. The connection is not
+    authenticated though: whoever reaches the port first becomes the coordinator and can replace the
+    network, drive it and read its state. Listen on localhost or on a private network that only the
+    coordinator can reach.
+
+    Args:
+        host (str): The interface to listen on.
+        port (int): The port to listen on, 0 picks a free one.
+        ready (Connection, optional): A pipe end that receives the listening port.
+    """
+    with socket.create_server((host, port)) as server:
+        if ready is not None:
+            ready.send(server.getsockname()[1])
+        sock, _ = server.accept()
+    connection = _Connection(sock)
+    try:
+        engine = stage = None
+        while True:
+            kind, payload = connection.receive()
+            if kind == SETUP:
+                engine, stage, reads = _load_setup(payload)
+                n_synapses, null_source = engine.n_synapses, engine.null_source
+                n, s, last = stage.neurons, stage.synapses, engine.stages[-1]
+                owned = slice(max(n.start, last.start), min(n.stop, last.stop))  # empty without neurons of the last stage
+            elif kind == STEP:
+                active = np.zeros(null_source + 1, dtype=bool)
+                active[reads] = _unpack(payload[:(len(reads) + 7) // 8], len(reads))
+                active[n_synapses:null_source] = _unpack(payload[(len(reads) + 7) // 8:], engine.n_sensors)
+                signal = np.where(active, engine.transmitter, NO_TRANSMITTER)
+                signal[s] = engine.signal[s]  # the own synapses are read from the last local tick
+                engine.signal = signal.astype(np.uint8)
+                engine.tick += 1
+                engine._step_stage(stage, 0)
+                connection.send(STEP, _pack(engine.signal[s] != NO_TRANSMITTER))
+            elif kind == TRAIN:
+                engine.learn(_ERROR.unpack(payload)[0], neurons=owned)
+            elif kind == STATE:
+                n, d = stage.neurons, stage.dendrites
+                state = dict(v_m=engine.v_m[n], spike=engine.spike[n],
+                             refractory_time_remaining=engine.refractory_time_remaining[n],
+                             weight=engine.weight[d], last_input=engine.last_input[d],
+                             level=engine.level[s], signal=engine.signal[s])
+                state.update(zip(('synapse', 'ticks', 'code'), engine.delayed()[1:]))
+                connection.send(STATE, dumps(state))
+            elif kind == STOP:
+                break
+    finally:
+        connection.close()
+
+
+class LocalCluster:
+    """
+    Node processes on localhost, to run a DistributedNetwork on one machine (e.g. in tests).
+
+    Attributes:
+        addresses (list): The (host, port) address of each node.
+        processes (list): The node processes.
+    """
+
+    def __init__(self, nodes=2, context=None):
+        """Starts nodes node processes listening on free localhost ports."""
+        context = multiprocessing.get_context(context)
+        self.addresses = []
+        self.processes = []
+        for _ in range(nodes):
+            receiver, sender = context.Pipe(duplex=False)
+            process = context.Process(target=serve, kwargs=dict(ready=sender), daemon=True)
+            process.start()
+            self.addresses.append(('127.0.0.1', receiver.recv()))
+            self.processes.append(process)
+
+    def close(self):
+        """Waits for the nodes to stop (after DistributedNetwork.close) and kills the ones that don't."""
+        for process in self.processes:
+            process.join(5)
+            if process.is_alive():
+                process.terminate()
+        self.processes = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class DistributedNetwork:
+    """
+    A compiled network whose neurons are split across nodes that exchange spike bitmaps over TCP.
+
+    It runs the phased step (see Brain(phased=True)). The coordinator (this object) steps the sensors
+    and the motors and relays the signals: on every tick it sends each node the bitmap of the synapses of
+    other nodes that its dendrites read and of the sensors, one bit per source, and each node answers
+    with the bitmap of its own synapses.
+
+    With lookahead=1 the result is exactly the phased step. A larger lookahead relaxes the synchrony:
+    connections between nodes (and the motors) get a delay of lookahead ticks instead of 1, like
+    an axonal delay, so the coordinator only needs the answers of tick t - lookahead + 1 after sending
+    tick t and the network latency of lookahead - 1 ticks is hidden behind the computation.
+    Connections inside a node and from the sensors keep a delay of 1.
+
+    It offers the same input(), step(), train() and sync() calls as CompiledNetwork.
+
+    Attributes:
+        network (CompiledNetwork): The compiled network, its engine holds the sensors and motors.
+        engine (Engine): The engine of network.
+        stages (list): The part of the network simulated by each node.
+        reads (list): The synapses of the other nodes read by each node, their bits are sent to it on every step.
+        lookahead (int): The delay of the connections between nodes, in ticks.
+        ticks (int): The number of executed steps.
+        latency (float): Seconds spent waiting for the nodes, summed over the steps.
+    """
+
+    def __init__(self, network, addresses, lookahead=1):
+        """
+        Connects to the nodes and sends each one its partition.
+
+        Args:
+            network (CompiledNetwork): A network compiled with phased=True, without a batch axis.
+            addresses (list): The (host, port) address of each node, see serve() and LocalCluster.
+            lookahead (int): The delay of the connections between nodes, 1 for the exact phased step.
+        """
+        engine = network.engine
+        if not engine.phased:
+            raise ValueError("Only the phased step can be distributed, compile it with phased=True.")
+        if engine.batch is not None:
+            raise ValueError("A distributed network has no batch axis.")
+        if lookahead < 1:
+            raise ValueError("The lookahead is at least one tick.")
+        self.network = network
+        self.engine = engine
+        self.lookahead = int(lookahead)
+        self.stages = _partition(engine, len(addresses))
+        self.reads = [_reads(engine, stage) for stage in self.stages]
+        self.connections = [_Connection(socket.create_connection(address)) for address in addresses]
+        for connection, stage, reads in zip(self.connections, self.stages, self.reads):
+            connection.send(SETUP, _dump_setup(engine, stage, reads))
+
+        self._synapses = engine.signal[:engine.n_synapses] != NO_TRANSMITTER  # latest merged synapse bitmap
+        self._pending = 0    # sent steps that were not answered yet
+        self._answers = deque()
+        self.ticks = 0
+        self.latency = 0.0
+        self.bytes_sent = 0      # traffic of the steps, in both directions
+        self.bytes_received = 0
+
+    def input(self, input_data):
+        """Sets input for the sensors."""
+        self.engine.set_input(input_data)
+
+    def _answer(self):
+        """Returns the merged synapse bitmap of the oldest step whose answer was not used yet."""
+        if self._answers:
+            return self._answers.popleft()
+        return self._receive()
+
+    def _receive(self):
+        """Receives the answers of the nodes to the oldest step that was not answered yet, merged in one bitmap."""
+        synapses = np.empty(self.engine.n_synapses, dtype=bool)
+        for connection, stage in zip(self.connections, self.stages):
+            kind, payload = connection.receive()
+            self.bytes_received += _HEADER.size + len(payload)
+            s = stage.synapses
+            synapses[s] = _unpack(payload, s.stop - s.start)
+        self._pending -= 1
+        return synapses
+
+    def step(self):
+        """
+        Executes one phased step of the whole network on the nodes.
+
+        Returns:
+            list: The output value of each motor.
+        """
+        engine = self.engine
+        engine.tick += 1
+        self.ticks += 1
+        synapses = self._synapses
+
+        # the motors read the latest answers, the nodes get the sensors of the last tick
+        received = synapses[engine.motor_source[engine.motor_source < engine.n_synapses]]
+        sensor_reads = engine.motor_source >= engine.n_synapses
+        active = np.zeros(len(engine.motor_source), dtype=bool)
+        active[~sensor_reads] = received
+        active[sensor_reads] = engine.signal[engine.motor_source[sensor_reads]] != NO_TRANSMITTER
+        engine.motor_output = segment_sum(engine.motor_neuron, active, engine.n_motors).astype(np.int64)
+        sensors = engine.signal[engine.n_synapses:engine.null_source] != NO_TRANSMITTER
+        engine._step_sensors()
+
+        start = time.perf_counter()
+        sensor_bits = _pack(sensors)
+        for connection, reads in zip(self.connections, self.reads):
+            payload = _pack(synapses[reads]) + sensor_bits
+            connection.send(STEP, payload)
+            self.bytes_sent += _HEADER.size + len(payload)
+        self._pending += 1
+        while self._pending + len(self._answers) >= self.lookahead:
+            self._synapses = self._answer()
+        self.latency += time.perf_counter() - start
+        return engine.motor_output.tolist()
+
+    def train(self, error):
+        """Applies simple cycle by cycle learning to the last stage, like ai.Brain.train."""
+        payload = _ERROR.pack(error)
+        for connection in self.connections:
+            connection.send(TRAIN, payload)
+
+    def sync(self):
+        """Collects the state of the nodes and writes it back into the original objects."""
+        engine = self.engine
+        while self._pending:
+            self._answers.append(self._receive())
+        engine._lines = [[] for _ in range(engine.max_delay)]
+        for connection, stage in zip(self.connections, self.stages):
+            connection.send(STATE)
+            kind, payload = connection.receive()
+            _, state = loads(payload)
+            n, d, s = stage.neurons, stage.dendrites, stage.synapses
+            for name, index in (("v_m", n), ("spike", n), ("refractory_time_remaining", n),
+                                ("weight", d), ("last_input", d), ("level", s), ("signal", s)):
+                getattr(engine, name)[index] = state[name]
+            engine.schedule(state["synapse"], state["ticks"], state["code"])
+        self.network.sync()
+
+    def communication(self):
+        """
+        Returns the step traffic of the coordinator, per executed step.
+
+        Returns:
+            dict: bytes_sent, bytes_received and bytes (both ways) per tick, and latency (seconds per tick).
+        """
+        ticks = max(1, self.ticks)
+        return dict(bytes_sent=self.bytes_sent / ticks, bytes_received=self.bytes_received / ticks,
+                    bytes=(self.bytes_sent + self.bytes_received) / ticks, latency=self.latency / ticks)
+
+    def close(self):
+        """Stops the nodes, after they answered the steps in flight."""
+        try:
+            while self._pending and self.connections:
+                self._receive()
+        except OSError:
+            pass
+        for connection in self.connections:
+            try:
+                connection.send(STOP)
+            except OSError:
+                pass
+            connection.close()
+        self.connections = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Runs a node of a DistributedNetwork.")
+    parser.add_argument('--host', default='127.0.0.1', help="Interface to listen on, see serve() before exposing a node.")
+    parser.add_argument('--port', type=int, default=5000)
+    arguments = parser.parse_args()
+    serve(arguments.host, arguments.port)
@@ -0,0 +1,927 @@
+import numpy as np
+
+from snn.connectivity import Connectivity, segment_sum
+from snn.membranes import fires_without_input
+from snn.neurotransmitters import NO_TRANSMITTER, SIMPLE_SIGNAL_MEDIATOR, registry
+
+
+MODES = ("default", "cycle-train", "associative-train")
+
+
+def _broadcast(value, size, dtype):
+    """Returns a fresh contiguous array of the given size filled from a scalar or a per-element sequence."""
+    if np.ndim(value) == 0:
+        return np.full(size, value, dtype=dtype)
+    array = np.array(value, dtype=dtype)
+    if array.shape != (size,):
+        raise ValueError(f"Expected {size} values, got shape {array.shape}.")
+    return array
+
+
+def _compact(value, size, dtype):
+    """Like _broadcast, but a parameter shared by all elements is stored once as a 0-d array."""
+    array = _broadcast(value, size, dtype)
+    if size and np.all(array == array[0]):
+        return np.array(array[0], dtype=dtype)
+    return array
+
+
+def round_array(x, digits):
+    """
+    Rounds like the built-in round(x, digits) but for whole arrays.
+
+    numpy rounds by scaling, which can land on the other side of a tie than Python's
+    correctly rounded round(). Values that are that close to a tie are recomputed
+    with the built-in, so the engine reproduces the per-object arithmetic exactly.
+    """
+    x = np.asarray(x, dtype=np.float64)
+    scale = 10.0 ** digits
+    scaled = x * scale
+    result = np.rint(scaled) / scale
+    near_tie = np.abs(np.abs(scaled - np.trunc(scaled)) - 0.5) < 1e-6
+    if near_tie.any():
+        # the side of the tie is decided on the exact product x * scale = product + error
+        value = x[near_tie]
+        product = scaled[near_tie]
+        low = np.floor(product)
+        tie = low + 0.5
+        if np.abs(product).max(initial=0) >= 2 ** 50 or digits < 0 or digits > 22:
+            result[near_tie] = [round(v, digits) for v in value.tolist()]
+            return result
+        side = (product - tie) + _product_error(value, scale, product)
+        even = np.where(np.fmod(low, 2) == 0, low, low + 1)
+        result[near_tie] = np.where(side > 0, low + 1, np.where(side < 0, low, even)) / scale
+    return result
+
+
+def _product_error(a, b, product):
+    """Returns the rounding error of the float product a * b (Dekker's two-product), so a * b == product + error exactly."""
+    split = 134217729.0  # 2**27 + 1
+    c = split * a
+    a_high = c - (c - a)
+    a_low = a - a_high
+    c = split * b
+    b_high = c - (c - b)
+    b_low = b - b_high
+    return ((a_high * b_high - product) + a_high * b_low + a_low * b_high) + a_low * b_low
+
+
+def _regenerate(level, max_level, rate, ticks=1):
+    """
+    Applies Synapse.regenerate to whole arrays of synapse levels, ticks times (a scalar or one count per synapse).
+
+    A full synapse stays full, so only synapses with a deficit are iterated and the loop ends as soon
+    as they are refilled; with the usual regenerate_rate=1 one iteration refills any deficit.
+    """
+    level = np.array(level, dtype=np.float64)
+    shape = level.shape
+    level = level.reshape(-1)
+    ticks = np.broadcast_to(ticks, shape).reshape(-1)
+    max_level = np.broadcast_to(max_level, shape).reshape(-1)
+    rate = np.broadcast_to(rate, shape).reshape(-1)
+    pending = np.flatnonzero((ticks > 0) & (level < max_level))
+    remaining = ticks[pending]
+    while len(pending):
+        amount = np.maximum(0.001, round_array(rate[pending] * (max_level[pending] - level[pending]), 3))
+        level[pending] = np.minimum(max_level[pending], round_array(level[pending] + amount, 3))
+        remaining = remaining - 1
+        keep = (remaining > 0) & (level[pending] < max_level[pending])
+        pending, remaining = pending[keep], remaining[keep]
+    return level.reshape(shape)
+
+
+class _Stage:
+    """Precomputed index ranges of one stage (layer) of the engine."""
+
+    def __init__(self, neurons, dendrites, synapses, primary, consumed):
+        self.neurons = neurons      # slice of neuron indices
+        self.dendrites = dendrites  # slice of dendrite indices (stored elements of the connectivity)
+        self.synapses = synapses    # slice of synapse indices
+        self.primary = primary      # first reader of each source in the stage, or None if no source is shared
+        self.consumed = consumed    # synapse sources consumed by the stage
+
+
+class Engine:
+    """
+    Population-level engine that keeps a whole network of neurons in contiguous NumPy arrays.
+
+    The engine reproduces the per-object semantics of Core, Dendrite, Membrane, Axon, Synapse,
+    SensorNeuron and MotorNeuron, but one step() call advances the whole population.
+    Neurons are grouped in stages (layers) which are processed in order, like ai.Brain processes
+    its layers, so a spike can travel through all stages within one tick. Neurons inside a stage
+    are updated together and must not read synapses of the same stage.
+
+    A phased engine runs the two-phase step of Brain(phased=True) instead: first every neuron and motor
+    gathers the signals of the previous tick, then every membrane and synapse is updated. A spike then
+    moves one stage per tick, all neurons are independent within a phase, so there is no stage order
+    and neurons may read any synapse, including their own (recurrent networks). Reads don't consume
+    the signal, every reader of a synapse receives it, and a synapse holds only the output of the last tick.
+
+    Signal sources are numbered in one index space shared by dendrites and motors:
+    synapses take [0, n_synapses), sensors take [n_synapses, n_synapses + n_sensors) and the last
+    index (null_source) is an unconnected source which never carries a signal.
+    Synapse sources are consumed by the first reader, exactly like Synapse.receive(); sensor sources are not.
+    Transmitters are carried as uint8 registry codes (see snn.neurotransmitters), NO_TRANSMITTER is no signal.
+
+    A synapse with a delay of d ticks releases its transmitter d - 1 ticks after its neuron fired, like
+    Synapse(delay=d). Released transmitters wait in a circular buffer of max(delay) slots, one per tick,
+    each holding the (position, code) arrays of the transmitters that arrive on that tick, so a delayed
+    spike costs two array elements and delivering a tick costs O(arriving spikes).
+
+    Dendrites are the stored elements of a sparse Connectivity matrix (neurons x sources), so the input
+    of a stage is one sparse mat-vec over the signal vector.
+
+    With a batch size the engine runs that many independent instances of the same network at once
+    (e.g. brains with different random weights). The parameters and the wiring are shared, while the
+    state arrays and the weights get a leading batch axis, so v_m has the shape [batch, n_neurons],
+    set_input() takes [batch, n_sensors] and step() returns [batch, n_motors].
+
+    Attributes:
+        stages (list): Slices of neuron indices, one per stage.
+        phased (bool): Whether step() is the two-phase step.
+        batch (int): Number of instances, or None for a single instance without a batch axis.
+        connectivity (Connectivity): Dendrites of all neurons as a CSR matrix.
+        v_m (ndarray): Membrane potential of each neuron.
+        spike (ndarray): Spike of each neuron on the last step.
+        refractory_time_remaining (ndarray): Time left in the refractory period of each neuron.
+        weight (ndarray): Weight of each dendrite (the values of the connectivity matrix).
+        last_input (ndarray): Code of the transmitter each dendrite received on its last cycle-train step.
+        level (ndarray): Neurotransmitter level of each synapse.
+        transmitter (ndarray): Code of the transmitter released by each source (synapses, sensors, null source).
+        delay (ndarray): Delay of each synapse in ticks, 1 delivers on the tick of the spike.
+        signal (ndarray): Code of the received transmitter of each source, NO_TRANSMITTER if there is none.
+        sensor_input (ndarray): Input value of each sensor.
+        motor_output (ndarray): Output value of each motor.
+    """
+
+    # weights and state that differ between instances of a batch
+    STATE = ("weight", "v_m", "spike", "refractory_time_remaining", "last_input",
+             "level", "sensor_input", "signal", "motor_output")
+
+    def __init__(self, stages, connectivity, synapse_neuron,
+                 max_weight=50, min_weight=-50,
+                 rest=0.0, threshold=20.0, reset_ratio=0.05, leakage=0.5,
+                 refractory_period=1.0, mode="default",
+                 initial_level=100, regenerate_rate=0.5, transmitter_type='simple-signal-mediator', delay=1,
+                 sensors=0, sensitivity=0.5, leak_rate=0.1, motors=(), phased=False, batch=None):
+        """
+        Creates a new Engine instance.
+
+        Args:
+            stages (list): Number of neurons in each stage. Neurons are numbered stage by stage.
+            connectivity (Connectivity): Dendrites as a matrix of neurons x sources with the weights as values.
+            synapse_neuron (sequence): Owner neuron of each synapse, in non-decreasing order.
+            max_weight, min_weight: Dendrite weight limits, a scalar or one value per dendrite.
+            rest, threshold, reset_ratio, leakage, refractory_period, mode: Neuron parameters,
+                a scalar or one value per neuron.
+            initial_level, regenerate_rate, transmitter_type, delay: Synapse parameters, a scalar or one value per synapse.
+            sensors (int): Number of sensors.
+            sensitivity, leak_rate: Sensor parameters, a scalar or one value per sensor.
+            motors (list): For each motor, the list of source indices it reads.
+            phased (bool): Use the two-phase step, in which all neurons read the signals of the previous tick.
+            batch (int, optional): Number of independent instances. Weights of the connectivity are copied
+                to every instance, unless it already holds one row of weights per instance.
+        """
+        self.batch = None if batch is None else int(batch)
+        if self.batch is not None and connectivity.data.ndim == 1:
+            connectivity = Connectivity(connectivity.indptr, connectivity.indices,
+                                        np.tile(connectivity.data, (self.batch, 1)), connectivity.n_sources)
+        if connectivity.data.shape[:-1] != self._shape(0)[:-1]:
+            raise ValueError("Connectivity weights need one row per instance of the batch.")
+
+        self.n_neurons = int(sum(stages))
+        self.stages = []
+        start = 0
+        for size in stages:
+            self.stages.append(slice(start, start + size))
+            start += size
+
+        self.connectivity = connectivity
+        self.synapse_neuron = np.array(synapse_neuron, dtype=np.intp)
+        self.n_dendrites = connectivity.nnz
+        self.n_synapses = len(self.synapse_neuron)
+        self.n_sensors = int(sensors)
+        self.null_source = self.n_synapses + self.n_sensors
+
+        if np.any(np.diff(self.synapse_neuron) < 0):
+            raise ValueError("Synapses must be ordered by their owner neuron.")
+        if connectivity.shape != (self.n_neurons, self.null_source + 1):
+            raise ValueError(f"Connectivity must be a {self.n_neurons} x {self.null_source + 1} matrix.")
+
+        # Neurons (Core + Membrane)
+        self.rest = _broadcast(rest, self.n_neurons, np.float64)
+        self.threshold = _broadcast(threshold, self.n_neurons, np.float64)
+        self.reset_ratio = _broadcast(reset_ratio, self.n_neurons, np.float64)
+        self.leakage = _broadcast(leakage, self.n_neurons, np.float64)
+        self.refractory_period = _broadcast(refractory_period, self.n_neurons, np.float64)
+        modes = [mode] * self.n_neurons if isinstance(mode, str) else list(mode)
+        self.mode = np.array([MODES.index(m) for m in modes], dtype=np.uint8)
+        self.v_m = np.broadcast_to(self.rest, self._shape(self.n_neurons)).copy()
+        self.spike = np.zeros(self._shape(self.n_neurons), dtype=bool)
+        self.refractory_time_remaining = np.zeros(self._shape(self.n_neurons), dtype=np.float64)
+
+        # Dendrites, limits shared by all dendrites are stored once
+        self.weight = connectivity.data
+        self.max_weight = _compact(max_weight, self.n_dendrites, np.float64)
+        self.min_weight = _compact(min_weight, self.n_dendrites, np.float64)
+        self.last_input = np.zeros(self._shape(self.n_dendrites), dtype=np.uint8)
+
+        # Synapses
+        self.max_level = _broadcast(initial_level, self.n_synapses, np.float64)
+        self.level = np.broadcast_to(self.max_level, self._shape(self.n_synapses)).copy()
+        self.regenerate_rate = _broadcast(regenerate_rate, self.n_synapses, np.float64)
+        self.delay = _broadcast(delay, self.n_synapses, np.int64)
+        if np.any(self.delay < 1):
+            raise ValueError("Synapse delays must be at least 1 tick.")
+        # delay lines: slot t % max_delay holds the transmitters arriving on tick t, as (signal position, code) arrays
+        self.max_delay = int(self.delay.max(initial=1))
+        self._lines = [[] for _ in range(self.max_delay)]
+
+        # Sensors
+        self.sensor_input = np.zeros(self._shape(self.n_sensors), dtype=np.float64)
+        self.sensitivity = _broadcast(sensitivity, self.n_sensors, np.float64)
+        self.leak_rate = _broadcast(leak_rate, self.n_sensors, np.float64)
+
+        # Sources: synapse received transmitters, sensor outputs and the null source
+        types = [transmitter_type] * self.n_synapses if isinstance(transmitter_type, str) else list(transmitter_type)
+        self.transmitter = np.array([registry.code(t) for t in types] + [SIMPLE_SIGNAL_MEDIATOR] * self.n_sensors
+                                    + [NO_TRANSMITTER], dtype=np.uint8)
+        self.signal = np.zeros(self._shape(self.null_source + 1), dtype=np.uint8)
+
+        # Motors
+        self.motor_neuron = np.array([i for i, sources in enumerate(motors) for _ in sources], dtype=np.intp)
+        self.motor_source = np.array([s for sources in motors for s in sources], dtype=np.intp)
+        self.n_motors = len(motors)
+        self.motor_output = np.zeros(self._shape(self.n_motors), dtype=np.int64)
+        self._motor_primary, self._motor_consumed = self._readers(self.motor_source)
+
+        self._plans = [self._plan(stage) for stage in self.stages]
+        self.phased = bool(phased)
+        # the phased step updates all neurons as one stage, reads are not exclusive and clear every synapse
+        self._phase = _Stage(slice(0, self.n_neurons), slice(0, self.n_dendrites), slice(0, self.n_synapses),
+                             None, np.arange(self.n_synapses))
+        self.tick = 0  # number of executed steps
+
+    def _shape(self, size):
+        """Returns the shape of a state array with size elements per instance."""
+        return (size,) if self.batch is None else (self.batch, size)
+
+    @classmethod
+    def stack(cls, engines):
+        """
+        Creates a batched engine from single-instance engines of the same network.
+
+        The engines must share the wiring and the parameters, only the weights and the state may differ.
+        Instance i of the new engine continues from the state of engines[i].
+
+        Args:
+            engines (list): Engines without a batch axis.
+
+        Returns:
+            Engine: An engine with batch=len(engines).
+        """
+        first = engines[0]
+        shared = ("rest", "threshold", "reset_ratio", "leakage", "refractory_period", "mode",
+                  "max_weight", "min_weight", "max_level", "regenerate_rate", "transmitter", "delay", "sensitivity", "leak_rate",
+                  "synapse_neuron", "motor_neuron", "motor_source")
+        for engine in engines:
+            if engine.batch is not None:
+                raise ValueError("Only engines without a batch axis can be stacked.")
+            if (engine.stages != first.stages or engine.n_sensors != first.n_sensors or engine.phased != first.phased
+                    or not np.array_equal(engine.connectivity.indptr, first.connectivity.indptr)
+                    or not np.array_equal(engine.connectivity.indices, first.connectivity.indices)
+                    or not all(np.array_equal(getattr(engine, name), getattr(first, name)) for name in shared)):
+                raise ValueError("All engines of a batch must have the same network and parameters.")
+
+        batched = cls(**first._arguments(np.stack([engine.weight for engine in engines])), batch=len(engines))
+        for name in Engine.STATE:
+            getattr(batched, name)[:] = [getattr(engine, name) for engine in engines]
+        batched.tick = max(engine.tick for engine in engines)
+        for i, engine in enumerate(engines):
+            _, synapse, ticks, code = engine.delayed()
+            batched.schedule(synapse, ticks, code, instance=i)
+        return batched
+
+    def _arguments(self, weight):
+        """Returns the constructor arguments that rebuild this network (without the batch size) with the given weights."""
+        return dict(stages=[stage.stop - stage.start for stage in self.stages],
+                    connectivity=Connectivity(self.connectivity.indptr, self.connectivity.indices,
+                                              weight, self.connectivity.n_sources),
+                    synapse_neuron=self.synapse_neuron,
+                    max_weight=self.max_weight, min_weight=self.min_weight,
+                    rest=self.rest, threshold=self.threshold, reset_ratio=self.reset_ratio,
+                    leakage=self.leakage, refractory_period=self.refractory_period,
+                    mode=[MODES[m] for m in self.mode],
+                    initial_level=self.max_level, regenerate_rate=self.regenerate_rate,
+                    transmitter_type=[registry.name(t) for t in self.transmitter[:self.n_synapses]],
+                    delay=self.delay,
+                    sensors=self.n_sensors, sensitivity=self.sensitivity, leak_rate=self.leak_rate,
+                    motors=[self.motor_source[self.motor_neuron == i] for i in range(self.n_motors)],
+                    phased=self.phased)
+
+    def unstack(self, engines):
+        """Writes the weights and the state of every instance back into the single-instance engines it was stacked from."""
+        instance, synapse, ticks, code = self.delayed()
+        for i, engine in enumerate(engines):
+            for name in Engine.STATE:
+                getattr(engine, name)[:] = getattr(self, name)[i]
+            engine.tick = self.tick
+            engine._lines = [[] for _ in range(engine.max_delay)]
+            mine = instance == i
+            engine.schedule(synapse[mine], ticks[mine], code[mine])
+            engine.refresh()
+
+    def delayed(self):
+        """
+        Returns the transmitters waiting in the delay lines.
+
+        Returns:
+            tuple: (instance, synapse, ticks, code) arrays, ticks is the number of steps until the transmitter
+                arrives (1 on the next step). instance is 0 without a batch axis.
+        """
+        width = self.null_source + 1
+        parts = [(np.concatenate([p for p, _ in slot]), np.concatenate([c for _, c in slot]),
+                  (j - self.tick - 1) % self.max_delay + 1)
+                 for j, slot in enumerate(self._lines) if slot]
+        if not parts:
+            empty = np.zeros(0, dtype=np.int64)
+            return empty, empty, empty, np.zeros(0, dtype=np.uint8)
+        positions = np.concatenate([p for p, _, _ in parts])
+        codes = np.concatenate([c for _, c, _ in parts])
+        ticks = np.concatenate([np.full(len(p), t, dtype=np.int64) for p, _, t in parts])
+        return positions // width, positions % width, ticks, codes
+
+    def schedule(self, synapse, ticks, code, instance=0):
+        """
+        Puts transmitters into the delay lines, to arrive at their synapses in ticks steps.
+
+        Args:
+            synapse (sequence): The synapse of each transmitter.
+            ticks (sequence): Steps until each transmitter arrives, from 1 (the next step) to max_delay - 1.
+            code (sequence): The code of each transmitter, NO_TRANSMITTER for a depleted release.
+            instance (int or sequence): The instance of each transmitter in a batched engine.
+        """
+        synapse = np.asarray(synapse, dtype=np.int64)
+        ticks = np.asarray(ticks, dtype=np.int64)
+        code = np.asarray(code, dtype=np.uint8)
+        if np.any((ticks < 1) | (ticks >= self.max_delay)):
+            raise ValueError("Transmitters can only be scheduled 1 to max_delay - 1 steps ahead.")
+        positions = np.asarray(instance, dtype=np.int64) * (self.null_source + 1) + synapse
+        positions = np.broadcast_to(positions, synapse.shape)
+        for t in np.unique(ticks):
+            due = ticks == t
+            self._lines[(self.tick + t) % self.max_delay].append((positions[due], code[due]))
+
+    def _readers(self, sources):
+        """Returns the first-reader mask (None when no source is read twice) and the consumed synapses of a group of readers."""
+        synapse_reads = sources < self.n_synapses
+        consumed = np.unique(sources[synapse_reads])
+        primary = np.ones(len(sources), dtype=bool)
+        if len(consumed) != synapse_reads.sum():
+            first = np.unique(sources, return_index=True)[1]
+            primary[:] = False
+            primary[first] = True
+            primary |= ~synapse_reads
+            return primary, consumed
+        return None, consumed
+
+    def _plan(self, neurons):
+        """Precomputes dendrite and synapse ranges of one stage."""
+        dendrites = self.connectivity.elements(neurons.start, neurons.stop)
+        s0, s1 = np.searchsorted(self.synapse_neuron, [neurons.start, neurons.stop])
+        primary, consumed = self._readers(self.connectivity.indices[dendrites])
+        return _Stage(neurons, dendrites, slice(int(s0), int(s1)), primary, consumed)
+
+    @property
+    def dendrite_source(self):
+        """Returns the source index read by each dendrite."""
+        return self.connectivity.indices
+
+    @property
+    def dendrite_neuron(self):
+        """Returns the owner neuron of each dendrite."""
+        return self.connectivity.rows()
+
+    def set_input(self, values):
+        """
+        Adds input values to the sensors, like SensorNeuron.set_input does for each sensor.
+
+        Args:
+            values (sequence): One input value per sensor, with a leading batch axis for a batched engine.
+        """
+        values = np.asarray(values, dtype=np.float64)
+        self.sensor_input = np.minimum(round_array(self.sensor_input + values, 3), 1)
+
+    def _step_sensors(self):
+        """Executes a step of all sensors (SensorNeuron.step)."""
+        value = self.sensor_input
+        fired = value > self.sensitivity
+        leaked = np.maximum(round_array(value - self.leak_rate, 3), 0)
+        self.sensor_input = np.where(fired, 0.0, np.where(value > 0, leaked, value))
+        self.signal[..., self.n_synapses:self.null_source] = np.where(fired, self.transmitter[self.n_synapses:self.null_source], NO_TRANSMITTER)
+
+    def _step_stage(self, stage, index):
+        """Executes a step of all neurons of one stage (Core.step)."""
+        n, d, s = stage.neurons, stage.dendrites, stage.synapses
+
+        # Dendrites - one sparse mat-vec over the signals, the first reader of a synapse consumes it
+        total_input = self._dendrite_input(stage)
+        cycle_train = self.mode[n] == MODES.index("cycle-train")
+        if cycle_train.any():
+            received = self.signal[..., self.connectivity.indices[d]]
+            if stage.primary is not None:
+                received *= stage.primary
+            cycle_train = cycle_train[self.connectivity.rows(n.start, n.stop)]
+            self.last_input[..., d] = np.where(cycle_train, received, self.last_input[..., d])
+        self.signal[..., stage.consumed] = NO_TRANSMITTER
+
+        spike = self._update_membranes(n, total_input)
+        self._update_synapses(s, spike[..., self.synapse_neuron[s] - n.start])
+        self._deliver(s)
+
+    def _dendrite_input(self, stage):
+        """Returns the sum of the active weights of each neuron of the stage."""
+        n = stage.neurons
+        return self.connectivity.matvec(self.signal != NO_TRANSMITTER, n.start, n.stop, mask=stage.primary)
+
+    def _update_membranes(self, n, total_input):
+        """Updates the membranes and refractory counters of the neurons n (a slice or an index array) and returns their spikes."""
+        refractory = self.refractory_time_remaining[..., n] > 0
+        rest = self.rest[n]
+        threshold = self.threshold[n]
+        v_m = self.v_m[..., n] + total_input
+        spike = ~refractory & (v_m >= threshold)
+        reset = rest + (self.reset_ratio[n] * (threshold - rest))
+        leaked = round_array(v_m - ((v_m - rest) / 100 * self.leakage[n]), 6)
+        self.v_m[..., n] = np.where(refractory | spike, reset, leaked)
+        self.spike[..., n] = spike
+        self.refractory_time_remaining[..., n] = np.where(
+            spike, self.refractory_period[n], np.maximum(0, self.refractory_time_remaining[..., n] - 1))
+        return spike
+
+    def _update_synapses(self, s, fired):
+        """Transmits from the synapses s (a slice or an index array) whose neuron fired, then regenerates them (Axon.step)."""
+        level = self.level[..., s]
+        released = fired & (level >= 1)
+        level = np.where(released, level - 1, level)
+        self._transmit(s, fired, released)
+        self.level[..., s] = _regenerate(level, self.max_level[s], self.regenerate_rate[s])
+
+    def _transmit(self, s, fired, released):
+        """Writes the transmitters of the synapses s whose neuron fired into the signals, or into the delay lines."""
+        code = np.where(released, self.transmitter[s], NO_TRANSMITTER)
+        if self.max_delay == 1:
+            self.signal[..., s] = np.where(fired, code, self.signal[..., s])
+            return
+        delay = self.delay[s]
+        self.signal[..., s] = np.where(fired & (delay == 1), code, self.signal[..., s])
+        later = np.nonzero(fired & (delay > 1))
+        if len(later[-1]):
+            synapse = np.arange(self.n_synapses)[s][later[-1]]
+            instance = later[0] if self.batch is not None else 0
+            self.schedule(synapse, self.delay[synapse] - 1, code[later], instance)
+
+    def _deliver(self, s):
+        """
+        Writes the delayed transmitters that arrive on this tick at the synapses s (a slice) into the signals.
+
+        Returns:
+            ndarray: The synapses that received a transmitter.
+        """
+        slot = self.tick % self.max_delay
+        if not self._lines[slot]:
+            return np.zeros(0, dtype=np.int64)
+        positions = np.concatenate([p for p, _ in self._lines[slot]])
+        codes = np.concatenate([c for _, c in self._lines[slot]])
+        synapse = positions % (self.null_source + 1)
+        inside = (synapse >= s.start) & (synapse < s.stop)
+        self.signal.reshape(-1)[positions[inside]] = codes[inside]
+        self._lines[slot] = [(positions[~inside], codes[~inside])] if not inside.all() else []
+        return synapse[inside]
+
+    def _step_motors(self):
+        """Executes a step of all motors (MotorNeuron.step)."""
+        received = self.signal[..., self.motor_source] != NO_TRANSMITTER
+        if self._motor_primary is not None:
+            received &= self._motor_primary
+        self.signal[..., self._motor_consumed] = NO_TRANSMITTER
+        self.motor_output = segment_sum(self.motor_neuron, received, self.n_motors).astype(np.int64)
+
+    def step(self):
+        """
+        Executes one step of the whole population: sensors, every stage in order, then motors.
+        A phased engine gathers the signals of the previous tick for all neurons and motors first,
+        then updates all neurons and sensors.
+
+        Returns:
+            ndarray: The output value of each motor (of each instance).
+        """
+        self.tick += 1
+        if self.phased:
+            return self._step_phased()
+        self._step_sensors()
+        for index, stage in enumerate(self._plans):
+            self._step_stage(stage, index)
+        self._step_motors()
+        return self.motor_output
+
+    def _step_phased(self):
+        """Executes one two-phase step, see Brain.step with phased=True."""
+        # the motors and the dendrites read the signals of the previous tick, sensors are stepped after
+        # the neurons read them, so every source still holds its previous output during the gathering
+        received = self.signal[..., self.motor_source] != NO_TRANSMITTER
+        self.motor_output = segment_sum(self.motor_neuron, received, self.n_motors).astype(np.int64)
+        self._step_stage(self._phase, len(self._plans))
+        self._step_sensors()
+        return self.motor_output
+
+    def settle(self):
+        """Brings all lazily updated state up to date. The dense engine is always up to date."""
+        pass
+
+    def refresh(self):
+        """Rebuilds derived bookkeeping after the state arrays were written directly. The dense engine has none."""
+        pass
+
+    def learn(self, error, neurons=None):
+        """
+        Applies Neuron.simple_cycle_by_cycle_learning to the given neurons.
+
+        Args:
+            error (float or sequence): Positive errors make active connections stronger, negative weaker,
+                zero does nothing. A batched engine also takes one error per instance.
+            neurons (slice or sequence, optional): Neurons to train. All neurons by default.
+        """
+        error = np.asarray(error, dtype=np.float64)
+        if not error.any():
+            return
+        active = self.last_input != NO_TRANSMITTER
+        if error.ndim:
+            active &= (error != 0)[..., None]
+        if neurons is not None:
+            selected = np.zeros(self.n_neurons, dtype=bool)
+            selected[neurons] = True
+            active &= np.repeat(selected, np.diff(self.connectivity.indptr))
+        max_weight = np.broadcast_to(self.max_weight, active.shape)[active]
+        min_weight = np.broadcast_to(self.min_weight, active.shape)[active]
+        error = np.broadcast_to(error[..., None] if error.ndim else error, active.shape)[active]
+        self.weight[active] = self._apply_error(self.weight[active], error, max_weight, min_weight)
+
+    def _apply_error(self, weight, error, max_weight, min_weight):
+        """Returns the weights after adding the errors, rounded to 3 decimals and limited to [min_weight, max_weight]."""
+        return np.maximum(np.minimum(round_array(weight + error, 3), max_weight), min_weight)
+
+
+def _ranges(starts, counts):
+    """Returns the concatenation of the index ranges starts[i]:starts[i]+counts[i]."""
+    total = int(counts.sum())
+    offsets = np.repeat(starts - np.cumsum(counts) + counts, counts)
+    return offsets + np.arange(total)
+
+
+class EventEngine(Engine):
+    """
+    Event-driven variant of the Engine.
+
+    A step only processes the neurons that received a transmitter on that tick (plus neurons that
+    can fire without any input, see membranes.fires_without_input). A neuron that was skipped catches up
+    when it is touched again: the membrane leak and the refractory countdown of the silent ticks are
+    applied in closed form, and synapse regeneration is applied lazily when the neuron fires again.
+    The cost of a step therefore scales with the spike traffic instead of the network size.
+
+    The closed-form leak rounds the membrane potential once instead of on every skipped tick,
+    so it can differ from Membrane.step in the sixth decimal. Arrays such as v_m and level are
+    only current for touched neurons; call settle() before reading the whole population.
+    """
+
+    def __init__(self, *args, **kwargs):
+        """Creates a new EventEngine instance, see Engine for the arguments."""
+        super().__init__(*args, **kwargs)
+        if self.batch is not None:
+            raise ValueError("EventEngine follows the spikes of a single instance, use an Engine for batches.")
+        if self.phased:
+            raise ValueError("EventEngine has no phased step, use an Engine.")
+        sources = self.connectivity.indices
+        order = np.argsort(sources, kind='stable')
+        # dendrites reading each source, in dendrite order (a CSC index of the connectivity)
+        self._reader_elements = order.astype(np.int64)
+        self._reader_ptr = np.zeros(self.null_source + 2, dtype=np.int64)
+        np.cumsum(np.bincount(sources, minlength=self.null_source + 1), out=self._reader_ptr[1:])
+        self._has_readers = np.diff(self._reader_ptr) > 0
+        self._has_readers[self.motor_source] = True
+        self._synapse_ptr = np.searchsorted(self.synapse_neuron, np.arange(self.n_neurons + 1))
+
+        self.refresh()
+
+    def refresh(self):
+        """Rebuilds the event bookkeeping from the state arrays, after they were written directly."""
+        self._autonomous = np.flatnonzero(fires_without_input(self.rest, self.threshold, self.reset_ratio, self.leakage))
+        self._pending = np.flatnonzero(self.v_m >= self.threshold)
+        self._neuron_tick = np.full(self.n_neurons, self.tick, dtype=np.int64)
+        self._synapse_tick = np.full(self.n_synapses, self.tick, dtype=np.int64)
+        self._active = np.flatnonzero((self.signal[:self.n_synapses] != NO_TRANSMITTER) & self._has_readers[:self.n_synapses])
+        self._spiked = np.flatnonzero(self.spike)
+        self._hits = [stage.dendrites.start + np.flatnonzero(self.last_input[stage.dendrites]) for stage in self._plans]
+
+    def _idle(self, neurons, ticks):
+        """Applies ticks silent steps (no input) to the neurons in closed form."""
+        r = self.refractory_time_remaining[neurons]
+        rest = self.rest[neurons]
+        refractory_ticks = np.minimum(ticks, np.ceil(r))
+        reset = rest + (self.reset_ratio[neurons] * (self.threshold[neurons] - rest))
+        v_m = np.where(refractory_ticks > 0, reset, self.v_m[neurons])
+        leak_ticks = ticks - refractory_ticks
+        leakage = self.leakage[neurons]
+        one_tick = round_array(v_m - ((v_m - rest) / 100 * leakage), 6)
+        many_ticks = round_array(rest + (v_m - rest) * (1 - leakage / 100) ** leak_ticks, 6)
+        self.v_m[neurons] = np.where(leak_ticks == 1, one_tick, np.where(leak_ticks > 1, many_ticks, v_m))
+        self.refractory_time_remaining[neurons] = np.maximum(0, r - ticks)
+
+    def _catch_up(self, neurons, tick):
+        """Brings the neurons from their last processed tick up to tick (excluded)."""
+        skipped = tick - 1 - self._neuron_tick[neurons]
+        idle = skipped > 0
+        if idle.any():
+            self._idle(neurons[idle], skipped[idle])
+        self._neuron_tick[neurons] = tick - 1
+
+    def _settle_synapses(self, synapses, tick):
+        """Applies the pending regeneration of the synapses up to tick (included)."""
+        ticks = tick - self._synapse_tick[synapses]
+        self.level[synapses] = _regenerate(self.level[synapses], self.max_level[synapses], self.regenerate_rate[synapses], ticks)
+        self._synapse_tick[synapses] = tick
+
+    def _step_stage(self, stage, index):
+        """Executes a step of the neurons of one stage that received a transmitter."""
+        n, d = stage.neurons, stage.dendrites
+
+        # delayed transmitters arriving at the synapses of the stage, the stage doesn't read them on this tick
+        arrived = self._deliver(stage.synapses)
+        if len(arrived):
+            arrived = arrived[(self.signal[arrived] != NO_TRANSMITTER) & self._has_readers[arrived]]
+            self._active = np.union1d(self._active, arrived)
+
+        # Dendrites reached by the active sources
+        active = self._active[self.signal[self._active] != NO_TRANSMITTER]
+        starts = self._reader_ptr[active]
+        counts = self._reader_ptr[active + 1] - starts
+        positions = _ranges(starts, counts)
+        elements = self._reader_elements[positions]
+        sources = np.repeat(active, counts)
+        inside = (elements >= d.start) & (elements < d.stop)
+        elements, sources = elements[inside], sources[inside]
+
+        # the first reader of a synapse consumes it
+        synapse_reads = sources < self.n_synapses
+        first = np.zeros(len(sources), dtype=bool)
+        first[np.unique(sources, return_index=True)[1]] = True
+        keep = first | ~synapse_reads
+        order = np.argsort(elements[keep])
+        hits = elements[keep][order]
+        received = self.signal[sources[keep][order]]
+        self.signal[np.unique(sources[synapse_reads])] = NO_TRANSMITTER
+
+        owners = np.searchsorted(self.connectivity.indptr, hits, side='right') - 1
+        cycle_train = self.mode[owners] == MODES.index("cycle-train")
+        self.last_input[self._hits[index]] = NO_TRANSMITTER
+        self.last_input[hits[cycle_train]] = received[cycle_train]
+        self._hits[index] = hits[cycle_train]
+
+        # Neurons touched on this tick
+        extra = np.concatenate([self._autonomous, self._pending])
+        extra = extra[(extra >= n.start) & (extra < n.stop)]
+        touched = np.union1d(owners, extra)
+        if not len(touched):
+            return np.zeros(0, dtype=np.intp)
+        self._catch_up(touched, self.tick)
+        total_input = np.bincount(np.searchsorted(touched, owners), weights=self.weight[hits], minlength=len(touched))
+        spike = self._update_membranes(touched, total_input)
+        self._neuron_tick[touched] = self.tick
+
+        # Axons of the neurons that fired
+        fired = touched[spike]
+        if len(fired):
+            synapses = _ranges(self._synapse_ptr[fired], self._synapse_ptr[fired + 1] - self._synapse_ptr[fired])
+            self._settle_synapses(synapses, self.tick - 1)
+            self._update_synapses(synapses, np.ones(len(synapses), dtype=bool))
+            self._synapse_tick[synapses] = self.tick
+            released = synapses[(self.signal[synapses] != NO_TRANSMITTER) & self._has_readers[synapses]]
+            self._active = np.union1d(self._active, released)
+        return fired
+
+    def step(self):
+        """
+        Executes one event-driven step: sensors, the touched neurons of every stage in order, then motors.
+
+        Returns:
+            ndarray: The output value of each motor.
+        """
+        self.tick += 1
+        self.spike[self._spiked] = False
+        self._step_sensors()
+        sensors = self.n_synapses + np.flatnonzero(self.signal[self.n_synapses:self.null_source])
+        self._active = np.union1d(self._active[self._active < self.n_synapses], sensors[self._has_readers[sensors]])
+        spiked = [self._step_stage(stage, index) for index, stage in enumerate(self._plans)]
+        self._pending = np.zeros(0, dtype=np.intp)
+        self._spiked = np.concatenate(spiked)
+        self._step_motors()
+        self._active = self._active[self.signal[self._active] != NO_TRANSMITTER]
+        return self.motor_output
+
+    def settle(self):
+        """Applies the skipped silent ticks to every neuron and the pending regeneration to every synapse."""
+        everyone = np.arange(self.n_neurons)
+        self._catch_up(everyone, self.tick + 1)
+        self._settle_synapses(np.arange(self.n_synapses), self.tick)
+
+
+def _to_fixed(values, scale, dtype, name=None):
+    """
+    Converts values to integers in units of 1/scale.
+
+    State values are rounded to the grid. Parameters (with a name for the error message) must already be on it.
+    """
+    scaled = np.asarray(values, dtype=np.float64) * scale
+    fixed = np.rint(scaled)
+    if name is not None and not np.allclose(scaled, fixed, rtol=0, atol=1e-6):
+        raise ValueError(f"{name} must be a multiple of {1 / scale:g} in fixed-point mode.")
+    limits = np.iinfo(dtype)
+    if fixed.size and (fixed.min() < limits.min or fixed.max() > limits.max):
+        raise ValueError(f"Values don't fit in {np.dtype(dtype).name} at a scale of {scale}.")
+    return fixed.astype(dtype)
+
+
+def _divide(numerator, denominator):
+    """
+    Divides integer-valued arrays rounding to the nearest integer, returns the quotients and a mask of the exact ties.
+
+    Integer division is slow in NumPy, so the division is done in float64: integers below 2**53 convert
+    exactly and the quotient is correctly rounded, far too close to tell apart from a tie only if it exceeds 2**36.
+    """
+    quotient = numerator / denominator
+    nearest = np.rint(quotient)
+    return nearest, np.abs(quotient - nearest) == 0.5
+
+
+class FixedPointEngine(Engine):
+    """
+    Engine variant that keeps potentials, weights and neurotransmitter levels as scaled integers.
+
+    The object model rounds membrane potentials to 6 decimals and weights and levels to 3 decimals, so
+    they live on fixed grids: potentials are stored in micro-units and weights and levels in milli-units.
+    Sums, comparisons and leaks are then exact integer operations, which are deterministic across platforms.
+    Rounding ties (and sums that land exactly on the threshold) depend on the binary error of the floats,
+    so these few elements are recomputed with the float formulas to follow the object model.
+
+    Weights and levels are int32 arrays. Potentials are int64, an int32 in micro-units would overflow
+    below -2147 (strongly inhibited neurons reach that). Parameters (rest, threshold, reset potential,
+    weight limits, levels) must be on the grids, leakage and regenerate_rate multiples of 0.001;
+    weights are rounded to 3 decimals when they are loaded.
+    A synapse level in the object model is a float (rounded to 3 decimals), so a regeneration tie can
+    still round the other way there than in the exact integer level.
+
+    The dendrite sums are accumulated in int64 with np.add.reduceat over the CSR rows and the parameters
+    are integer arrays, so the step stays in integers except for the rounded divisions (see _divide).
+    On a 4000 neuron network with 20% and 5% sparse layers a step takes about 5.6-6.2 ms instead of
+    6.7-7.6 ms for Engine, a speedup of about 1.2x.
+
+    Attributes:
+        v_m (ndarray): Membrane potential of each neuron in micro-units.
+        weight (ndarray): Weight of each dendrite in milli-units.
+        level (ndarray): Neurotransmitter level of each synapse in milli-units.
+    """
+
+    V_SCALE = 10 ** 6  # units per 1 of membrane potential
+    W_SCALE = 10 ** 3  # units per 1 of weight and neurotransmitter level
+
+    def __init__(self, *args, **kwargs):
+        """Creates a new FixedPointEngine instance, see Engine for the arguments (given in float units)."""
+        super().__init__(*args, **kwargs)
+        W, V = self.W_SCALE, self.V_SCALE
+        self.connectivity = Connectivity(self.connectivity.indptr, self.connectivity.indices,
+                                         _to_fixed(self.weight, W, np.int32), self.connectivity.n_sources)
+        self.weight = self.connectivity.data
+        _to_fixed(self.max_weight, W, np.int32, "max_weight")
+        _to_fixed(self.min_weight, W, np.int32, "min_weight")
+
+        self._rest = _to_fixed(self.rest, V, np.int64, "rest")
+        self._threshold = _to_fixed(self.threshold, V, np.int64, "threshold")
+        self._reset = _to_fixed(self.rest + self.reset_ratio * (self.threshold - self.rest), V, np.int64, "reset potential")
+        self._leakage = _to_fixed(self.leakage, 1000, np.int64, "leakage")
+        self.v_m = _to_fixed(self.v_m, V, np.int64)
+
+        self._max_level = _to_fixed(self.max_level, W, np.int32, "initial_level").astype(np.int64)
+        self._rate = _to_fixed(self.regenerate_rate, 1000, np.int64, "regenerate_rate")
+        self.level = _to_fixed(self.level, W, np.int32)
+        self._stage = None  # stage being stepped and its signals before they were consumed
+
+    @classmethod
+    def from_engine(cls, engine):
+        """Returns a fixed-point copy of a float Engine, continuing from its state."""
+        fixed = cls(**engine._arguments(engine.weight.copy()), batch=engine.batch)
+        fixed.v_m[:] = _to_fixed(engine.v_m, cls.V_SCALE, np.int64)
+        fixed.level[:] = _to_fixed(engine.level, cls.W_SCALE, np.int32)
+        for name in ("spike", "refractory_time_remaining", "last_input", "sensor_input", "signal", "motor_output"):
+            getattr(fixed, name)[:] = getattr(engine, name)
+        fixed.tick = engine.tick
+        fixed._lines = [list(slot) for slot in engine._lines]
+        return fixed
+
+    def to_engine(self):
+        """Returns a float Engine with the same network and state."""
+        engine = Engine(**self._arguments(self.weight / self.W_SCALE), batch=self.batch)
+        engine.v_m[:] = self.v_m / self.V_SCALE
+        engine.level[:] = self.level / self.W_SCALE
+        for name in ("spike", "refractory_time_remaining", "last_input", "sensor_input", "signal", "motor_output"):
+            getattr(engine, name)[:] = getattr(self, name)
+        engine.tick = self.tick
+        engine._lines = [list(slot) for slot in self._lines]
+        return engine
+
+    def _step_stage(self, stage, index):
+        """Executes a step of all neurons of one stage, keeping the signals for the float recomputation of ties."""
+        self._stage = (stage, self.signal.copy())
+        super()._step_stage(stage, index)
+
+    def _dendrite_input(self, stage):
+        """Returns the sum of the active weights of each neuron of the stage in milli-units, accumulated in int64."""
+        n, d = stage.neurons, stage.dendrites
+        indptr = self.connectivity.indptr[n.start:n.stop + 1] - d.start
+        active = self.signal[..., self.connectivity.indices[d]] != NO_TRANSMITTER
+        if stage.primary is not None:
+            active &= stage.primary
+        products = np.where(active, self.weight[..., d], 0)
+        if products.shape[-1] == 0:
+            return np.zeros(products.shape[:-1] + (n.stop - n.start,), dtype=np.int64)
+        # reduceat sums the elements between consecutive offsets, an empty row gets the element at its offset instead of 0
+        sums = np.add.reduceat(products, np.minimum(indptr[:-1], products.shape[-1] - 1), axis=-1, dtype=np.int64)
+        return np.where(indptr[1:] > indptr[:-1], sums, 0)
+
+    def _update_membranes(self, n, total_input):
+        """Updates the membranes of the neurons n (a slice), total_input is the sum of the active weights in milli-units."""
+        refractory = self.refractory_time_remaining[..., n] > 0
+        rest = self._rest[n]
+        threshold = self._threshold[n]
+        v_in = self.v_m[..., n]
+        v_m = v_in + total_input * (self.V_SCALE // self.W_SCALE)
+        spike = ~refractory & (v_m >= threshold)
+        # round(v - (v - rest) / 100 * leakage, 6), with the leakage in thousandths
+        leaked, tie = _divide(v_m * 100_000 - (v_m - rest) * self._leakage[n], 100_000)
+        exact = ~refractory & ((tie & ~spike) | (v_m == threshold))
+        v_m = np.where(refractory | spike, self._reset[n], leaked.astype(np.int64))
+        if exact.any():
+            self._recompute_membranes(n, exact, v_in, v_m, spike)
+
+        self.v_m[..., n] = v_m
+        self.spike[..., n] = spike
+        self.refractory_time_remaining[..., n] = np.where(
+            spike, self.refractory_period[n], np.maximum(0, self.refractory_time_remaining[..., n] - 1))
+        return spike
+
+    def _recompute_membranes(self, n, exact, v_in, v_m, spike):
+        """Recomputes the exact elements (ties and threshold hits) of v_m and spike in place, with the float formulas of Membrane.step."""
+        stage, signal = self._stage
+        positions = np.nonzero(exact)
+        neurons = positions[-1]
+        rows = n.start + neurons
+        starts = self.connectivity.indptr[rows]
+        counts = self.connectivity.indptr[rows + 1] - starts
+        elements = _ranges(starts, counts)
+        owners = np.repeat(np.arange(len(rows)), counts)
+
+        # the float sum of the active weights, in dendrite order like Core.step
+        instance = (np.repeat(positions[0], counts),) if self.batch is not None else ()
+        active = signal[instance + (self.connectivity.indices[elements],)] != NO_TRANSMITTER
+        if stage.primary is not None:
+            active &= stage.primary[elements - stage.dendrites.start]
+        weight = self.weight[instance + (elements,)] / self.W_SCALE
+        total_input = np.bincount(owners, weights=weight * active, minlength=len(rows))
+
+        v = v_in[positions] / self.V_SCALE + total_input
+        rest = self.rest[rows]
+        fired = v >= self.threshold[rows]
+        leaked = round_array(v - ((v - rest) / 100 * self.leakage[rows]), 6)
+        v_m[positions] = np.where(fired, self._reset[rows], np.rint(leaked * self.V_SCALE))
+        spike[positions] = fired
+
+    def _update_synapses(self, s, fired):
+        """Transmits from the synapses s whose neuron fired, then regenerates them, in milli-units."""
+        W = self.W_SCALE
+        level = self.level[..., s]
+        released = fired & (level >= W)
+        level = level - W * released
+        self._transmit(s, fired, released)
+
+        # max(0.001, round(rate * (max_level - level), 3)), with the rate in thousandths
+        max_level = self._max_level[s]
+        amount, tie = _divide(self._rate[s] * (max_level - level), 1000)
+        if tie.any():
+            float_amount = round_array(self.regenerate_rate[s] * (max_level / W - level / W), 3)
+            amount = np.where(tie, np.rint(float_amount * W), amount)
+        self.level[..., s] = np.minimum(max_level, level + np.maximum(1, amount.astype(np.int64)))
+
+    def _apply_error(self, weight, error, max_weight, min_weight):
+        """Returns the weights in milli-units after adding the errors, like Engine._apply_error."""
+        W = self.W_SCALE
+        weight = super()._apply_error(weight / W, error, max_weight, min_weight)
+        return np.rint(weight * W).astype(np.int32)
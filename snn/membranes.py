@@ -1,3 +1,13 @@
+def fires_without_input(rest, threshold, reset_ratio, leakage):
+    """
+    Returns True where a membrane can reach the threshold without any input whatever its potential:
+    a reset or a rest at or above the threshold, or a leakage outside [0, 100] that overshoots the rest.
+    Works on scalars and on arrays of parameters (the engines use it on whole populations).
+    """
+    reset = rest + (reset_ratio * (threshold - rest))
+    return (reset >= threshold) | (rest >= threshold) | (leakage < 0) | (leakage > 100)
+
+
 class Membrane:
     """Basic membrane model for neuron.
     
@@ -10,6 +20,8 @@ class Membrane:
         v_m (float): Current membrane potential.
         spike (bool): Spike generated or not.
     """
+
+    __slots__ = ('rest', 'threshold', 'reset_ratio', 'leakage', 'v_m', 'spike')
     
     def __init__(self, rest=0.0, threshold=20.0, reset_ratio=0.05, leakage=0.5):
         """Initializes Membrane with the given attributes."""
@@ -47,3 +59,26 @@ class Membrane:
                 # If potential is below threshold, leak the membrane potential and set spike to False
                 self.v_m = round(self.v_m - ((self.v_m - self.rest) / 100 * self.leakage), 6)
                 self.spike = False
+
+    def can_fire_without_input(self):
+        """Returns True if the membrane can reach the threshold without any input, e.g. a reset at or above the threshold."""
+        return bool(self.v_m >= self.threshold or fires_without_input(self.rest, self.threshold, self.reset_ratio, self.leakage))
+
+    def idle(self, ticks, refractory_ticks=0):
+        """Applies ticks steps without input at once: the refractory ticks reset the membrane, the others leak it.
+
+        The leak of several ticks is computed in closed form and rounded once, so it can differ from
+        ticks calls of step() in the sixth decimal. The membrane must not be able to fire (see can_fire_without_input).
+
+        Args:
+            ticks (int): The number of steps.
+            refractory_ticks (int): How many of the first steps are in the refractory period.
+        """
+        if refractory_ticks > 0:
+            self.v_m = self.reset()
+        leak_ticks = ticks - refractory_ticks
+        if leak_ticks == 1:
+            self.v_m = round(self.v_m - ((self.v_m - self.rest) / 100 * self.leakage), 6)
+        elif leak_ticks > 1:
+            self.v_m = round(self.rest + (self.v_m - self.rest) * (1 - self.leakage / 100) ** leak_ticks, 6)
+        self.spike = False
@@ -0,0 +1,102 @@
+import sys
+
+from snn.axons import Axon
+from snn.cores import Core
+from snn.dendrites import Dendrite
+from snn.membranes import Membrane
+from snn.neurons import Neuron, SensorNeuron, MotorNeuron
+from snn.synapses import Synapse
+
+
+_COMPONENTS = (Neuron, SensorNeuron, MotorNeuron, Core, Membrane, Axon, Dendrite, Synapse)
+
+
+def _attributes(obj):
+    """Returns the values of the instance attributes of obj, from its __dict__ and its __slots__."""
+    values = list(vars(obj).values()) if hasattr(obj, '__dict__') else []
+    for cls in type(obj).__mro__:
+        for name in getattr(cls, '__slots__', ()):
+            if hasattr(obj, name):
+                values.append(getattr(obj, name))
+    return values
+
+
+def deep_size(obj, seen=None):
+    """
+    Returns the memory used by obj and by the values it owns, in bytes.
+
+    Other snn components referenced by obj (e.g. the synapse of a dendrite) are not followed,
+    they are counted on their own. Shared immutables (None, bools, strings, small ints) are free.
+
+    Args:
+        obj: The object to measure.
+        seen (set, optional): Ids of objects that were already counted, to count shared objects once.
+    """
+    seen = set() if seen is None else seen
+    size = 0
+    stack = [obj]
+    while stack:
+        item = stack.pop()
+        if id(item) in seen:
+            continue
+        seen.add(id(item))
+        size += sys.getsizeof(item)
+        if isinstance(item, dict):
+            children = list(item.keys()) + list(item.values())
+        elif isinstance(item, (list, tuple, set, frozenset)):
+            children = list(item)
+        elif isinstance(item, _COMPONENTS):
+            children = _attributes(item)
+            if hasattr(item, '__dict__'):
+                size += sys.getsizeof(item.__dict__)
+        else:
+            children = []
+        for child in children:
+            if child is None or isinstance(child, (bool, str, type)) or isinstance(child, _COMPONENTS):
+                continue
+            if type(child) is int and -5 <= child <= 256:
+                continue
+            stack.append(child)
+    return size
+
+
+def memory_report(sensors, layers, motors):
+    """
+    Measures the memory of an object-graph network, like the one of ai.Brain.
+
+    Neuron bytes include the Neuron, Core, Membrane and Axon objects (and sensors and motors),
+    connection bytes include the Dendrite and Synapse objects.
+
+    Args:
+        sensors (list): SensorNeuron objects.
+        layers (list): Lists of Neuron objects, one list per layer.
+        motors (list): MotorNeuron objects.
+
+    Returns:
+        dict: neurons, connections, neuron_bytes, connection_bytes, total_bytes,
+            bytes_per_neuron and bytes_per_connection.
+    """
+    seen = set()
+    neurons = list(sensors) + [neuron for layer in layers for neuron in layer] + list(motors)
+    neuron_bytes = 0
+    connection_bytes = 0
+    connections = 0
+    for neuron in neurons:
+        neuron_bytes += deep_size(neuron, seen)
+        core = getattr(neuron, 'core', None)
+        if core is None:
+            continue
+        neuron_bytes += sum(deep_size(part, seen) for part in (core, core.membrane, core.axon))
+        connection_bytes += sum(deep_size(dendrite, seen) for dendrite in core.dendrites)
+        connection_bytes += sum(deep_size(synapse, seen) for synapse in core.axon.synapses)
+        connections += len(core.dendrites)
+    total_bytes = neuron_bytes + connection_bytes
+    return {
+        "neurons": len(neurons),
+        "connections": connections,
+        "neuron_bytes": neuron_bytes,
+        "connection_bytes": connection_bytes,
+        "total_bytes": total_bytes,
+        "bytes_per_neuron": total_bytes / len(neurons) if neurons else 0.0,
+        "bytes_per_connection": connection_bytes / connections if connections else 0.0,
+    }
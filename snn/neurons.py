@@ -1,10 +1,14 @@
 import random
 
+from snn.neurotransmitters import NO_TRANSMITTER, SIMPLE_SIGNAL_MEDIATOR, registry
+
 
 class Neuron:
     """
     Represents a single neuron in a neural network.
     """
+    __slots__ = ('core', 'is_training')
+
     def __init__(self, core):
         """
         Initializes a Neuron instance.
@@ -31,7 +35,7 @@ class Neuron:
         """
         if error != 0:
             for dendrite in self.core.dendrites:
-                if dendrite.last_input_state and dendrite.last_input_state[0] != "":        # if input of dendrite have some transmitter (not empty string)
+                if dendrite.last_input_state and dendrite.last_input_state[0] != NO_TRANSMITTER:  # if input of dendrite have some transmitter
                     # the error is applied to the dendrite's weight
                     dendrite.weight = round(dendrite.weight + error, 3)
                     # the weight is limited to the range [min_weight, max_weight]
@@ -75,11 +79,34 @@ class Neuron:
         """
         self.core.step()
 
+    def step_left(self):
+        """
+        Executes the first half of a phased step: gathers the inputs of the previous tick.
+        """
+        self.core.step_left()
+
+    def step_right(self):
+        """
+        Executes the second half of a phased step: updates the membrane and the output.
+        """
+        self.core.step_right()
+
+    def idle(self, ticks):
+        """
+        Executes ticks steps without any input at once.
+
+        Args:
+            ticks: The number of steps.
+        """
+        self.core.idle(ticks)
+
 
 class SensorNeuron:
     """
     Represents a sensor neuron in a neural network.
     """
+    __slots__ = ('input_value', 'sensitivity', 'leak_rate', 'output_value')
+
     def __init__(self):
         """
         Initializes a SensorNeuron instance.
@@ -120,6 +147,18 @@ class SensorNeuron:
                 # the input value is limited to the range [0, 1]
                 self.input_value = max(self.input_value, 0)
 
+    def idle(self, ticks):
+        """
+        Executes ticks steps at once. The input must be below the sensitivity, so the sensor only discharges.
+
+        Args:
+            ticks: The number of steps.
+        """
+        self.output_value = False
+        while ticks > 0 and self.input_value > 0:
+            self.input_value = max(round(self.input_value - self.leak_rate, 3), 0)
+            ticks -= 1
+
     def receive(self):
         """
         Gets the output value of the sensor neuron.
@@ -127,13 +166,30 @@ class SensorNeuron:
         Returns:
             str: Returns "transmitter" if the output_value is True, otherwise returns an empty string.
         """
-        return "simple-signal-mediator" if self.output_value else ""
+        return registry.name(self.receive_code())
+
+    def receive_code(self):
+        """
+        Gets the output value of the sensor neuron as a transmitter code.
+
+        Returns:
+            int: SIMPLE_SIGNAL_MEDIATOR if the output_value is True, otherwise NO_TRANSMITTER.
+        """
+        return SIMPLE_SIGNAL_MEDIATOR if self.output_value else NO_TRANSMITTER
+
+    def peek_code(self):
+        """
+        Same as receive_code(), the output of a sensor is never consumed.
+        """
+        return self.receive_code()
 
 
 class MotorNeuron:
     """
     Represents a motor neuron in a neural network.
     """
+    __slots__ = ('output_value', 'post_synapses')
+
     def __init__(self):
         """
         Initializes a MotorNeuron instance.
@@ -154,12 +210,25 @@ class MotorNeuron:
         """
         self.post_synapses = synapse_objects
 
-    def step(self):
+    def step(self, peek=False):
         """
         Executes a step in the motor neuron's life-cycle.
+
+        Args:
+            peek: Read the synapses without consuming their transmitters (phased step).
         """
         self.output_value = 0
         for synapse in self.post_synapses:
-            if synapse.receive() != "": # if synapse have some transmitter (not empty string)
+            code = synapse.peek_code() if peek else synapse.receive_code()
+            if code != NO_TRANSMITTER: # if synapse have some transmitter
                 self.output_value += 1
         self.output_value = self.output_value
+
+    def idle(self, ticks):
+        """
+        Executes ticks steps without any received transmitter at once.
+
+        Args:
+            ticks: The number of steps.
+        """
+        self.output_value = 0
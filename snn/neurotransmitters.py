@@ -0,0 +1,51 @@
+NO_TRANSMITTER = 0
+
+
+class TransmitterRegistry:
+    """
+    Maps neurotransmitter types to small integer codes.
+
+    Synapses, dendrites, sensors and motors pass these codes on every step instead of the type names,
+    so the hot path compares ints and the engine can keep transmitter state in uint8 arrays.
+    The names only appear at the API boundary (Synapse.transmitter_type, Dendrite.input_mediator, receive()).
+    Code 0 (NO_TRANSMITTER) is the empty string, so a code is truthy exactly when a transmitter is present.
+
+    Attributes:
+        names (list): Type name of each code, indexed by code.
+        codes (dict): Code of each registered type name.
+    """
+
+    MAX_CODE = 255  # codes fit in a uint8
+
+    def __init__(self):
+        """Initializes the registry with the empty transmitter only."""
+        self.names = [""]
+        self.codes = {"": NO_TRANSMITTER}
+
+    def code(self, name):
+        """
+        Returns the code of a transmitter type, registering the type on first use.
+
+        Args:
+            name (str): The transmitter type, "" for no transmitter.
+
+        Returns:
+            int: The code of the type.
+        """
+        code = self.codes.get(name)
+        if code is None:
+            if len(self.names) > self.MAX_CODE:
+                raise ValueError(f"Too many transmitter types, at most {self.MAX_CODE} can be registered.")
+            code = self.codes[name] = len(self.names)
+            self.names.append(name)
+        return code
+
+    def name(self, code):
+        """Returns the transmitter type of a code."""
+        return self.names[code]
+
+
+# registry shared by all snn objects
+registry = TransmitterRegistry()
+
+SIMPLE_SIGNAL_MEDIATOR = registry.code('simple-signal-mediator')
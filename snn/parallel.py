@@ -0,0 +1,252 @@
+import multiprocessing
+import threading
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from snn.engines import _Stage
+from snn.neurotransmitters import NO_TRANSMITTER
+from snn.connectivity import segment_sum
+
+
+# state arrays written by the workers, each worker writes only the elements of its own neurons
+SHARED = ("weight", "v_m", "spike", "refractory_time_remaining", "last_input", "level")
+
+_STEP, _STOP, _SYNC = 1, 0, 2
+
+
+def _share(array, blocks):
+    """Copies array into a new shared memory block (kept in blocks) and returns the shared copy."""
+    block = shared_memory.SharedMemory(create=True, size=max(1, array.nbytes))
+    blocks.append(block)
+    shared = np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)
+    shared[:] = array
+    return shared
+
+
+def _attach(spec, blocks):
+    """Returns the array described by a (block name, shape, dtype) spec, attaching to its shared memory block."""
+    name, shape, dtype = spec
+    block = shared_memory.SharedMemory(name=name)
+    blocks.append(block)
+    return np.ndarray(shape, dtype=dtype, buffer=block.buf)
+
+
+def _partition(engine, parts):
+    """
+    Splits the neurons of an engine in contiguous ranges with about the same number of dendrites.
+
+    Returns:
+        list: A _Stage per part, with its neurons, dendrites and synapses.
+    """
+    indptr = engine.connectivity.indptr
+    # balance the dendrites (the mat-vec) and the neurons (the membranes) together
+    cost = indptr + np.arange(len(indptr))
+    bounds = np.searchsorted(cost, np.linspace(0, cost[-1], parts + 1)[1:-1])
+    bounds = [0] + sorted(int(b) for b in bounds) + [engine.n_neurons]
+    stages = []
+    for start, stop in zip(bounds[:-1], bounds[1:]):
+        s0, s1 = np.searchsorted(engine.synapse_neuron, [start, stop])
+        stages.append(_Stage(slice(start, stop), engine.connectivity.elements(start, stop),
+                             slice(int(s0), int(s1)), None, np.arange(s0, s1)))
+    return stages
+
+
+def _work(engine, stage, specs, buffers, control, barrier, results):
+    """
+    Worker loop: on every tick gathers the signals of the last tick for the neurons of its stage,
+    updates them and writes the output of their synapses into the buffer of the next tick.
+    When it is stopped it puts the transmitters left in the delay lines of its synapses into results,
+    on a sync it does the same and keeps running.
+    """
+    blocks = []
+    try:
+        for name, spec in specs.items():
+            setattr(engine, name, _attach(spec, blocks))
+        engine.connectivity.data = engine.weight
+        buffers = [_attach(spec, blocks) for spec in buffers]
+        s = stage.synapses
+        parity = 0
+        while True:
+            barrier.wait()
+            if control.value == _STOP:
+                results.put(engine.delayed()[1:])
+                break
+            if control.value == _SYNC:
+                results.put(engine.delayed()[1:])
+                continue
+            engine.tick += 1
+            # the stage step consumes and rewrites the signals of its own synapses in a private copy
+            engine.signal = buffers[parity].copy()
+            engine._step_stage(stage, 0)
+            buffers[1 - parity][..., s] = engine.signal[..., s]
+            parity = 1 - parity
+            barrier.wait()
+    except threading.BrokenBarrierError:
+        pass
+    except BaseException:
+        barrier.abort()
+        raise
+    finally:
+        for block in blocks:
+            block.close()
+
+
+class ParallelNetwork:
+    """
+    A compiled network whose neurons are split across worker processes.
+
+    It runs the phased step (see Brain(phased=True)): all neurons read the signals of the previous
+    tick and are independent within a tick, so every worker updates a contiguous range of neurons
+    on its own. The state arrays (weights, potentials, levels...) live in shared memory and each worker
+    writes the elements of its neurons only. The signals are double-buffered: on each tick the workers
+    read one buffer and write the other, and a barrier separates the ticks. Sensors and motors are
+    stepped by the main process, which is idle while the workers run.
+
+    It offers the same input(), step(), train() and sync() calls as CompiledNetwork.
+    close() stops the workers, the network can then still be stepped in the main process.
+
+    Attributes:
+        network (CompiledNetwork): The compiled network, its engine holds the shared state.
+        engine (Engine): The engine of network.
+        stages (list): The part of the network updated by each worker.
+        workers (list): The worker processes.
+    """
+
+    def __init__(self, network, workers=2, context=None, timeout=None):
+        """
+        Starts the worker processes.
+
+        Args:
+            network (CompiledNetwork): A network compiled with phased=True.
+            workers (int): The number of worker processes.
+            context (str, optional): The multiprocessing start method, the platform default if omitted.
+            timeout (float, optional): Seconds to wait for the workers on each tick before giving up.
+        """
+        engine = network.engine
+        if not engine.phased:
+            raise ValueError("Only the phased step can be split across workers, compile it with phased=True.")
+        if workers < 1:
+            raise ValueError("At least one worker is needed.")
+        self.network = network
+        self.engine = engine
+        self.stages = _partition(engine, min(workers, max(1, engine.n_neurons)))
+        self.timeout = timeout
+        self._blocks = []
+
+        for name in SHARED:
+            setattr(engine, name, _share(getattr(engine, name), self._blocks))
+        engine.connectivity.data = engine.weight
+        self._buffers = [_share(engine.signal, self._blocks), _share(engine.signal, self._blocks)]
+        self._parity = 0
+
+        specs = {name: (block.name, getattr(engine, name).shape, getattr(engine, name).dtype)
+                 for name, block in zip(SHARED, self._blocks)}
+        buffers = [(block.name, engine.signal.shape, engine.signal.dtype) for block in self._blocks[len(SHARED):]]
+        context = multiprocessing.get_context(context)
+        self._control = context.RawValue('b', _STEP)
+        self._barrier = context.Barrier(len(self.stages) + 1)
+        self._results = context.Queue()
+        self.workers = [context.Process(target=_work, args=(engine, stage, specs, buffers, self._control, self._barrier,
+                                                            self._results),
+                                        daemon=True)
+                        for stage in self.stages]
+        for worker in self.workers:
+            worker.start()
+
+    def input(self, input_data):
+        """Sets input for the sensors."""
+        self.engine.set_input(input_data)
+
+    def step(self):
+        """
+        Executes one phased step of the whole network on the workers.
+
+        Returns:
+            list: The output value of each motor.
+        """
+        if not self.workers:
+            return self.network.step()
+        engine = self.engine
+        read, write = self._buffers[self._parity], self._buffers[1 - self._parity]
+        engine.tick += 1
+
+        # the motors read and the sensors write while the workers wait
+        received = read[..., engine.motor_source] != NO_TRANSMITTER
+        engine.motor_output = segment_sum(engine.motor_neuron, received, engine.n_motors).astype(np.int64)
+        engine.signal = write
+        engine._step_sensors()
+
+        self._wait()
+        self._wait()
+        self._parity = 1 - self._parity
+        return engine.motor_output.tolist()
+
+    def _wait(self):
+        """Waits on the barrier with the workers."""
+        try:
+            self._barrier.wait(self.timeout)
+        except threading.BrokenBarrierError:
+            self.close()
+            raise RuntimeError("A worker failed or timed out, the workers are stopped.") from None
+
+    def train(self, error):
+        """Applies simple cycle by cycle learning to the last stage, like ai.Brain.train."""
+        self.network.train(error)
+
+    def _collect_lines(self):
+        """Replaces the delay lines of the main engine with the transmitters the workers put into _results."""
+        self.engine._lines = [[] for _ in range(self.engine.max_delay)]
+        for _ in self.workers:
+            self.engine.schedule(*self._results.get(timeout=self.timeout))
+
+    def sync(self):
+        """Writes the learned weights and the current state back into the original objects."""
+        if self.workers:
+            # the workers hold the live delay lines, they send a copy and keep running
+            self._control.value = _SYNC
+            self._wait()
+            self._collect_lines()
+            self._control.value = _STEP
+        if self._buffers:
+            self.engine.signal = self._buffers[self._parity]
+        self.network.sync()
+
+    def close(self):
+        """Stops the workers and moves the state out of shared memory, back into the main process."""
+        if self.workers:
+            if not self._barrier.broken:
+                self._control.value = _STOP
+                try:
+                    self._barrier.wait(self.timeout)
+                    # the delay lines of the workers continue in the main process
+                    self._collect_lines()
+                except threading.BrokenBarrierError:
+                    pass
+            for worker in self.workers:
+                worker.join(self.timeout)
+                if worker.is_alive():
+                    worker.terminate()
+            self.workers = []
+
+        engine = self.engine
+        if self._blocks:
+            for name in SHARED:
+                setattr(engine, name, getattr(engine, name).copy())
+            engine.connectivity.data = engine.weight
+            engine.signal = self._buffers[self._parity].copy()
+            self._buffers = []
+            for block in self._blocks:
+                block.close()
+                block.unlink()
+            self._blocks = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __del__(self):
+        if hasattr(self, '_blocks'):
+            self.close()
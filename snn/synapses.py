@@ -1,3 +1,8 @@
+from collections import deque
+
+from snn.neurotransmitters import NO_TRANSMITTER, registry
+
+
 class Synapse:
     """
     A class representing a synapse in a neuron network. 
@@ -12,17 +17,106 @@ class Synapse:
     regenerate_rate (float): the rate at regenerates amount of neurotransmitter (progressive regeneration: less transmitters = faster regeneration)
     transmitter_type (str): the type of neurotransmitter this synapse uses
     received_transmitter (str): the type of received neurotransmitter (empty string if no transmitter)
+    transmitter_code (int): registry code of transmitter_type, used on the hot path
+    received_code (int): registry code of received_transmitter (NO_TRANSMITTER if no transmitter)
     parent_neuron (object): the neuron object that this synapse belongs to (used for back propagation)
+    clock (Clock): the network clock for lazy regeneration, None to regenerate on every step
+    delay (int): the axonal delay in ticks, the transmitter of a spike is received delay - 1 steps after the spike
+
+    With a clock the synapse regenerates lazily: regenerate() does nothing, and the regeneration of
+    the skipped ticks is applied when the level is needed (by transmit() or a reader of neurotransmitter_level).
+    A full or idle synapse then costs nothing per tick, and the level read between steps is the same.
+
+    A delayed synapse keeps the released transmitters in a delay line of delay - 1 slots (a bounded deque
+    of codes, None for a step without release). Each step of the axon moves the line by one slot.
+    A synapse without delay has no line.
     """
 
-    def __init__(self, transmitter_type='simple-signal', initial_level=100, regenerate_rate=0.5):
+    __slots__ = ('_level', 'max_level', 'regenerate_rate', 'transmitter_code', 'received_code', 'parent_neuron',
+                 'clock', '_updated', '_line')
+
+    def __init__(self, transmitter_type='simple-signal', initial_level=100, regenerate_rate=0.5, clock=None, delay=1):
         """Initialize a Synapse instance with given parameters."""
-        self.neurotransmitter_level = initial_level 
+        self._level = initial_level 
         self.max_level = initial_level              
         self.regenerate_rate = regenerate_rate      
-        self.transmitter_type = transmitter_type    
-        self.received_transmitter = ""              
+        self.transmitter_code = registry.code(transmitter_type)
+        self.received_code = NO_TRANSMITTER
         self.parent_neuron = None 
+        self.clock = clock
+        self._updated = clock.tick if clock is not None else 0  # last tick whose regeneration is applied
+        if delay < 1:
+            raise ValueError("The delay must be at least 1 tick.")
+        self._line = deque([None] * (delay - 1), maxlen=delay - 1) if delay > 1 else None
+
+    @property
+    def delay(self):
+        """The axonal delay in ticks."""
+        return 1 if self._line is None else self._line.maxlen + 1
+
+    @property
+    def neurotransmitter_level(self):
+        """The current level of neurotransmitter, brought up to date first when the synapse is lazy."""
+        if self.clock is not None:
+            self._catch_up(self.clock.tick)
+        return self._level
+
+    @neurotransmitter_level.setter
+    def neurotransmitter_level(self, value):
+        self._level = value
+        if self.clock is not None:
+            self._updated = self.clock.tick
+
+    def _catch_up(self, tick):
+        """Applies the regeneration of the ticks after the last update up to tick (included)."""
+        ticks = tick - self._updated
+        if ticks <= 0:
+            return
+        self._updated = tick
+        self._replay(ticks)
+
+    def _replay(self, ticks):
+        """
+        Applies ticks ticks of regeneration in closed form over the runs of ticks that regenerate the same amount.
+
+        The amount is rounded to 3 decimals, so it stays the same for a run of ticks over which the level grows
+        linearly: min(max_level, level + amount * n), rounded to 3 decimals like the level after each tick.
+        Once the amount is the minimum of 0.001 it stays there until the synapse is full, so that is a single run.
+        """
+        level, max_level, rate = self._level, self.max_level, self.regenerate_rate
+        while ticks > 0 and level < max_level:
+            amount = round(rate * (max_level - level), 3)
+            if amount <= 0.001:
+                amount, n = 0.001, ticks
+            elif rate * amount >= 0.001:
+                n = 1   # the amount shrinks by about rate * amount per tick, more than the 0.001 grid
+            else:
+                # the amount stays the same while rate * deficit >= amount - 0.0005, checked on the last tick of the run
+                n = min(ticks, int((max_level - level - (amount - 0.0005) / rate) / amount) + 1)
+                while n > 1 and round(rate * (max_level - round(level + amount * (n - 1), 3)), 3) != amount:
+                    n //= 2
+                n = max(n, 1)
+            level = min(max_level, round(level + amount * n, 3))
+            ticks -= n
+        self._level = level
+
+    @property
+    def transmitter_type(self):
+        """The type of neurotransmitter this synapse uses."""
+        return registry.name(self.transmitter_code)
+
+    @transmitter_type.setter
+    def transmitter_type(self, value):
+        self.transmitter_code = registry.code(value)
+
+    @property
+    def received_transmitter(self):
+        """The type of received neurotransmitter (empty string if no transmitter)."""
+        return registry.name(self.received_code)
+
+    @received_transmitter.setter
+    def received_transmitter(self, value):
+        self.received_code = registry.code(value)
 
     def transmit(self):
         """
@@ -34,24 +128,65 @@ class Synapse:
         to the type. If the neurotransmitter level is 0, it sets 
         received_transmitter to an empty string.
         """
-        if self.neurotransmitter_level >= 1:
-            self.neurotransmitter_level -= 1    
-            self.received_transmitter = self.transmitter_type   
+        if self.clock is not None:
+            self._catch_up(self.clock.tick - 1)   # the regeneration of this tick comes after the transmission
+        if self._level >= 1:
+            self._level -= 1    
+            code = self.transmitter_code
         else:
-            self.received_transmitter = ""      
+            code = NO_TRANSMITTER
+        if self._line is None:
+            self.received_code = code
+        else:
+            self.propagate(code)
 
-    def regenerate(self):
+    def propagate(self, code=None):
+        """
+        Moves the delay line by one step: code enters the line and the transmitter of the spike
+        delay - 1 steps ago (if there was one) is received.
+
+        Args:
+            code (int, optional): The released transmitter code, None if the neuron didn't fire.
+        """
+        arriving = self._line[0]
+        self._line.append(code)
+        if arriving is not None:
+            self.received_code = arriving
+
+    def in_flight(self):
+        """
+        Returns the transmitters waiting in the delay line as (steps until arrival, code) pairs, 1 is the next step.
+        """
+        if self._line is None:
+            return []
+        return [(k + 1, code) for k, code in enumerate(self._line) if code is not None]
+
+    def load_flight(self, transmitters):
+        """
+        Replaces the content of the delay line with (steps until arrival, code) pairs, see in_flight().
+        """
+        if self._line is None:
+            if transmitters:
+                raise ValueError("A synapse without delay has no delay line.")
+            return
+        line = [None] * self._line.maxlen
+        for ticks, code in transmitters:
+            line[ticks - 1] = code
+        self._line.extend(line)
+
+    def regenerate(self, ticks=1):
         """
         Regenerate neurotransmitter in this synapse.
 
         This function should be called each timestep to regenerate neurotransmitter. 
         It calculates the amount to regenerate based on the regenerate rate and 
         the remaining capacity, and ensures the neurotransmitter level doesn't exceed the maximum.
-        minimum amount to regenerate is 0.001. 
+        minimum amount to regenerate is 0.001, the level is rounded to 3 decimals.
+        ticks > 1 applies the regeneration of that many timesteps at once.
+        A lazy synapse (with a clock) regenerates when its level is needed instead.
         """
-        regenerate_amount = max(0.001, round(self.regenerate_rate * (self.max_level - self.neurotransmitter_level), 3))
-        self.neurotransmitter_level += regenerate_amount 
-        self.neurotransmitter_level = min(self.max_level, self.neurotransmitter_level)
+        if self.clock is None:
+            self._replay(ticks)
 
     def receive(self):
         """
@@ -61,9 +196,25 @@ class Synapse:
         It stores the type of the received neurotransmitter and returns it.
         If there is no received neurotransmitter, it returns an empty string.
         """
-        if self.received_transmitter != "":
-            nt = self.received_transmitter 
-            self.received_transmitter = "" 
-            return nt
-        else:
-            return ""
+        return registry.name(self.receive_code())
+
+    def receive_code(self):
+        """
+        Receive the neurotransmitter to this synapse as a registry code.
+
+        Same as receive(), but returns the code (NO_TRANSMITTER if there is no received neurotransmitter).
+        Dendrites and motor neurons use it on every step.
+        """
+        code = self.received_code
+        self.received_code = NO_TRANSMITTER
+        return code
+
+    def peek_code(self):
+        """
+        Returns the code of the received neurotransmitter without consuming it.
+
+        Used by the phased step, in which every reader gets the transmitter and the
+        axon replaces it on the next tick.
+        """
+        return self.received_code
+
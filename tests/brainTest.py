@@ -0,0 +1,152 @@
+import random
+import sys
+import os
+# Add the parent directory to sys.path
+current_directory = os.path.dirname(os.path.abspath(__file__))
+parent_directory = os.path.dirname(current_directory)
+sys.path.append(parent_directory)
+
+import numpy as np
+
+from entities.ai import Brain
+
+
+def twins(seed, **kwargs):
+    """Returns two brains with the same weights."""
+    random.seed(seed)
+    brain = Brain(input_size=5, hidden_size=[8, 6], output_size=3, **kwargs)
+    reference = Brain(input_size=5, hidden_size=[8, 6], output_size=3, **kwargs)
+    for layer, reference_layer in zip(brain.layers, reference.layers):
+        for neuron, reference_neuron in zip(layer, reference_layer):
+            reference_neuron.core.dendrites[0].weight = neuron.core.dendrites[0].weight
+    return brain, reference
+
+
+class BrainTest:
+    def test_advance(self):
+        print("\n----------Testing Brain.advance----------")
+
+        for lazy_synapses in (False, True):
+            brain, reference = twins(seed=4, lazy_synapses=lazy_synapses)
+            for _ in range(50):
+                # Test 1: advance(k) after activity gives the same state as k steps
+                data = [random.choice([0, 0.4, 0.9]) for _ in range(5)]
+                brain.input(data)
+                reference.input(data)
+                ticks = random.randint(1, 60)
+                output = brain.advance(ticks)
+                for _ in range(ticks):
+                    reference_output = reference.step()
+                assert output == reference_output, "\n\n***\tTest 1 failed: outputs differ"
+                for layer, reference_layer in zip(brain.layers, reference.layers):
+                    for neuron, reference_neuron in zip(layer, reference_layer):
+                        core, reference_core = neuron.core, reference_neuron.core
+                        assert abs(core.membrane.v_m - reference_core.membrane.v_m) < 1e-4, "\n\n***\tTest 1 failed: v_m differs"
+                        assert core.refractory_time_remaining == reference_core.refractory_time_remaining, "\n\n***\tTest 1 failed: refractory time differs"
+                        assert core.axon.synapses[0].neurotransmitter_level == reference_core.axon.synapses[0].neurotransmitter_level, "\n\n***\tTest 1 failed: level differs"
+                assert [s.input_value for s in brain.sensors] == [s.input_value for s in reference.sensors], "\n\n***\tTest 1 failed: sensor input differs"
+        print("\n\tTest 1: Passed!")
+
+        # Test 2: a quiet brain is idle, pending input is not
+        assert brain.is_idle(), "\n\n***\tTest 2 failed: brain without input should be idle"
+        brain.input([1, 0, 0, 0, 0])
+        assert not brain.is_idle(), "\n\n***\tTest 2 failed: a sensor above its sensitivity should wake the brain"
+        print("\n\tTest 2: Passed!")
+
+        print("\n-----All brain tests passed!-----\n")
+
+    def test_recurrent(self):
+        print("\n----------Testing Recurrent Brain----------")
+
+        def build(order):
+            random.seed(21)
+            brain = Brain(input_size=4, hidden_size=[6, 5], output_size=2, phased=True)
+            for layer in brain.layers:
+                for neuron in layer:
+                    neuron.core.dendrites[0].weight = 12
+            wiring = [((1, 0), (0, 2), 9, 1), ((0, 1), (0, 3), 7, 2), ((1, 4), (1, 1), -5, 1),
+                      ((0, 5), (1, 3), 11, 3), ((1, 2), (0, 0), 8, 1)]
+            for source, target, weight, delay in (wiring if order else reversed(wiring)):
+                brain.connect(source, target, weight=weight, delay=delay)
+            return brain
+
+        # Test 1: lateral and recurrent connections need the phased step
+        try:
+            Brain(input_size=2, hidden_size=[2, 2], output_size=1).connect((1, 0), (0, 1))
+            assert False, "\n\n***\tTest 1 failed: a recurrent connection should need phased=True"
+        except ValueError:
+            pass
+        brain = build(order=True)
+        assert len(brain.layers[0][5].core.axon.synapses) == 2, "\n\n***\tTest 1 failed: a delayed connection should get its own synapse"
+        lateral = Brain(input_size=2, hidden_size=[3], output_size=1, phased=True).connect_layers(0, 0)
+        assert len(lateral) == 6, "\n\n***\tTest 1 failed: a full lateral layer has no self connections"
+        print("\n\tTest 1: Passed!")
+
+        # Test 2: the result doesn't depend on the wiring order, and the compiled engine steps it the same way
+        other = build(order=False)
+        compiled = build(order=True).compile()
+        total = 0
+        for tick in range(200):
+            data = [random.choice([0, 0.3, 0.8]) for _ in range(4)]
+            for network in (brain, other, compiled):
+                network.input(data)
+            output = brain.step()
+            total += sum(output)
+            assert other.step() == output and compiled.step() == output, f"\n\n***\tTest 2 failed: outputs differ on tick {tick}"
+        assert total > 0, "\n\n***\tTest 2 failed: spikes should reach the motors"
+        print("\n\tTest 2: Passed!")
+
+        print("\n-----All recurrent brain tests passed!-----\n")
+
+    def test_weights(self):
+        print("\n----------Testing Brain.get_weights----------")
+        random.seed(9)
+        brain = Brain(input_size=4, hidden_size=[6, 5], output_size=3, phased=True)
+        brain.connect_layers(1, 0, p=0.5, weight=2.0)
+
+        # Test 1: set_weights writes what get_weights reads, flat and per layer
+        weights = brain.get_weights()
+        assert len(weights) == sum(len(n.core.dendrites) for layer in brain.layers for n in layer), "\n\n***\tTest 1 failed: wrong size"
+        brain.set_weights(weights + 1)
+        assert np.allclose(brain.get_weights(), weights + 1), "\n\n***\tTest 1 failed: flat round trip"
+        per_layer = brain.get_weights(per_layer=True)
+        assert np.allclose(np.concatenate([per_layer[0], per_layer[1]]), weights + 1), "\n\n***\tTest 1 failed: per-layer order"
+        brain.set_weights({1: per_layer[1] * 2})
+        assert np.allclose(brain.get_weights(per_layer=True)[1], per_layer[1] * 2), "\n\n***\tTest 1 failed: per-layer round trip"
+        brain.set_membrane_params({'threshold': np.full(11, 15.0)})
+        assert all(n.core.membrane.threshold == 15.0 for layer in brain.layers for n in layer), "\n\n***\tTest 1 failed: threshold"
+        print("\n\tTest 1: Passed!")
+
+        # Test 2: a compiled network returns the same values, as views of its engine arrays
+        compiled = brain.compile()
+        assert np.allclose(compiled.get_weights(), brain.get_weights()), "\n\n***\tTest 2 failed: weights differ"
+        assert np.allclose(compiled.get_synapse_levels(), brain.get_synapse_levels()), "\n\n***\tTest 2 failed: levels differ"
+        for name, values in brain.get_membrane_params(per_layer=True).items():
+            compiled_values = compiled.get_membrane_params(per_layer=True)[name]
+            assert all(np.allclose(values[i], compiled_values[i]) for i in values), f"\n\n***\tTest 2 failed: {name} differs"
+        assert np.shares_memory(compiled.get_weights(), compiled.engine.weight), "\n\n***\tTest 2 failed: weights are copied"
+        assert np.shares_memory(compiled.get_weights(per_layer=True)[1], compiled.engine.weight), "\n\n***\tTest 2 failed: layer weights are copied"
+        compiled.set_weights({0: np.zeros(len(per_layer[0]))})
+        compiled.sync()
+        assert np.allclose(brain.get_weights(per_layer=True)[0], 0), "\n\n***\tTest 2 failed: set_weights is lost on sync"
+        print("\n\tTest 2: Passed!")
+
+        # Test 3: a fixed-point network converts the values
+        fixed = brain.compile(fixed_point=True)
+        assert np.allclose(fixed.get_weights(), brain.get_weights(), atol=1e-3), "\n\n***\tTest 3 failed: fixed-point weights"
+        fixed.set_weights(np.full(len(weights), 1.5))
+        assert np.all(fixed.engine.weight == 1500), "\n\n***\tTest 3 failed: fixed-point set_weights"
+        try:
+            fixed.set_membrane_params({'threshold': np.ones(11)})
+            assert False, "\n\n***\tTest 3 failed: fixed-point parameters are constant"
+        except ValueError:
+            pass
+        print("\n\tTest 3: Passed!")
+
+        print("\n-----All weight access tests passed!-----\n")
+
+
+# Run the test
+BrainTest().test_advance()
+BrainTest().test_recurrent()
+BrainTest().test_weights()
@@ -0,0 +1,52 @@
+import sys
+import os
+# Add the parent directory to sys.path
+current_directory = os.path.dirname(os.path.abspath(__file__))
+parent_directory = os.path.dirname(current_directory)
+sys.path.append(parent_directory)
+
+import numpy as np
+
+from snn.buffers import RingBuffer
+from snn.dendrites import Dendrite
+from snn.synapses import Synapse
+from snn.neurotransmitters import NO_TRANSMITTER, registry
+
+
+class BufferTest:
+    def test_ring_buffer(self):
+        print("\n----------Testing RingBuffer----------")
+
+        # Test 1: the buffer keeps only the last capacity items, oldest first
+        buffer = RingBuffer(capacity=4)
+        for value in range(10):
+            buffer.append(value)
+        assert len(buffer) == 4 and list(buffer) == [6, 7, 8, 9], "\n\n***\tTest 1 failed: buffer should keep the last 4 items"
+        assert buffer[0] == 6 and buffer[-1] == 9, "\n\n***\tTest 1 failed: wrong indexing"
+        print("\n\tTest 1: Passed!")
+
+        # Test 2: windows are contiguous views of the storage
+        window = buffer.window(3)
+        assert list(window) == [7, 8, 9] and np.shares_memory(window, buffer.window()), "\n\n***\tTest 2 failed: window should be a view"
+        assert window.flags['C_CONTIGUOUS'], "\n\n***\tTest 2 failed: window should be contiguous"
+        print("\n\tTest 2: Passed!")
+
+        # Test 3: dendrite history is bounded in associative-train mode
+        synapse = Synapse(transmitter_type='simple-signal-mediator')
+        dendrite = Dendrite(weight=5, history_capacity=8)
+        dendrite.connect(synapse)
+        for tick in range(100):
+            if tick % 2:
+                synapse.transmit()
+            dendrite.step(mode="associative-train")
+        code = registry.code('simple-signal-mediator')
+        assert len(dendrite.history_of_inputs) == 8, "\n\n***\tTest 3 failed: history should be bounded"
+        assert list(dendrite.history_of_inputs)[-2:] == [(NO_TRANSMITTER, 5.0), (code, 5.0)], "\n\n***\tTest 3 failed: history should hold (code, weight) tuples"
+        assert list(dendrite.history_of_inputs.window()['code']) == [NO_TRANSMITTER, code] * 4, "\n\n***\tTest 3 failed: window fields should be readable"
+        print("\n\tTest 3: Passed!")
+
+        print("\n-----All buffer tests passed!-----\n")
+
+
+# Run the test
+BufferTest().test_ring_buffer()
@@ -0,0 +1,73 @@
+import random
+import sys
+import os
+import time
+# Add the parent directory to sys.path
+current_directory = os.path.dirname(os.path.abspath(__file__))
+parent_directory = os.path.dirname(current_directory)
+sys.path.append(parent_directory)
+
+import numpy as np
+
+from entities.ai import Brain
+from snn.builders import build_network, full, one_to_one, random_sparse, modular, SENSORS, MOTORS
+
+
+class BuilderTest:
+    def test_build(self):
+        print("\n----------Testing Builder----------")
+
+        # Test 1: the patterns create the expected connections
+        network = build_network(sensors=4, layers=[6, 3], motors=2, seed=1,
+                                connections=[(SENSORS, 0, full()), (0, 1, one_to_one()), (1, MOTORS, one_to_one())])
+        engine = network.engine
+        assert engine.n_dendrites == 4 * 6 + 3, "\n\n***\tTest 1 failed: full and one-to-one should give 27 dendrites"
+        assert list(engine.dendrite_source[24:]) == [0, 1, 2], "\n\n***\tTest 1 failed: neuron j of layer 1 should read neuron j of layer 0"
+        assert list(engine.motor_source) == [6, 7], "\n\n***\tTest 1 failed: motor i should read neuron i of the last layer"
+        assert engine.weight.min() >= -20 and engine.weight.max() <= 20, "\n\n***\tTest 1 failed: weights should be in the range"
+        sparse = build_network(sensors=0, layers=[400, 400], motors=0, seed=2, connections=[(0, 1, random_sparse(0.1))])
+        assert abs(sparse.engine.n_dendrites / 160_000 - 0.1) < 0.01, "\n\n***\tTest 1 failed: random-sparse should keep about p of the pairs"
+        modules = build_network(sensors=0, layers=[400, 400], motors=0, seed=3, connections=[(0, 1, modular(4, 0.5, 0.0))])
+        sources = modules.engine.dendrite_source
+        targets = modules.engine.dendrite_neuron - 400
+        assert np.all(sources // 100 == targets // 100), "\n\n***\tTest 1 failed: modules should not be connected to each other"
+        print("\n\tTest 1: Passed!")
+
+        # Test 2: a built network runs like the same Brain
+        random.seed(4)
+        brain = Brain(input_size=6, hidden_size=[4, 6], output_size=3)
+        network = Brain.build(6, [4, 6], 3, seed=5,
+                              connections=[(SENSORS, 0, one_to_one()), (0, 1, one_to_one()), (1, MOTORS, one_to_one())])
+        for dendrite, weight in zip([n.core.dendrites[0] for layer in brain.layers for n in layer], network.engine.weight):
+            dendrite.weight = float(weight)
+        for tick in range(200):
+            data = [random.choice([0, 0.2, 0.7]) for _ in range(6)]
+            brain.input(data)
+            network.input(data)
+            assert network.step() == brain.step(), f"\n\n***\tTest 2 failed: outputs differ on tick {tick}"
+        print("\n\tTest 2: Passed!")
+
+        # Test 3: a network of a million connections is built in well under a second
+        start = time.perf_counter()
+        large = build_network(sensors=100, layers=[2000, 1000], motors=10, seed=6,
+                              connections=[(SENSORS, 0, random_sparse(0.5)), (0, 1, random_sparse(0.45)), (1, MOTORS, one_to_one())])
+        elapsed = time.perf_counter() - start
+        assert large.engine.n_dendrites > 1_000_000 - 5_000, "\n\n***\tTest 3 failed: the network should have about a million connections"
+        assert elapsed < 1, f"\n\n***\tTest 3 failed: building took {elapsed:.2f} s"
+        print("\n\tTest 3: Passed!")
+
+        # Test 4: lateral and recurrent connections need the phased step
+        try:
+            build_network(sensors=1, layers=[3, 3], motors=0, connections=[(1, 0, full())])
+            assert False, "\n\n***\tTest 4 failed: a recurrent connection should need phased=True"
+        except ValueError:
+            pass
+        recurrent = build_network(sensors=1, layers=[3, 3], motors=0, phased=True, connections=[(1, 0, full()), (1, 1, full())])
+        assert recurrent.engine.n_dendrites == 18, "\n\n***\tTest 4 failed: a phased network takes recurrent connections"
+        print("\n\tTest 4: Passed!")
+
+        print("\n-----All builder tests passed!-----\n")
+
+
+# Run the test
+BuilderTest().test_build()
@@ -0,0 +1,157 @@
+import random
+import sys
+import os
+import shutil
+import tempfile
+# Add the parent directory to sys.path
+current_directory = os.path.dirname(os.path.abspath(__file__))
+parent_directory = os.path.dirname(current_directory)
+sys.path.append(parent_directory)
+
+import numpy as np
+
+from entities.ai import Brain
+from snn import checkpoints
+from snn.engines import Engine
+from snn.builders import build_network, full, random_sparse, one_to_one, SENSORS, MOTORS
+
+
+def run(networks, ticks, size):
+    """Steps networks with the same random input and checks that their outputs agree."""
+    for tick in range(ticks):
+        data = [random.choice([0, 0.3, 0.8]) for _ in range(size)]
+        outputs = []
+        for network in networks:
+            network.input(data)
+            outputs.append(network.step())
+        assert all(output == outputs[0] for output in outputs), f"\n\n***\toutputs differ on tick {tick}"
+
+
+class CheckpointTest:
+    def test_checkpoint(self):
+        print("\n----------Testing Checkpoints----------")
+        directory = tempfile.mkdtemp()
+        path = os.path.join(directory, 'brain.ckpt')
+
+        # Test 1: a loaded network continues exactly like the saved one, for every engine
+        random.seed(3)
+        brain = Brain(input_size=4, hidden_size=[6, 5], output_size=3, phased=True)
+        brain.connect_layers(1, 0, p=0.5, delay=3)
+        run([brain], 40, 4)
+        for options in ({}, dict(fixed_point=True)):
+            network = brain.compile(**options)
+            checkpoints.save(path, network)
+            for mmap in (True, False):
+                run([network, checkpoints.load(path, mmap=mmap)], 60, 4)
+                checkpoints.save(path, network)
+        sequential = Brain(input_size=4, hidden_size=[6, 5], output_size=3)
+        network = sequential.compile(event_driven=True)
+        run([network], 30, 4)
+        checkpoints.save(path, network)
+        run([network, checkpoints.load(path)], 60, 4)
+        print("\n\tTest 1: Passed!")
+
+        # Test 2: a mapped network reads the file lazily and never writes into it
+        network = build_network(sensors=20, layers=[300, 300], motors=5, seed=1,
+                                connections=[(SENSORS, 0, full()), (0, 1, random_sparse(0.2)), (1, MOTORS, one_to_one())])
+        checkpoints.save(path, network)
+        with open(path, 'rb') as file:
+            before = file.read()
+        loaded = checkpoints.load(path)
+        assert not loaded.engine.weight.flags.owndata, "\n\n***\tTest 2 failed: mapped weights should not be copied"
+        assert np.array_equal(loaded.engine.weight, network.engine.weight), "\n\n***\tTest 2 failed: weights differ"
+        run([network, loaded], 20, 20)
+        loaded.train(5)
+        with open(path, 'rb') as file:
+            assert file.read() == before, "\n\n***\tTest 2 failed: the file changed"
+        print("\n\tTest 2: Passed!")
+
+        # Test 3: a brain restores the weights and the state of its checkpoint
+        random.seed(5)
+        brain.save(path)
+        expected = brain.get_weights()
+        brain.set_weights(np.zeros(len(expected)))
+        brain.restore(path)
+        assert np.array_equal(brain.get_weights(), expected), "\n\n***\tTest 3 failed: weights not restored"
+        run([brain, Brain.load(path)], 60, 4)
+        try:
+            Brain(input_size=4, hidden_size=[6, 4], output_size=3, phased=True).restore(path)
+            assert False, "\n\n***\tTest 3 failed: a different network should be refused"
+        except ValueError:
+            pass
+        with open(path, 'r+b') as file:
+            file.write(b'NOTACKPT')
+        try:
+            Brain.load(path)
+            assert False, "\n\n***\tTest 3 failed: a file without the magic should be refused"
+        except ValueError:
+            pass
+        print("\n\tTest 3: Passed!")
+        shutil.rmtree(directory)
+
+        print("\n-----All checkpoint tests passed!-----\n")
+
+    def test_deltas(self):
+        print("\n----------Testing Delta Checkpoints----------")
+        directory = tempfile.mkdtemp()
+        path = os.path.join(directory, 'run.ckpt')
+
+        def same_state(network, other):
+            return all(np.array_equal(getattr(network.engine, name), getattr(other.engine, name)) for name in Engine.STATE)
+
+        # Test 1: base plus deltas replays the state of the last delta, each delta writes only what changed
+        random.seed(7)
+        # train() changes the last layer only, the weights of the first one stay clean
+        network = build_network(sensors=100, layers=[300, 50], motors=4, seed=2, phased=True,
+                                connections=[(SENSORS, 0, full()), (0, 1, random_sparse(0.1)), (1, 1, random_sparse(0.05)),
+                                             (1, MOTORS, one_to_one())], delay=[1] * 300 + [2] * 50)
+        checkpointer = checkpoints.DeltaCheckpointer(network, path, block_size=256)
+        checkpointer.snapshot()
+        full_size = checkpointer.bytes_written
+        for _ in range(3):
+            run([network], 10, 100)
+            network.train(3)
+            checkpointer.delta()
+            assert checkpointer.bytes_written < full_size / 2, "\n\n***\tTest 1 failed: a delta should be smaller than a snapshot"
+        replayed = checkpoints.replay(path)
+        assert same_state(network, replayed), "\n\n***\tTest 1 failed: the replayed state differs"
+        run([network, replayed], 30, 100)
+        print("\n\tTest 1: Passed!")
+
+        # Test 2: a delta without changes holds no blocks
+        checkpointer.delta()
+        checkpointer.delta()
+        _, arrays = checkpoints.read(f'{path}.delta-{checkpointer.sequence:06d}')
+        assert all(arrays[f'{name}.blocks'].size == 0 for name in Engine.STATE), "\n\n***\tTest 2 failed: nothing changed"
+        print("\n\tTest 2: Passed!")
+
+        # Test 3: compaction folds the deltas into the base, deltas of an older base are skipped
+        stale = f'{path}.delta-{checkpointer.sequence:06d}'
+        kept = open(stale, 'rb').read()
+        checkpointer.compact()
+        assert os.listdir(directory) == ['run.ckpt'], "\n\n***\tTest 3 failed: the deltas should be removed"
+        with open(stale, 'wb') as file:
+            file.write(kept)
+        assert same_state(network, checkpoints.replay(path, mmap=False)), "\n\n***\tTest 3 failed: the compacted state differs"
+        run([network], 10, 100)
+        checkpointer.delta()
+        run([network, checkpoints.replay(path)], 20, 100)
+        print("\n\tTest 3: Passed!")
+
+        # Test 4: an event-driven engine replays its lazily updated state too
+        sequential = Brain(input_size=4, hidden_size=[6, 5], output_size=3).compile(event_driven=True)
+        checkpointer = checkpoints.DeltaCheckpointer(sequential, path, block_size=16)
+        run([sequential], 20, 4)
+        checkpointer.snapshot()
+        run([sequential], 20, 4)
+        checkpointer.delta()
+        run([sequential, checkpoints.replay(path)], 40, 4)
+        print("\n\tTest 4: Passed!")
+        shutil.rmtree(directory)
+
+        print("\n-----All delta checkpoint tests passed!-----\n")
+
+
+# Run the test
+CheckpointTest().test_checkpoint()
+CheckpointTest().test_deltas()
@@ -0,0 +1,245 @@
+import random
+import sys
+import os
+# Add the parent directory to sys.path
+current_directory = os.path.dirname(os.path.abspath(__file__))
+parent_directory = os.path.dirname(current_directory)
+sys.path.append(parent_directory)
+
+from entities.ai import Brain
+from snn.compilers import compile_network
+from snn.dendrites import Dendrite
+
+
+def recurrent_brain(seed):
+    """Returns a phased brain whose first layer also reads the synapses of the last layer."""
+    random.seed(seed)
+    brain = Brain(input_size=6, hidden_size=[4, 6], output_size=3, phased=True)
+    for layer in brain.layers:
+        for neuron in layer:
+            neuron.core.dendrites[0].weight = round(neuron.core.dendrites[0].weight, 3)
+    for j, neuron in enumerate(brain.layers[0]):
+        dendrite = Dendrite(weight=round(random.uniform(-20, 20), 3))
+        dendrite.connect(brain.layers[1][j].core.axon.synapses[0])
+        neuron.core.dendrites.append(dendrite)
+    return brain
+
+
+class CompilerTest:
+    def test_compile(self):
+        print("\n----------Testing Compiler----------")
+
+        random.seed(3)
+        brain = Brain(input_size=6, hidden_size=[4, 6], output_size=3)
+
+        # Test 1: compiled network follows the object graph
+        compiled = brain.compile()
+        assert compiled.engine.n_neurons == 10, "\n\n***\tTest 1 failed: all neurons should be compiled"
+        assert compiled.engine.n_dendrites == 10 and compiled.engine.n_synapses == 10, "\n\n***\tTest 1 failed: all dendrites and synapses should be compiled"
+        assert list(compiled.engine.weight) == [n.core.dendrites[0].weight for layer in brain.layers for n in layer], "\n\n***\tTest 1 failed: weights should be copied in order"
+        print("\n\tTest 1: Passed!")
+
+        # Test 2: compiled network and the object brain give the same outputs and learn the same weights
+        reference = Brain(input_size=6, hidden_size=[4, 6], output_size=3)
+        for layer, reference_layer in zip(brain.layers, reference.layers):
+            for neuron, reference_neuron in zip(layer, reference_layer):
+                reference_neuron.core.dendrites[0].weight = neuron.core.dendrites[0].weight
+        for tick in range(300):
+            data = [random.choice([0, 0.2, 0.7]) for _ in range(6)]
+            reference.input(data)
+            compiled.input(data)
+            assert compiled.step() == reference.step(), f"\n\n***\tTest 2 failed: outputs differ on tick {tick}"
+            error = random.choice([-0.1, 0.0, 0.2])
+            reference.train(error)
+            compiled.train(error)
+        print("\n\tTest 2: Passed!")
+
+        # Test 3: sync() writes weights, levels and membranes back into the objects
+        compiled.sync()
+        for layer, reference_layer in zip(brain.layers, reference.layers):
+            for neuron, reference_neuron in zip(layer, reference_layer):
+                assert neuron.core.dendrites[0].weight == reference_neuron.core.dendrites[0].weight, "\n\n***\tTest 3 failed: weight not synced"
+                assert neuron.core.membrane.v_m == reference_neuron.core.membrane.v_m, "\n\n***\tTest 3 failed: v_m not synced"
+                assert neuron.core.axon.synapses[0].neurotransmitter_level == reference_neuron.core.axon.synapses[0].neurotransmitter_level, "\n\n***\tTest 3 failed: synapse level not synced"
+        print("\n\tTest 3: Passed!")
+
+        # Test 4: synced objects can be recompiled, layers can be discovered from the motors
+        recompiled = compile_network(brain.sensors, motors=brain.motors)
+        assert [s.stop - s.start for s in recompiled.engine.stages] == [3, 3], "\n\n***\tTest 4 failed: layers reached from the motors should be discovered"
+        recompiled = brain.compile()
+        assert list(recompiled.engine.v_m) == list(compiled.engine.v_m), "\n\n***\tTest 4 failed: recompiled state should continue from the synced objects"
+        print("\n\tTest 4: Passed!")
+
+        # Test 5: the getters and setters see through the lazy updates of the event-driven engine
+        dense, events = brain.compile(), brain.compile(event_driven=True)
+        for network in (dense, events):
+            network.input([0.7] * 6)
+            network.step()
+            network.input([0] * 6)
+            for _ in range(5):
+                network.step()
+        assert max(abs(events.get_membrane_params()['v_m'] - dense.get_membrane_params()['v_m'])) < 1e-4, "\n\n***\tTest 5 failed: v_m should include the idle ticks"
+        assert list(events.get_synapse_levels()) == list(dense.get_synapse_levels()), "\n\n***\tTest 5 failed: levels should include the regeneration"
+        for network in (dense, events):
+            # neurons above the threshold or with a leakage above 100 fire without input
+            network.set_membrane_params(dict(v_m=[100.0] * 4 + [-40.0] * 6, leakage=[0.5] * 9 + [250.0]))
+            network.set_synapse_levels([0.5] * 10)
+        spikes = 0
+        for tick in range(20):
+            for network in (dense, events):
+                network.input([0] * 6)
+            assert events.step() == dense.step(), f"\n\n***\tTest 5 failed: outputs differ {tick} ticks after the setters"
+            assert list(events.engine.spike) == list(dense.engine.spike), f"\n\n***\tTest 5 failed: spikes differ {tick} ticks after the setters"
+            spikes += dense.engine.spike.sum()
+        assert spikes > 0, "\n\n***\tTest 5 failed: the neurons set above the threshold should fire"
+        assert max(abs(events.get_membrane_params()['v_m'] - dense.get_membrane_params()['v_m'])) < 1e-4, "\n\n***\tTest 5 failed: v_m differs after the setters"
+        print("\n\tTest 5: Passed!")
+
+        print("\n-----All compiler tests passed!-----\n")
+
+    def test_batch(self):
+        print("\n----------Testing Batch----------")
+
+        random.seed(5)
+        brains = [Brain(input_size=6, hidden_size=[4, 6], output_size=3) for _ in range(4)]
+        batch = Brain.compile_batch(brains)
+        singles = [brain.compile() for brain in brains]
+
+        # Test 1: state and weights get a leading batch axis
+        assert batch.engine.v_m.shape == (4, 10) and batch.engine.weight.shape == (4, 10), "\n\n***\tTest 1 failed: state should have a batch axis"
+        print("\n\tTest 1: Passed!")
+
+        # Test 2: every instance of the batch follows its own brain, with one error per brain
+        for tick in range(300):
+            data = [[random.choice([0, 0.2, 0.7]) for _ in range(6)] for _ in brains]
+            errors = [random.choice([-0.1, 0.0, 0.2]) for _ in brains]
+            batch.input(data)
+            outputs = batch.step()
+            assert outputs.shape == (4, 3), "\n\n***\tTest 2 failed: outputs should have the shape [brains, motors]"
+            for single, row, output, error in zip(singles, data, outputs, errors):
+                single.input(row)
+                assert single.step() == list(output), f"\n\n***\tTest 2 failed: outputs differ on tick {tick}"
+                single.train(error)
+            batch.train(errors)
+        print("\n\tTest 2: Passed!")
+
+        # Test 3: sync() writes every instance back into its brain
+        batch.sync()
+        for brain, single in zip(brains, singles):
+            weights = [n.core.dendrites[0].weight for layer in brain.layers for n in layer]
+            assert weights == list(single.engine.weight), "\n\n***\tTest 3 failed: weights not synced"
+        print("\n\tTest 3: Passed!")
+
+        # Test 4: brains with different topologies can't share an engine
+        try:
+            Brain.compile_batch([brains[0], Brain(input_size=6, hidden_size=[5, 6], output_size=3)])
+            assert False, "\n\n***\tTest 4 failed: different topologies should be rejected"
+        except ValueError:
+            pass
+        print("\n\tTest 4: Passed!")
+
+        print("\n-----All batch tests passed!-----\n")
+
+    def test_fixed_point(self):
+        print("\n----------Testing Fixed-Point Compile----------")
+
+        random.seed(8)
+        brain = Brain(input_size=6, hidden_size=[4, 6], output_size=3)
+        for layer in brain.layers:
+            for neuron in layer:
+                neuron.core.dendrites[0].weight = round(neuron.core.dendrites[0].weight, 3)
+        reference = brain.compile()
+        compiled = brain.compile(fixed_point=True)
+
+        # Test 1: the fixed-point brain follows the float brain
+        for tick in range(300):
+            data = [random.choice([0, 0.2, 0.7]) for _ in range(6)]
+            reference.input(data)
+            compiled.input(data)
+            assert compiled.step() == reference.step(), f"\n\n***\tTest 1 failed: outputs differ on tick {tick}"
+            error = random.choice([-0.1, 0.0, 0.2])
+            reference.train(error)
+            compiled.train(error)
+        print("\n\tTest 1: Passed!")
+
+        # Test 2: sync() writes float values back into the objects
+        compiled.sync()
+        assert [n.core.dendrites[0].weight for layer in brain.layers for n in layer] == list(reference.engine.weight), "\n\n***\tTest 2 failed: weights not synced"
+        assert [n.core.membrane.v_m for layer in brain.layers for n in layer] == list(reference.engine.v_m), "\n\n***\tTest 2 failed: v_m not synced"
+        print("\n\tTest 2: Passed!")
+
+        print("\n-----All fixed-point compile tests passed!-----\n")
+
+    def test_phased(self):
+        print("\n----------Testing Phased Step----------")
+
+        brain, reference = recurrent_brain(seed=9), recurrent_brain(seed=9)
+        reversed_neurons = [neuron for layer in reversed(reference.layers) for neuron in reversed(layer)]
+
+        # Test 1: the phased step doesn't depend on the order of the neurons within a phase
+        for tick in range(300):
+            data = [random.choice([0, 0.2, 0.7]) for _ in range(6)]
+            brain.input(data)
+            reference.input(data)
+            output = brain.step()
+            for neuron in reversed_neurons:
+                neuron.step_left()
+            for motor in reversed(reference.motors):
+                motor.step(peek=True)
+            for sensor in reference.sensors:
+                sensor.step()
+            for neuron in reversed_neurons:
+                neuron.step_right()
+            assert output == [motor.output_value for motor in reference.motors], f"\n\n***\tTest 1 failed: outputs differ on tick {tick}"
+            assert [n.core.membrane.v_m for layer in brain.layers for n in layer] == [n.core.membrane.v_m for layer in reference.layers for n in layer], f"\n\n***\tTest 1 failed: v_m differs on tick {tick}"
+        print("\n\tTest 1: Passed!")
+
+        # Test 2: a spike moves one layer per tick
+        latency = Brain(input_size=1, hidden_size=[1, 1], output_size=1, phased=True)
+        for layer in latency.layers:
+            layer[0].core.dendrites[0].weight = 30
+        latency.input([1])
+        outputs = [latency.step()[0] for _ in range(5)]
+        assert outputs == [0, 0, 0, 1, 0], "\n\n***\tTest 2 failed: the spike should reach the motor on the fourth tick"
+        print("\n\tTest 2: Passed!")
+
+        # Test 3: the recurrent network compiles and the engines follow the objects
+        discovered = compile_network(brain.sensors, motors=brain.motors, phased=True)
+        assert discovered.engine.n_neurons == 6, "\n\n***\tTest 3 failed: the neurons of a cycle reached from the motors should be discovered"
+        compiled = brain.compile()
+        fixed = brain.compile(fixed_point=True)
+        batch = Brain.compile_batch([brain, reference])
+        spikes = 0
+        for tick in range(300):
+            data = [random.choice([0, 0.2, 0.7]) for _ in range(6)]
+            for network in (brain, compiled, fixed):
+                network.input(data)
+            batch.input([data, data])
+            output = brain.step()
+            spikes += sum(n.core.membrane.spike for n in brain.layers[0])
+            assert compiled.step() == output and fixed.step() == output, f"\n\n***\tTest 3 failed: outputs differ on tick {tick}"
+            assert list(batch.step()[0]) == output, f"\n\n***\tTest 3 failed: batch outputs differ on tick {tick}"
+            error = random.choice([-0.1, 0.0, 0.2])
+            for network in (brain, compiled, fixed):
+                network.train(error)
+            batch.train([error, 0.0])
+        assert spikes > 0, "\n\n***\tTest 3 failed: the recurrent layer should spike"
+        assert list(compiled.engine.weight) == [d.weight for layer in brain.layers for n in layer for d in n.core.dendrites], "\n\n***\tTest 3 failed: weights differ"
+        print("\n\tTest 3: Passed!")
+
+        # Test 4: the event-driven engine has no phased step
+        try:
+            brain.compile(event_driven=True)
+            assert False, "\n\n***\tTest 4 failed: event-driven phased compile should be rejected"
+        except ValueError:
+            pass
+        print("\n\tTest 4: Passed!")
+
+        print("\n-----All phased step tests passed!-----\n")
+
+
+# Run the test
+CompilerTest().test_compile()
+CompilerTest().test_batch()
+CompilerTest().test_fixed_point()
+CompilerTest().test_phased()
@@ -0,0 +1,83 @@
+import pickle
+import random
+import sys
+import os
+# Add the parent directory to sys.path
+current_directory = os.path.dirname(os.path.abspath(__file__))
+parent_directory = os.path.dirname(current_directory)
+sys.path.append(parent_directory)
+
+from entities.ai import Brain
+from snn.distributed import LocalCluster, _dump_setup, _load_setup, _reads
+from snn.parallel import _partition
+
+
+class DistributedTest:
+    def test_distributed(self):
+        print("\n----------Testing Distributed Network----------")
+
+        random.seed(12)
+        brain = Brain(input_size=6, hidden_size=[9, 7], output_size=3, phased=True)
+        reference = brain.compile()
+
+        # Test 1: three localhost nodes give exactly the phased step
+        with LocalCluster(nodes=3) as cluster:
+            with brain.compile_distributed(cluster.addresses) as network:
+                for tick in range(200):
+                    data = [random.choice([0, 0.2, 0.7]) for _ in range(6)]
+                    reference.input(data)
+                    network.input(data)
+                    assert network.step() == reference.step(), f"\n\n***\tTest 1 failed: outputs differ on tick {tick}"
+                    error = random.choice([-0.1, 0.0, 0.2])
+                    reference.train(error)
+                    network.train(error)
+                network.sync()
+                assert [n.core.membrane.v_m for layer in brain.layers for n in layer] == list(reference.engine.v_m), "\n\n***\tTest 1 failed: v_m not synced"
+                assert [n.core.dendrites[0].weight for layer in brain.layers for n in layer] == list(reference.engine.weight), "\n\n***\tTest 1 failed: weights not synced"
+                print("\n\tTest 1: Passed!")
+
+                # Test 2: a step costs one bitmap of the synapses a node reads from the others and of the sensors per node,
+                # and one bitmap of its synapses back
+                engine = network.engine
+                for stage, reads in zip(network.stages, network.reads):
+                    sources = set(engine.connectivity.indices[stage.dendrites].tolist())
+                    expected = [i for i in range(engine.n_synapses) if i in sources and not stage.synapses.start <= i < stage.synapses.stop]
+                    assert list(reads) == expected, "\n\n***\tTest 2 failed: a node should only read the synapses of other nodes its dendrites read"
+                traffic = network.communication()
+                assert traffic['bytes_sent'] == sum(5 + (len(reads) + 7) // 8 + 1 for reads in network.reads) < 3 * (5 + 3), "\n\n***\tTest 2 failed: each node should get the bits of its reads and 6 sensor bits"
+                assert traffic['bytes_received'] == 3 * (5 + 1), "\n\n***\tTest 2 failed: each node should answer with a one byte bitmap"
+                assert traffic['latency'] > 0, "\n\n***\tTest 2 failed: latency should be measured"
+                print("\n\tTest 2: Passed!")
+
+        # Test 3: with a lookahead the nodes run ahead, a sync waits for them and the network keeps going
+        with LocalCluster(nodes=2) as cluster:
+            with brain.compile_distributed(cluster.addresses, lookahead=3) as network:
+                outputs = []
+                for tick in range(100):
+                    network.input([random.choice([0, 0.7]) for _ in range(6)])
+                    outputs += network.step()
+                    if tick == 50:
+                        network.sync()
+                assert sum(outputs) > 0, "\n\n***\tTest 3 failed: spikes should reach the motors"
+        print("\n\tTest 3: Passed!")
+
+        # Test 4: the SETUP message is data only, a node rebuilds the engine from it and refuses pickles
+        engine = reference.engine
+        stage = _partition(engine, 2)[1]
+        copy, copied_stage, reads = _load_setup(_dump_setup(engine, stage, _reads(engine, stage)))
+        assert list(copy.v_m) == list(engine.v_m) and list(copy.weight) == list(engine.weight), "\n\n***\tTest 4 failed: the engine should be rebuilt"
+        assert copied_stage.neurons == stage.neurons and list(copied_stage.consumed) == list(stage.consumed), "\n\n***\tTest 4 failed: the stage should be rebuilt"
+        assert list(reads) == list(_reads(engine, stage)), "\n\n***\tTest 4 failed: the read synapses should be sent"
+        try:
+            _load_setup(pickle.dumps((engine, stage)))
+            assert False, "\n\n***\tTest 4 failed: a pickled SETUP should be refused"
+        except ValueError:
+            pass
+        print("\n\tTest 4: Passed!")
+
+        print("\n-----All distributed tests passed!-----\n")
+
+
+# Run the test (node processes may import this module, so it only runs as a script)
+if __name__ == '__main__':
+    DistributedTest().test_distributed()
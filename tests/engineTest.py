@@ -0,0 +1,280 @@
+import random
+import sys
+import os
+# Add the parent directory to sys.path
+current_directory = os.path.dirname(os.path.abspath(__file__))
+parent_directory = os.path.dirname(current_directory)
+sys.path.append(parent_directory)
+
+from snn.dendrites import Dendrite
+from snn.membranes import Membrane
+from snn.axons import Axon
+from snn.synapses import Synapse
+from snn.cores import Core
+from snn.neurons import Neuron, SensorNeuron, MotorNeuron
+from snn.engines import Engine, EventEngine, FixedPointEngine
+from snn.connectivity import Connectivity
+from snn.compilers import compile_network
+
+
+def build_objects(weights, delays=None):
+    """Builds 2 sensors -> 3 neurons -> 4 neurons -> 2 motors with the object model, optionally with synapse delays."""
+    sensors = [SensorNeuron() for _ in range(2)]
+    layers = []
+    for size in (3, 4):
+        layer = []
+        for j in range(size):
+            neuron = Neuron(core=Core(
+                dendrites=[Dendrite(weight=weights.pop(0)) for _ in range(2)],
+                membrane=Membrane(threshold=20.0, reset_ratio=0.1, leakage=1),
+                axon=Axon([Synapse(transmitter_type='simple-signal-mediator', initial_level=3, regenerate_rate=0.3,
+                                   delay=delays.pop(0) if delays else 1)]),
+                refractory_period=1, mode='cycle-train'))
+            neuron.core.axon.synapses[0].parent_neuron = neuron
+            layer.append(neuron)
+        layers.append(layer)
+    for j, neuron in enumerate(layers[0]):
+        neuron.core.dendrites[0].connect(sensors[j % 2])
+        neuron.core.dendrites[1].connect(sensors[(j + 1) % 2])
+    for j, neuron in enumerate(layers[1]):
+        # neuron 3 of layer 2 shares the synapse of neuron 0 of layer 1 (first reader consumes it)
+        neuron.core.dendrites[0].connect(layers[0][j % 3].core.axon.synapses[0])
+        neuron.core.dendrites[1].connect(layers[0][(j + 1) % 3].core.axon.synapses[0])
+    motors = [MotorNeuron() for _ in range(2)]
+    motors[0].connect([layers[1][0].core.axon.synapses[0], layers[1][1].core.axon.synapses[0]])
+    motors[1].connect([layers[1][2].core.axon.synapses[0], layers[1][3].core.axon.synapses[0]])
+    return sensors, layers, motors
+
+
+def build_engine(weights, engine_class=Engine, regenerate_rate=0.3):
+    """Builds the same network as build_objects() directly as an Engine (synapse i belongs to neuron i)."""
+    sensor = lambda k: 7 + k
+    dendrite_source = []
+    for j in range(3):
+        dendrite_source += [sensor(j % 2), sensor((j + 1) % 2)]
+    for j in range(4):
+        dendrite_source += [j % 3, (j + 1) % 3]
+    connectivity = Connectivity.from_dendrites(
+        dendrite_neuron=[n for n in range(7) for _ in range(2)], dendrite_source=dendrite_source,
+        weight=weights, n_neurons=7, n_sources=10)
+    return engine_class(stages=[3, 4],
+                  connectivity=connectivity,
+                  synapse_neuron=list(range(7)),
+                  rest=0.0, threshold=20.0, reset_ratio=0.1, leakage=1,
+                  refractory_period=1, mode='cycle-train', initial_level=3, regenerate_rate=regenerate_rate,
+                  sensors=2, motors=[[3, 4], [5, 6]])
+
+
+class EngineTest:
+    def test_step(self):
+        print("\n----------Testing Engine----------")
+
+        random.seed(7)
+        weights = [random.uniform(-5, 25) for _ in range(14)]
+        sensors, layers, motors = build_objects(list(weights))
+        engine = build_engine(weights)
+        neurons = layers[0] + layers[1]
+        fired, moved, shadowed = 0, 0, False
+
+        # Test 1: Engine reproduces the object model tick by tick
+        for tick in range(300):
+            data = [random.choice([0, 0.3, 0.6]) for _ in range(2)]
+            for sensor, value in zip(sensors, data):
+                sensor.set_input(value)
+            engine.set_input(data)
+
+            for sensor in sensors:
+                sensor.step()
+            for neuron in neurons:
+                neuron.step()
+            for motor in motors:
+                motor.step()
+            output = engine.step()
+            fired += engine.spike.sum()
+            moved += output.sum()
+            shadowed |= engine.last_input[12]  # dendrite 0 of the last neuron reads an already consumed synapse
+
+            assert list(output) == [motor.output_value for motor in motors], f"\n\n***\tTest 1 failed: motor output differs on tick {tick}"
+            assert list(engine.v_m) == [n.core.membrane.v_m for n in neurons], f"\n\n***\tTest 1 failed: v_m differs on tick {tick}"
+            assert list(engine.spike) == [n.core.membrane.spike for n in neurons], f"\n\n***\tTest 1 failed: spikes differ on tick {tick}"
+            assert list(engine.level) == [n.core.axon.synapses[0].neurotransmitter_level for n in neurons], f"\n\n***\tTest 1 failed: synapse levels differ on tick {tick}"
+
+            # Test 2: learning of the last layer matches simple_cycle_by_cycle_learning
+            error = random.choice([-0.5, 0, 0.25])
+            for neuron in layers[1]:
+                neuron.backward_propagate(error=error)
+            engine.learn(error, neurons=engine.stages[1])
+            assert list(engine.weight) == [d.weight for n in neurons for d in n.core.dendrites], f"\n\n***\tTest 2 failed: weights differ on tick {tick}"
+        print("\n\tTest 1: Passed!")
+        print("\n\tTest 2: Passed!")
+
+        # Test 3: the network actually fired and the shared synapse was only delivered to its first reader
+        assert fired > 0 and moved > 0, "\n\n***\tTest 3 failed: the network should spike and move the motors"
+        assert not shadowed, "\n\n***\tTest 3 failed: a consumed synapse should not reach its second reader"
+        print("\n\tTest 3: Passed!")
+
+        print("\n-----All engine tests passed!-----\n")
+
+    def test_connectivity(self):
+        print("\n----------Testing Connectivity----------")
+
+        # Test 1: sparse mat-vec equals the sum of the weights of active sources, row by row
+        connectivity = Connectivity.from_dendrites(
+            dendrite_neuron=[0, 0, 1, 3, 3, 3], dendrite_source=[1, 4, 0, 1, 2, 4],
+            weight=[1.5, -2, 3, 4, 5, 6], n_neurons=4, n_sources=5)
+        spikes = [False, True, False, False, True]
+        assert list(connectivity.matvec(spikes)) == [-0.5, 0, 0, 10], "\n\n***\tTest 1 failed: wrong mat-vec result"
+        assert list(connectivity.matvec(spikes, start=3, stop=4)) == [10], "\n\n***\tTest 1 failed: wrong mat-vec of a row range"
+        print("\n\tTest 1: Passed!")
+
+        # Test 2: a connection costs a few bytes
+        connectivity = Connectivity.from_dendrites(
+            dendrite_neuron=[i // 100 for i in range(100_000)], dendrite_source=[i % 5000 for i in range(100_000)],
+            weight=1.0, n_neurons=1000, n_sources=5000, dtype='float32')
+        assert connectivity.nbytes / connectivity.nnz < 9, "\n\n***\tTest 2 failed: connection should take less than 9 bytes"
+        print("\n\tTest 2: Passed!")
+
+        print("\n-----All connectivity tests passed!-----\n")
+
+    def test_event_driven(self):
+        print("\n----------Testing EventEngine----------")
+
+        random.seed(11)
+        weights = [random.uniform(-5, 25) for _ in range(14)]
+        dense = build_engine(weights)
+        events = build_engine(weights, engine_class=EventEngine)
+
+        # Test 1: sparse input, spikes and motor outputs are identical to the dense engine
+        for tick in range(500):
+            data = [random.choice([0, 0, 0, 0, 0.6]) for _ in range(2)]
+            dense.set_input(data)
+            events.set_input(data)
+            assert list(events.step()) == list(dense.step()), f"\n\n***\tTest 1 failed: motor output differs on tick {tick}"
+            assert list(events.spike) == list(dense.spike), f"\n\n***\tTest 1 failed: spikes differ on tick {tick}"
+            assert list(events.last_input) == list(dense.last_input), f"\n\n***\tTest 1 failed: last inputs differ on tick {tick}"
+        print("\n\tTest 1: Passed!")
+
+        # Test 2: after settle() the lazily updated state matches the dense engine
+        events.settle()
+        assert list(events.level) == list(dense.level), "\n\n***\tTest 2 failed: synapse levels should be regenerated exactly"
+        assert list(events.refractory_time_remaining) == list(dense.refractory_time_remaining), "\n\n***\tTest 2 failed: refractory counters differ"
+        assert max(abs(events.v_m - dense.v_m)) < 1e-4, "\n\n***\tTest 2 failed: closed-form leak should match the per-tick leak"
+        print("\n\tTest 2: Passed!")
+
+        # Test 3: a leakage above 100 overshoots the rest, the neuron can fire without input and is never skipped
+        for engine in (dense, events):
+            engine.leakage[4] = 250
+            engine.v_m[4] = -5
+        events.refresh()
+        fired = False
+        for tick in range(10):
+            dense.set_input([0, 0])
+            events.set_input([0, 0])
+            dense.step()
+            events.step()
+            assert list(events.spike) == list(dense.spike), f"\n\n***\tTest 3 failed: spikes differ on tick {tick}"
+            fired = fired or dense.spike[4]
+        assert fired, "\n\n***\tTest 3 failed: the neuron should fire"
+        print("\n\tTest 3: Passed!")
+
+        print("\n-----All event engine tests passed!-----\n")
+
+    def test_fixed_point(self):
+        print("\n----------Testing FixedPointEngine----------")
+
+        random.seed(13)
+        weights = [round(random.uniform(-5, 25), 3) for _ in range(14)]
+        reference = build_engine(weights, regenerate_rate=1)
+        engine = FixedPointEngine.from_engine(build_engine(weights, regenerate_rate=1))
+
+        # Test 1: state is stored as scaled integers
+        assert engine.weight.dtype.name == 'int32' and engine.level.dtype.name == 'int32', "\n\n***\tTest 1 failed: weights and levels should be int32"
+        assert list(engine.weight) == [round(w * 1000) for w in weights], "\n\n***\tTest 1 failed: weights should be in milli-units"
+        print("\n\tTest 1: Passed!")
+
+        # Test 2: integer arithmetic gives the same results as the rounded float arithmetic
+        for tick in range(1000):
+            data = [random.choice([0, 0.3, 0.6]) for _ in range(2)]
+            reference.set_input(data)
+            engine.set_input(data)
+            assert list(engine.step()) == list(reference.step()), f"\n\n***\tTest 2 failed: motor output differs on tick {tick}"
+            assert list(engine.v_m / 10**6) == list(reference.v_m), f"\n\n***\tTest 2 failed: v_m differs on tick {tick}"
+            assert list(engine.level / 10**3) == list(reference.level), f"\n\n***\tTest 2 failed: synapse levels differ on tick {tick}"
+            error = random.choice([-0.5, 0, 0.25])
+            reference.learn(error, neurons=reference.stages[1])
+            engine.learn(error, neurons=engine.stages[1])
+            assert list(engine.weight / 10**3) == list(reference.weight), f"\n\n***\tTest 2 failed: weights differ on tick {tick}"
+        print("\n\tTest 2: Passed!")
+
+        # Test 3: the float engine can be restored
+        restored = engine.to_engine()
+        assert list(restored.v_m) == list(reference.v_m) and list(restored.weight) == list(reference.weight), "\n\n***\tTest 3 failed: float state should be restored"
+        print("\n\tTest 3: Passed!")
+
+        print("\n-----All fixed-point tests passed!-----\n")
+
+    def test_delays(self):
+        print("\n----------Testing Delays----------")
+
+        random.seed(17)
+        weights = [round(random.uniform(-5, 25), 3) for _ in range(14)]
+        delays = [1, 3, 2, 4, 1, 2, 3]
+        sensors, layers, motors = build_objects(list(weights), list(delays))
+        neurons = layers[0] + layers[1]
+        compiled = compile_network(sensors, layers, motors)
+        events = compile_network(sensors, layers, motors, event_driven=True)
+        fixed = compile_network(sensors, layers, motors, fixed_point=True)
+
+        # Test 1: a delayed spike reaches the dendrites delay - 1 ticks later
+        synapse = Synapse(initial_level=10, delay=3)
+        synapse.transmit()
+        received = [synapse.receive_code() for _ in range(1)]
+        for _ in range(3):
+            synapse.propagate()
+            received.append(synapse.receive_code())
+        assert [bool(code) for code in received] == [False, False, True, False], "\n\n***\tTest 1 failed: the transmitter should arrive 2 steps after the spike"
+        print("\n\tTest 1: Passed!")
+
+        # Test 2: the engines keep the delayed spikes in their delay lines and follow the objects
+        delayed = 0
+        for tick in range(300):
+            data = [random.choice([0, 0.3, 0.6]) for _ in range(2)]
+            for sensor, value in zip(sensors, data):
+                sensor.set_input(value)
+            for network in (compiled, events, fixed):
+                network.input(data)
+            for sensor in sensors:
+                sensor.step()
+            for neuron in neurons:
+                neuron.step()
+            for motor in motors:
+                motor.step()
+            output = [motor.output_value for motor in motors]
+            delayed += len(compiled.engine.delayed()[0])
+            for network in (compiled, events, fixed):
+                assert network.step() == output, f"\n\n***\tTest 2 failed: motor output differs on tick {tick}"
+            assert list(compiled.engine.v_m) == [n.core.membrane.v_m for n in neurons], f"\n\n***\tTest 2 failed: v_m differs on tick {tick}"
+            if tick == 150:
+                # the transmitters in flight move between the engine and the objects
+                compiled.sync()
+                compiled = compile_network(sensors, layers, motors)
+        assert delayed > 0, "\n\n***\tTest 2 failed: some spikes should wait in the delay lines"
+        print("\n\tTest 2: Passed!")
+
+        # Test 3: a spike costs no more than its two entries in the delay line
+        engine = build_engine(weights)
+        engine = Engine(**dict(engine._arguments(engine.weight), delay=[5] * 7))
+        assert engine.max_delay == 5 and len(engine._lines) == 5, "\n\n***\tTest 3 failed: there should be one slot per tick of delay"
+        engine.schedule([2, 4], [1, 3], [1, 1])
+        assert [len(p) for slot in engine._lines for p, _ in slot] == [1, 1], "\n\n***\tTest 3 failed: each spike should be one entry"
+        print("\n\tTest 3: Passed!")
+
+        print("\n-----All delay tests passed!-----\n")
+
+
+# Run the test
+EngineTest().test_step()
+EngineTest().test_connectivity()
+EngineTest().test_event_driven()
+EngineTest().test_fixed_point()
+EngineTest().test_delays()
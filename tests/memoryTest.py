@@ -0,0 +1,43 @@
+import sys
+import os
+# Add the parent directory to sys.path
+current_directory = os.path.dirname(os.path.abspath(__file__))
+parent_directory = os.path.dirname(current_directory)
+sys.path.append(parent_directory)
+
+from entities.ai import Brain
+from snn.dendrites import Dendrite
+from snn.membranes import Membrane
+from snn.axons import Axon
+from snn.synapses import Synapse
+from snn.cores import Core
+from snn.neurons import Neuron, SensorNeuron, MotorNeuron
+
+
+class MemoryTest:
+    def test_report(self):
+        print("\n----------Testing Memory----------")
+
+        # Test 1: components are slotted and have no per-instance __dict__
+        synapse = Synapse()
+        core = Core(dendrites=[Dendrite()], membrane=Membrane(), axon=Axon([synapse]))
+        for obj in (synapse, core, core.dendrites[0], core.membrane, core.axon, Neuron(core), SensorNeuron(), MotorNeuron()):
+            assert not hasattr(obj, '__dict__'), f"\n\n***\tTest 1 failed: {type(obj).__name__} should use __slots__"
+        print("\n\tTest 1: Passed!")
+
+        # Test 2: the report counts every neuron and connection of a Brain
+        brain = Brain(input_size=10, hidden_size=[50, 40], output_size=5)
+        report = brain.memory_report()
+        assert report["neurons"] == 10 + 90 + 5 and report["connections"] == 90, "\n\n***\tTest 2 failed: wrong neuron or connection count"
+        assert report["total_bytes"] == report["neuron_bytes"] + report["connection_bytes"], "\n\n***\tTest 2 failed: totals should add up"
+        print("\n\tTest 2: Passed!")
+
+        # Test 3: a connection (dendrite + synapse) stays compact
+        assert 0 < report["bytes_per_connection"] < 300, "\n\n***\tTest 3 failed: a connection should take less than 300 bytes"
+        print("\n\tTest 3: Passed!")
+
+        print("\n-----All memory tests passed!-----\n")
+
+
+# Run the test
+MemoryTest().test_report()
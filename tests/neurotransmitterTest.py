@@ -0,0 +1,64 @@
+import sys
+import os
+# Add the parent directory to sys.path
+current_directory = os.path.dirname(os.path.abspath(__file__))
+parent_directory = os.path.dirname(current_directory)
+sys.path.append(parent_directory)
+
+from snn.neurotransmitters import NO_TRANSMITTER, registry
+from snn.dendrites import Dendrite
+from snn.membranes import Membrane
+from snn.axons import Axon
+from snn.synapses import Synapse
+from snn.cores import Core
+from snn.neurons import Neuron, SensorNeuron, MotorNeuron
+from snn.compilers import compile_network
+
+
+class NeurotransmitterTest:
+    def test_codes(self):
+        print("\n----------Testing Neurotransmitters----------")
+
+        # Test 1: types map to stable small codes, the empty type is NO_TRANSMITTER
+        dopamine = registry.code("dopamine")
+        assert registry.code("dopamine") == dopamine and registry.name(dopamine) == "dopamine", "\n\n***\tTest 1 failed: code should round-trip"
+        assert registry.code("") == NO_TRANSMITTER and 0 < dopamine < 256, "\n\n***\tTest 1 failed: codes should fit in a uint8"
+        print("\n\tTest 1: Passed!")
+
+        # Test 2: synapses carry codes, the names stay available at the API boundary
+        synapse = Synapse(transmitter_type="dopamine")
+        synapse.transmit()
+        assert synapse.received_code == dopamine and synapse.received_transmitter == "dopamine", "\n\n***\tTest 2 failed: transmit should set the code"
+        assert synapse.receive() == "dopamine" and synapse.receive() == "", "\n\n***\tTest 2 failed: receive should return the name once"
+        synapse.transmit()
+        assert synapse.receive_code() == dopamine and synapse.receive_code() == NO_TRANSMITTER, "\n\n***\tTest 2 failed: receive_code should return the code once"
+        print("\n\tTest 2: Passed!")
+
+        # Test 3: dendrites record the received code
+        dendrite = Dendrite(weight=5)
+        dendrite.connect(synapse)
+        synapse.transmit()
+        assert dendrite.step(mode="cycle-train") == 5 and dendrite.last_input_state == (dopamine, 5), "\n\n***\tTest 3 failed: last input state should hold the code"
+        print("\n\tTest 3: Passed!")
+
+        # Test 4: the engine keeps transmitter codes in uint8 arrays and syncs them back
+        sensor = SensorNeuron()
+        neuron = Neuron(core=Core(dendrites=[Dendrite(weight=30)], membrane=Membrane(),
+                                  axon=Axon([Synapse(transmitter_type="dopamine")]), mode="cycle-train"))
+        neuron.core.axon.synapses[0].parent_neuron = neuron
+        neuron.core.dendrites[0].connect(sensor)
+        motor = MotorNeuron()
+        compiled = compile_network([sensor], [[neuron]], [motor])
+        assert compiled.engine.signal.dtype.name == "uint8" and compiled.engine.last_input.dtype.name == "uint8", "\n\n***\tTest 4 failed: transmitter state should be uint8"
+        compiled.input([1])
+        compiled.engine.step()  # no motor reads the synapse, so it keeps the transmitter
+        compiled.sync()
+        assert neuron.core.axon.synapses[0].received_transmitter == "dopamine", "\n\n***\tTest 4 failed: received transmitter should be synced"
+        assert neuron.core.dendrites[0].last_input_state[0] == registry.code("simple-signal-mediator"), "\n\n***\tTest 4 failed: sensor input should be synced"
+        print("\n\tTest 4: Passed!")
+
+        print("\n-----All neurotransmitter tests passed!-----\n")
+
+
+# Run the test
+NeurotransmitterTest().test_codes()
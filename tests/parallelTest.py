@@ -0,0 +1,91 @@
+import random
+import sys
+import os
+# Add the parent directory to sys.path
+current_directory = os.path.dirname(os.path.abspath(__file__))
+parent_directory = os.path.dirname(current_directory)
+sys.path.append(parent_directory)
+
+from entities.ai import Brain
+
+
+class ParallelTest:
+    def test_parallel(self):
+        print("\n----------Testing Parallel Network----------")
+
+        random.seed(6)
+        brain = Brain(input_size=6, hidden_size=[9, 7], output_size=3, phased=True)
+        reference = brain.compile()
+        network = brain.compile_parallel(workers=3)
+
+        # Test 1: the neurons are split in contiguous parts, one per worker
+        assert len(network.workers) == 3, "\n\n***\tTest 1 failed: there should be one process per worker"
+        assert [s.neurons.start for s in network.stages] == [0] + [s.neurons.stop for s in network.stages[:-1]], "\n\n***\tTest 1 failed: parts should be contiguous"
+        print("\n\tTest 1: Passed!")
+
+        # Test 2: the workers give the same outputs, states and weights as one process
+        with network:
+            for tick in range(200):
+                data = [random.choice([0, 0.2, 0.7]) for _ in range(6)]
+                reference.input(data)
+                network.input(data)
+                assert network.step() == reference.step(), f"\n\n***\tTest 2 failed: outputs differ on tick {tick}"
+                error = random.choice([-0.1, 0.0, 0.2])
+                reference.train(error)
+                network.train(error)
+            assert list(network.engine.v_m) == list(reference.engine.v_m), "\n\n***\tTest 2 failed: v_m differs"
+            assert list(network.engine.weight) == list(reference.engine.weight), "\n\n***\tTest 2 failed: weights differ"
+        print("\n\tTest 2: Passed!")
+
+        # Test 3: after close() the network continues in the main process
+        assert not network.workers, "\n\n***\tTest 3 failed: close() should stop the workers"
+        for tick in range(20):
+            data = [random.choice([0, 0.2, 0.7]) for _ in range(6)]
+            reference.input(data)
+            network.input(data)
+            assert network.step() == reference.step(), f"\n\n***\tTest 3 failed: outputs differ on tick {tick}"
+        network.sync()
+        assert [n.core.membrane.v_m for layer in brain.layers for n in layer] == list(reference.engine.v_m), "\n\n***\tTest 3 failed: state not synced"
+        print("\n\tTest 3: Passed!")
+
+        # Test 4: only the phased step can be split
+        try:
+            Brain(input_size=2, hidden_size=[2], output_size=1).compile_parallel(workers=2)
+            assert False, "\n\n***\tTest 4 failed: a sequential brain should be rejected"
+        except ValueError:
+            pass
+        print("\n\tTest 4: Passed!")
+
+        # Test 5: a sync while the workers run writes their delay lines into the synapses, the workers keep going
+        brains = []
+        for _ in range(2):
+            random.seed(14)
+            brains.append(Brain(input_size=6, hidden_size=[9, 7], output_size=3, phased=True))
+            brains[-1].connect_layers(1, 0, p=0.5, delay=3)
+            for layer in brains[-1].layers:
+                for neuron in layer:
+                    for dendrite in neuron.core.dendrites:
+                        dendrite.weight = round(random.uniform(0, 25), 3)
+        reference = brains[0].compile()
+        with brains[1].compile_parallel(workers=2) as network:
+            in_flight = 0
+            for tick in range(60):
+                data = [random.choice([0, 0.7]) for _ in range(6)]
+                reference.input(data)
+                network.input(data)
+                assert network.step() == reference.step(), f"\n\n***\tTest 5 failed: outputs differ on tick {tick}"
+                if tick % 20 == 19:
+                    reference.sync()
+                    network.sync()
+                    flights = [[s.in_flight() for n in layer for s in n.core.axon.synapses] for layer in brains[0].layers]
+                    assert flights == [[s.in_flight() for n in layer for s in n.core.axon.synapses] for layer in brains[1].layers], f"\n\n***\tTest 5 failed: delay lines differ on tick {tick}"
+                    in_flight += sum(len(f) for layer in flights for f in layer)
+            assert in_flight > 0, "\n\n***\tTest 5 failed: transmitters should be in flight"
+        print("\n\tTest 5: Passed!")
+
+        print("\n-----All parallel tests passed!-----\n")
+
+
+# Run the test (worker processes may import this module, so it only runs as a script)
+if __name__ == '__main__':
+    ParallelTest().test_parallel()
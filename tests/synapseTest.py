@@ -0,0 +1,78 @@
+import random
+import sys
+import os
+# Add the parent directory to sys.path
+current_directory = os.path.dirname(os.path.abspath(__file__))
+parent_directory = os.path.dirname(current_directory)
+sys.path.append(parent_directory)
+
+from entities.ai import Brain
+from snn.axons import Axon
+from snn.clocks import Clock
+from snn.membranes import Membrane
+from snn.synapses import Synapse
+
+
+class SynapseTest:
+    def test_lazy_regeneration(self):
+        print("\n----------Testing Synapse----------")
+
+        random.seed(9)
+        clock = Clock()
+        eager = Axon([Synapse(initial_level=5, regenerate_rate=rate) for rate in (0.1, 0.3, 1)])
+        lazy = Axon([Synapse(initial_level=5, regenerate_rate=rate, clock=clock) for rate in (0.1, 0.3, 1)])
+        membrane = Membrane()
+
+        # Test 1: a lazy synapse transmits and regenerates like an eager one
+        for tick in range(500):
+            clock.advance()
+            membrane.spike = random.random() < 0.3
+            eager.step(membrane)
+            lazy.step(membrane)
+            for a, b in zip(eager.synapses, lazy.synapses):
+                assert a.receive() == b.receive(), f"\n\n***\tTest 1 failed: transmission differs on tick {tick}"
+                if tick % 7 == 0:
+                    assert a.neurotransmitter_level == b.neurotransmitter_level, f"\n\n***\tTest 1 failed: level differs on tick {tick}"
+        assert [s.neurotransmitter_level for s in eager.synapses] == [s.neurotransmitter_level for s in lazy.synapses], "\n\n***\tTest 1 failed: final levels differ"
+        print("\n\tTest 1: Passed!")
+
+        # Test 2: lazy synapses only catch up when they are read
+        synapse = lazy.synapses[0]
+        synapse.neurotransmitter_level = 1
+        for _ in range(1000):
+            clock.advance()
+            lazy.step(Membrane())
+        assert synapse._updated == clock.tick - 1000, "\n\n***\tTest 2 failed: an idle synapse should not be updated"
+        assert synapse.neurotransmitter_level == synapse.max_level and synapse._updated == clock.tick, "\n\n***\tTest 2 failed: the level should catch up on read"
+        print("\n\tTest 2: Passed!")
+
+        # Test 3: a Brain with lazy synapses behaves like the eager Brain
+        brain = Brain(input_size=4, hidden_size=[6, 4], output_size=2, lazy_synapses=True)
+        reference = Brain(input_size=4, hidden_size=[6, 4], output_size=2)
+        for layer, reference_layer in zip(brain.layers, reference.layers):
+            for neuron, reference_neuron in zip(layer, reference_layer):
+                reference_neuron.core.dendrites[0].weight = neuron.core.dendrites[0].weight
+        for tick in range(200):
+            data = [random.choice([0, 0.7]) for _ in range(4)]
+            brain.input(data)
+            reference.input(data)
+            assert brain.step() == reference.step(), f"\n\n***\tTest 3 failed: outputs differ on tick {tick}"
+        print("\n\tTest 3: Passed!")
+
+        # Test 4: a long catch-up in closed form ends on the level of the regeneration tick by tick
+        for rate in (0.001, 0.01, 0.05, 0.3):
+            eager = Synapse(initial_level=10, regenerate_rate=rate)
+            lazy = Synapse(initial_level=10, regenerate_rate=rate, clock=clock)
+            eager.neurotransmitter_level = lazy.neurotransmitter_level = 0.5
+            for ticks in (1, 3, 40, 700, 5000):
+                for _ in range(ticks):
+                    eager.regenerate()
+                    clock.advance()
+                assert lazy.neurotransmitter_level == eager.neurotransmitter_level, f"\n\n***\tTest 4 failed: level differs after {ticks} ticks with rate {rate}"
+        print("\n\tTest 4: Passed!")
+
+        print("\n-----All synapse tests passed!-----\n")
+
+
+# Run the test
+SynapseTest().test_lazy_regeneration()